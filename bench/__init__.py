@@ -0,0 +1,2 @@
+# bench/__init__.py
+# Benchmarks hors-ligne (faux serveur Discord). Lancer avec : python -m bench.<script>
@@ -0,0 +1,61 @@
+# bench/bench_evaluation_locks.py
+# Décisions d'évaluation simultanées dans N salons : avec le verrou par salon, le temps total
+# doit rester proche d'une décision seule (et non N fois plus long comme avec un verrou global).
+# Usage : python -m bench.bench_evaluation_locks [--channels 20] [--latency 0.05]
+import argparse
+import asyncio
+import time
+
+import discord
+
+from bench.fakes import make_world
+from cogs import evaluation
+
+
+async def run(channels: int, latency: float, global_lock: bool) -> float:
+    world = await make_world(latency=latency)
+    admin = world.add_role('admin', position=50)
+    test_role = world.add_role('joueur_test', position=2)
+    club_role = world.add_role('joueur_club', position=3)
+    world.bot.config.update({'ADMIN_ROLE_ID': admin.id, 'JOUEUR_TEST_ROLE_ID': test_role.id, 'JOUEUR_CLUB_ROLE_ID': club_role.id})
+    staff = world.add_member('staff', ['admin'])
+    view = evaluation.EvaluationActionView(bot=world.bot)
+    evaluation.CLEANUP_DELAY = 0
+
+    interactions = []
+    for i in range(channels):
+        player = world.add_member(f'joueur{i}', ['joueur_test'])
+        channel = world.add_text_channel(f'eval-joueur{i}', topic=f"EvaluateID:{player.id}")
+        message = world.message(channel, embeds=[discord.Embed(title=f"Évaluation {i}")])
+        interactions.append(world.interaction(staff, channel, 'eval_approve', message))
+
+    serial = asyncio.Lock()
+    async def decide(interaction):
+        start = time.perf_counter()
+        if global_lock: # Comportement historique : un seul verrou pour tout le serveur
+            async with serial: await view.handle_decision(interaction, approved=True)
+        else:
+            await view.handle_decision(interaction, approved=True)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    durations = await asyncio.gather(*(decide(i) for i in interactions))
+    total = time.perf_counter() - start
+    await asyncio.gather(*evaluation._cleanup_tasks)
+    print(f"{'verrou global' if global_lock else 'verrou par salon':>17}: {channels} décisions en {total:.3f}s "
+          f"(max {max(durations):.3f}s/décision, {world.backend.total_calls} appels REST)")
+    return total
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--channels', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.05, help="Latence REST simulée (s)")
+    args = parser.parse_args()
+    serial = await run(args.channels, args.latency, global_lock=True)
+    parallel = await run(args.channels, args.latency, global_lock=False)
+    print(f"Accélération: x{serial / parallel:.1f}")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,50 @@
+# bench/bench_logging.py
+# Coût d'un appel de journalisation côté appelant (donc sur la boucle asyncio) : StreamHandler synchrone
+# vers un fichier, file d'attente différée (utils/logs.py), puis file avec échantillonnage et limitation.
+# Usage : python -m bench.bench_logging [--calls 50000]
+import argparse
+import logging
+import tempfile
+import time
+
+from utils.logs import TEXT_FORMAT, setup_logging
+
+
+def measure(logger: logging.Logger, calls: int) -> list[float]:
+    samples = []
+    for i in range(calls):
+        start = time.perf_counter()
+        logger.info("Stream détecté pour %s (%s) sur %s: %s (%s)", f'joueur{i}', i, 'Twitch', 'Ranked', 'https://twitch.tv/x')
+        samples.append(time.perf_counter() - start)
+    return sorted(samples)
+
+
+def report(label: str, samples: list[float], wall: float):
+    p = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))] * 1e6
+    print(f"{label:<32} p50 {p(0.5):6.1f} µs  p99 {p(0.99):7.1f} µs  max {samples[-1] * 1e6:8.1f} µs  total {wall * 1000:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=50000)
+    args = parser.parse_args()
+    logger = logging.getLogger('cogs.stream_notifier')
+    root = logging.getLogger()
+
+    with tempfile.TemporaryDirectory() as tmp, open(f'{tmp}/sync.log', 'w', encoding='utf-8') as out:
+        handler = logging.StreamHandler(out); handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+        root.handlers[:] = [handler]; root.setLevel(logging.INFO)
+        start = time.perf_counter(); samples = measure(logger, args.calls)
+        report("StreamHandler synchrone", samples, time.perf_counter() - start)
+
+        for label, options in (("File différée", {}), ("File + échantillonnage 1/10", {'sampling': {'cogs.stream_notifier': 10}}),
+                               ("File + limite 120/min", {'per_minute': 120})):
+            with open(f'{tmp}/queued.log', 'w', encoding='utf-8') as queued:
+                listener = setup_logging(json_path=f'{tmp}/queued.jsonl', stream=queued, **options)
+                start = time.perf_counter(); samples = measure(logger, args.calls)
+                report(label, samples, time.perf_counter() - start)
+                listener.stop() # Vide la file (hors mesure)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+# bench/bench_member_cache.py
+# Compare le cache membres complet (chunking au démarrage + présences en cache) au mode léger
+# (LEAN_MEMBER_CACHE=1 : pas de chunking, présences brutes) sur un grand serveur synthétique :
+# mémoire retenue, temps CPU du démarrage et d'une rafale de PRESENCE_UPDATE, annonces de streams.
+# Usage : python -m bench.bench_member_cache [--members 50000] [--updates 50000]
+import argparse
+import asyncio
+import gc
+import random
+import sys
+import time
+import tracemalloc
+
+import discord
+from bench.fakes import drain, make_world, member_payload, presence_payload as presence, snowflake, user_payload
+from utils.bot import PurEsportBot
+from utils.members import get_member_resolver, member_cache_flags_from_config
+
+CHUNK_SIZE = 1000 # Taille des GUILD_MEMBERS_CHUNK envoyés par Discord
+WATCHED_RATIO = 0.01 # Part des membres ayant le rôle suivi (streamers)
+STREAM_RATIO = 0.02 # Part des mises à jour de présence qui sont des débuts/fins de stream
+
+
+async def simulate(members: int, updates: int, lean: bool) -> dict:
+    options = dict(member_cache_flags=member_cache_flags_from_config('none'), chunk_guilds_at_startup=False,
+                   enable_raw_presences=True) if lean else {}
+    world = await make_world(bot_factory=PurEsportBot, **options)
+    bot, guild, state = world.bot, world.guild, world.state
+    watched = world.add_role('streamer', position=5)
+    announce = world.add_text_channel('streams')
+    bot.config.update({'STREAM_WATCH_ROLE_ID': watched.id, 'STREAM_ANNOUNCE_CHANNEL_ID': announce.id, 'LEAN_MEMBER_CACHE': lean})
+    get_member_resolver(bot)
+    await bot.load_extension('cogs.stream_notifier')
+
+    ids = [snowflake() for _ in range(members)]
+    streamers = ids[:max(1, int(members * WATCHED_RATIO))]; streamer_ids = set(streamers)
+    for user_id in ids: # Côté « Discord » : les membres existent, que le bot les mette en cache ou non
+        role_ids = [watched.id] if user_id in streamer_ids else []
+        world.backend.members.setdefault(guild.id, {})[user_id] = member_payload(user_payload(user_id, f'joueur{user_id % 100000}'), role_ids)
+    datas = list(world.backend.members[guild.id].values())
+
+    gc.collect(); tracemalloc.start()
+    cpu = time.process_time()
+    if not lean: # Chunking au démarrage, comme chunk_guild() : GUILD_MEMBERS_CHUNK avec présences
+        request = discord.state.ChunkRequest(guild.id, 0, bot.loop, state._get_guild, cache=True)
+        state._chunk_requests[request.nonce] = request
+        count = (len(datas) + CHUNK_SIZE - 1) // CHUNK_SIZE
+        for index in range(count):
+            chunk = datas[index * CHUNK_SIZE:(index + 1) * CHUNK_SIZE]
+            state.parse_guild_members_chunk({'guild_id': str(guild.id), 'members': chunk, 'chunk_index': index, 'chunk_count': count,
+                                             'nonce': request.nonce, 'presences': [presence(guild.id, int(d['user']['id'])) for d in chunk]})
+    startup_cpu = time.process_time() - cpu
+    gc.collect(); startup_mem = tracemalloc.get_traced_memory()[0]
+
+    rng = random.Random(42) # Même rafale dans les deux modes
+    cpu = time.process_time()
+    for _ in range(updates):
+        if rng.random() < STREAM_RATIO: user_id = rng.choice(streamers); streaming = rng.random() < 0.5
+        else: user_id = rng.choice(ids); streaming = False
+        state.parse_presence_update(presence(guild.id, user_id, streaming, rng))
+        # Un événement à la fois, comme à la lecture du websocket : `after` est le Member du cache,
+        # le traiter après d'autres mises à jour fausserait le mode complet
+        await drain(bot=bot)
+    storm_cpu = time.process_time() - cpu
+    gc.collect(); storm_mem = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    if getattr(bot, 'event_bus', None): await bot.event_bus.close() # Arrête les workers du bus avant la boucle suivante
+    resolver = get_member_resolver(bot)
+    announcements = world.backend.calls['POST /channels/{channel_id}/messages']
+    return {'cached': len(guild._members), 'startup_cpu': startup_cpu, 'startup_mem': startup_mem, 'storm_cpu': storm_cpu,
+            'storm_mem': storm_mem, 'live': len(bot.get_cog('StreamNotifier').currently_live),
+            'fetches': resolver.stats['fetches'], 'announcements': announcements}
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--members', type=int, default=50000)
+    parser.add_argument('--updates', type=int, default=50000)
+    args = parser.parse_args()
+    results = {}
+    for lean in (False, True):
+        r = results[lean] = await simulate(args.members, args.updates, lean)
+        label = "cache léger" if lean else "cache complet"
+        print(f"{label:>14}: {r['cached']:>6} membres en cache | démarrage {r['startup_cpu'] * 1000:8.1f} ms CPU, {r['startup_mem'] / 2**20:7.1f} Mio"
+              f" | {args.updates} présences {r['storm_cpu'] * 1000:8.1f} ms CPU, {r['storm_mem'] / 2**20:7.1f} Mio retenus"
+              f" | {r['announcements']} annonces, {r['live']} en live, {r['fetches']} fetch REST")
+    full, lean = results[False], results[True]
+    print(f"Mémoire retenue : /{full['storm_mem'] / max(1, lean['storm_mem']):.1f} ; CPU présences : /{full['storm_cpu'] / max(1e-9, lean['storm_cpu']):.1f}")
+    # Les deux modes doivent annoncer les mêmes streams
+    sys.exit(0 if full['announcements'] == lean['announcements'] and lean['cached'] <= 1 else 1)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
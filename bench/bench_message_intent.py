@@ -0,0 +1,84 @@
+# bench/bench_message_intent.py
+# Coût par message de salon avec et sans l'intent message_content :
+# octets gateway (JSON brut et compressé zlib-stream) et temps CPU de MESSAGE_CREATE jusqu'à on_message
+# (ancien on_message de commands.Bot avec préfixe '!' contre PurEsportBot.on_message sans contenu).
+# Usage : python -m bench.bench_message_intent [--messages 20000]
+import argparse
+import asyncio
+import json
+import random
+import time
+import types
+import zlib
+
+import discord
+from discord.ext import commands
+from bench.fakes import make_world, member_payload, message_payload, snowflake, user_payload
+from utils.bot import PurEsportBot
+
+COGS = ['cogs.registration', 'cogs.onboarding', 'cogs.ticket_system', 'cogs.evaluation', 'cogs.member_events', 'cogs.stream_notifier']
+WORDS = "gg bien joué match ce soir qui est dispo pour la session on lance une partie défense milieu attaque but".split()
+
+
+def chat_payloads(world, count: int, rng: random.Random) -> list[dict]:
+    """Messages de discussion typiques (avec auteur/membre comme dans MESSAGE_CREATE)."""
+    authors = [user_payload(snowflake(), f"joueur{i}") for i in range(200)]
+    channel = world.add_text_channel('general')
+    payloads = []
+    for _ in range(count):
+        author = rng.choice(authors)
+        data = message_payload(channel.id, author, " ".join(rng.choices(WORDS, k=rng.randint(3, 40))))
+        data['guild_id'] = str(world.guild.id)
+        data['member'] = {k: v for k, v in member_payload(author).items() if k != 'user'}
+        if rng.random() < 0.1: data['embeds'] = [{'type': 'rich', 'title': 'Lien', 'description': " ".join(rng.choices(WORDS, k=30))}]
+        payloads.append(data)
+    return payloads
+
+
+def without_content(data: dict) -> dict:
+    """Ce que Discord envoie sans l'intent : contenu, embeds, pièces jointes et composants vides."""
+    return {**data, 'content': '', 'embeds': [], 'attachments': [], 'components': []}
+
+
+def gateway_bytes(payloads: list[dict]) -> tuple[int, int]:
+    """Taille JSON des événements (op 0) et taille après compression zlib-stream (un contexte partagé)."""
+    raw = compressed = 0
+    stream = zlib.compressobj()
+    for seq, data in enumerate(payloads):
+        frame = json.dumps({'op': 0, 's': seq, 't': 'MESSAGE_CREATE', 'd': data}, separators=(',', ':')).encode()
+        raw += len(frame)
+        compressed += len(stream.compress(frame)) + len(stream.flush(zlib.Z_SYNC_FLUSH))
+    return raw, compressed
+
+
+async def cpu_per_message(payloads: list[dict], content_intent: bool) -> float:
+    intents = discord.Intents.all(); intents.message_content = content_intent
+    world = await make_world(intents=intents, bot_factory=PurEsportBot)
+    bot = world.bot
+    for name in COGS: await bot.load_extension(name)
+    if content_intent: bot.on_message = types.MethodType(commands.Bot.on_message, bot) # Ancien comportement
+    channel = world.add_text_channel('general')
+    current = asyncio.current_task()
+    start = time.process_time()
+    for data in payloads:
+        world.state.parse_message_create({**data, 'channel_id': str(channel.id)})
+        for task in [t for t in asyncio.all_tasks() if t is not current]: await task
+    return (time.process_time() - start) / len(payloads)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--messages', type=int, default=20000)
+    args = parser.parse_args()
+    world = await make_world()
+    full = chat_payloads(world, args.messages, random.Random(42))
+    stripped = [without_content(d) for d in full]
+    for label, payloads in (("avec message_content", full), ("sans message_content", stripped)):
+        raw, compressed = gateway_bytes(payloads)
+        cpu = await cpu_per_message(payloads, payloads is full)
+        print(f"{label:>22}: {raw / len(payloads):7.1f} o/message JSON, {compressed / len(payloads):6.1f} o/message zlib,"
+              f" {cpu * 1e6:7.1f} µs CPU/message (parse + on_message)")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
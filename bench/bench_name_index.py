@@ -0,0 +1,73 @@
+# bench/bench_name_index.py
+# Index trigrammes des noms de joueurs (utils/search.py) : temps de construction au chargement de RegistrationCog,
+# latence des requêtes floues (autocomplétion /joueur, budget Discord de 3 s) et du contrôle de doublon.
+# Usage : python -m bench.bench_name_index [--players 5000] [--queries 2000]
+import argparse
+import random
+import string
+import time
+
+from utils.search import ExactNameIndex, TrigramIndex
+
+SEPARATORS = ' _.-'
+
+
+def gamertag(rng: random.Random) -> str:
+    """Pseudo plausible : mots, majuscules, séparateurs, chiffres ('Pur_LoboW', 'I Bvrcxla I')."""
+    words = [''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 8))) for _ in range(rng.randint(1, 3))]
+    words = [w.capitalize() if rng.random() < 0.6 else w for w in words]
+    tag = rng.choice(SEPARATORS).join(words)
+    return tag + (str(rng.randint(1, 99)) if rng.random() < 0.3 else '')
+
+
+def typo(text: str, rng: random.Random) -> str:
+    """Requête réaliste : préfixe, casse différente, une lettre manquante ou sans séparateurs."""
+    kind = rng.choice(('prefix', 'case', 'drop', 'compact'))
+    if kind == 'prefix': return text[:max(2, len(text) // 2)]
+    if kind == 'case': return text.swapcase()
+    if kind == 'drop' and len(text) > 3:
+        i = rng.randrange(len(text)); return text[:i] + text[i + 1:]
+    return ''.join(c for c in text if c not in SEPARATORS)
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--players', type=int, default=5000)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    players = {str(i): (gamertag(rng), gamertag(rng), gamertag(rng)) for i in range(args.players)}
+    start = time.perf_counter()
+    index, tags = TrigramIndex(), ExactNameIndex()
+    for user_id, names in players.items(): index.add(user_id, *names); tags.add(user_id, names[0])
+    print(f"Construction : {args.players} joueurs en {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    timings, found = [], 0
+    for _ in range(args.queries):
+        user_id = rng.choice(list(players))
+        query = typo(rng.choice(players[user_id]), rng)
+        start = time.perf_counter()
+        results = index.search(query, limit=25)
+        timings.append(time.perf_counter() - start)
+        found += any(key == user_id for key, _ in results)
+    print(f"Recherche floue : p50 {percentile(timings, 0.5) * 1000:.3f} ms, p99 {percentile(timings, 0.99) * 1000:.3f} ms,"
+          f" max {max(timings) * 1000:.3f} ms ; joueur visé dans les 25 résultats : {found / args.queries:.1%}")
+
+    timings = []
+    for _ in range(args.queries):
+        name = players[rng.choice(list(players))][0]
+        start = time.perf_counter()
+        tags.owners(name.upper())
+        timings.append(time.perf_counter() - start)
+    print(f"Contrôle de doublon : p50 {percentile(timings, 0.5) * 1000:.3f} ms, p99 {percentile(timings, 0.99) * 1000:.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
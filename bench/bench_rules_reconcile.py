@@ -0,0 +1,102 @@
+# bench/bench_rules_reconcile.py
+# Réconciliation au démarrage des réactions ✅ au règlement (OnboardingCog.reconcile_rules_reactions) sur un grand
+# serveur synthétique : des dizaines de milliers de réacteurs, dont une partie a réagi pendant que le bot était
+# hors ligne (pas encore vérifiés) et une partie a quitté le serveur. Mesure la durée, les appels REST par route,
+# et vérifie la reprise : une première exécution est interrompue, la seconde repart du point de reprise.
+# Usage : python -m bench.bench_rules_reconcile [--reactors 30000] [--missed 300] [--departed 200] [--latency 0.02] [--rate 5]
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from bench.fakes import make_world, message_payload, snowflake, user_payload
+from utils.bot import PurEsportBot
+from utils.members import member_cache_flags_from_config
+
+GET_REACTIONS = 'GET /channels/{channel_id}/messages/{message_id}/reactions/{emoji}'
+
+
+async def build(reactors: int, missed: int, departed: int, latency: float, rng: random.Random):
+    world = await make_world(latency=latency, bot_factory=PurEsportBot, member_cache_flags=member_cache_flags_from_config('none'),
+                             chunk_guilds_at_startup=False)
+    verified, new_player = world.add_role('vérifié', position=10), world.add_role('nouveau', position=5)
+    rules, registration = world.add_text_channel('règles'), world.add_text_channel('inscription') # Rappel d'enregistrement après vérification
+    rules_message_id = snowflake()
+    world.backend.messages[rules_message_id] = message_payload(rules.id, world.backend.bot_user, 'Règlement', message_id=rules_message_id)
+    world.bot.runtime_config_path = os.path.join(tempfile.mkdtemp(prefix='pur-bench-'), 'config_runtime.json')
+    world.bot.config.update({'RULES_CHANNEL_ID': rules.id, 'RULES_MESSAGE_ID': rules_message_id,
+                             'VERIFIED_PLAYER_ROLE_ID': verified.id, 'NEW_PLAYER_ROLE_ID': new_player.id,
+                             'REGISTRATION_CHANNEL_ID': registration.id})
+
+    pending = set(rng.sample(range(reactors), missed + departed))
+    gone = set(rng.sample(sorted(pending), departed))
+    users = []
+    for i in range(reactors):
+        if i in gone: users.append(user_payload(snowflake(), f'parti{i}')); continue # A réagi puis quitté le serveur
+        member = world.add_member(f'joueur{i}', ['nouveau'] if i in pending else ['vérifié'], cache=False)
+        users.append(world.member_data(member.id)['user'])
+    world.backend.reactions[(rules_message_id, '✅')] = sorted(users, key=lambda u: int(u['id']))
+    await world.bot.load_extension('cogs.onboarding')
+    return world, verified
+
+
+async def run(cog, stop_after_pages: int | None = None):
+    """Exécute la réconciliation ; stop_after_pages simule un arrêt du bot après N pages de réacteurs."""
+    task = asyncio.create_task(cog.reconcile_rules_reactions())
+    if stop_after_pages:
+        while pages_done(cog) < stop_after_pages: await asyncio.sleep(0.005)
+        task.cancel()
+        try: await task
+        except asyncio.CancelledError: pass
+        return None
+    return await task
+
+
+def pages_done(cog) -> int:
+    return cog.bot.http.backend.calls[GET_REACTIONS]
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--reactors', type=int, default=30000)
+    parser.add_argument('--missed', type=int, default=300, help="Réacteurs pas encore vérifiés (réaction pendant l'absence du bot)")
+    parser.add_argument('--departed', type=int, default=200, help="Réacteurs ayant quitté le serveur")
+    parser.add_argument('--latency', type=float, default=0.02, help="Latence REST simulée (s)")
+    parser.add_argument('--rate', type=float, default=None, help="Transitions de rôles par seconde (défaut : RECONCILE_RATE)")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    world, verified = await build(args.reactors, args.missed, args.departed, args.latency, random.Random(args.seed))
+    onboarding = sys.modules['cogs.onboarding']
+    if args.rate: onboarding.RECONCILE_RATE = args.rate
+    cog = world.bot.get_cog('OnboardingCog')
+    backend = world.backend
+
+    # 1. Exécution interrompue au premier tiers des pages
+    total_pages = -(-args.reactors // onboarding.RECONCILE_PAGE_SIZE)
+    await run(cog, stop_after_pages=max(1, total_pages // 3))
+    checkpoint = world.bot.read_runtime_config().get('rules_reconcile_checkpoint')
+    first_pages = backend.calls[GET_REACTIONS]
+    backend.reset()
+
+    # 2. Reprise jusqu'au bout
+    start = time.perf_counter()
+    stats = await run(cog)
+    elapsed = time.perf_counter() - start
+    members = backend.members[world.guild.id]
+    still_missing = sum(1 for m in members.values() if str(verified.id) not in m['roles'] and m['user']['id'] != backend.bot_user['id'])
+
+    print(f"Interruption après {first_pages} pages (point de reprise : utilisateur {checkpoint and checkpoint['after']}).")
+    print(f"Reprise : {args.reactors} réacteurs au total, terminée en {elapsed:.1f}s : {dict(stats)}")
+    print(f"  pages de réacteurs relues : {backend.calls[GET_REACTIONS]} sur {total_pages} ; membres non vérifiés restants : {still_missing}")
+    print(f"Appels REST de la reprise : {backend.total_calls}")
+    for route, count in backend.calls.most_common(): print(f"  {route:<70} {count:>6}")
+    print("Point de reprise effacé en fin d'exécution :", json.dumps(world.bot.read_runtime_config().get('rules_reconcile_checkpoint')))
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,56 @@
+# bench/bench_view_registry.py
+# Simule des reconnexions gateway (on_ready répété) et vérifie que le nombre de vues persistantes
+# et la mémoire ne grossissent pas. Compare avec l'ancien enregistrement dans on_ready.
+# Usage : python -m bench.bench_view_registry [--reconnects 500]
+import argparse
+import asyncio
+import gc
+import sys
+import tracemalloc
+
+from bench.fakes import make_world
+from utils.bot import PurEsportBot
+from utils.views import get_view_registry
+
+COGS = ['cogs.registration', 'cogs.ticket_system', 'cogs.evaluation']
+
+
+async def simulate(reconnects: int, legacy: bool) -> tuple[int, int]:
+    world = await make_world(bot_factory=PurEsportBot)
+    bot = world.bot
+    async def no_presence(**kwargs): pass
+    bot.change_presence = no_presence # Pas de websocket dans le faux serveur
+    for name in COGS: await bot.load_extension(name)
+    await bot.setup_hook()
+    registry = get_view_registry(bot)
+
+    async def reconnect():
+        await bot.on_ready()
+        if legacy: # Ancien main.py : nouvelles instances à chaque on_ready
+            for factory in registry._factories.values(): bot.add_view(factory(bot))
+
+    await reconnect() # Échauffement (caches internes)
+    gc.collect(); tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(reconnects): await reconnect()
+    gc.collect()
+    growth = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(before, 'filename'))
+    tracemalloc.stop()
+    return len(bot.persistent_views), growth
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--reconnects', type=int, default=500)
+    args = parser.parse_args()
+    ok = True
+    for legacy in (True, False):
+        views, growth = await simulate(args.reconnects, legacy)
+        label = "ancien on_ready" if legacy else "registre/setup_hook"
+        print(f"{label:>20}: {views} vues persistantes, {growth / 1024:+.1f} Kio après {args.reconnects} reconnexions")
+        if not legacy and views != len(COGS): ok = False
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
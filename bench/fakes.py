@@ -0,0 +1,406 @@
+# bench/fakes.py
+# Faux serveur Discord pour les benchmarks hors-ligne : vrais objets discord.py,
+# couche HTTP remplacée par un enregistreur qui fabrique des réponses plausibles.
+import asyncio
+import itertools
+import json
+import random
+import re
+import time
+import urllib.parse
+from collections import Counter
+from contextvars import ContextVar
+
+import discord
+from discord.ext import commands
+from discord.http import HTTPClient
+
+_snowflakes = itertools.count(1_100_000_000_000_000_000)
+
+# Portée des appels REST : objet avec un Counter `calls`, hérité par les tâches créées (listeners, callbacks
+# de vues) ; permet d'attribuer les appels à un parcours utilisateur quand plusieurs s'entrelacent
+call_scope: ContextVar = ContextVar('bench_call_scope', default=None)
+
+
+def snowflake() -> int:
+    return next(_snowflakes)
+
+
+def iso_now() -> str:
+    return discord.utils.utcnow().isoformat()
+
+
+def user_payload(user_id: int, name: str, bot: bool = False) -> dict:
+    return {'id': str(user_id), 'username': name, 'discriminator': '0', 'global_name': None, 'avatar': None, 'bot': bot}
+
+
+def member_payload(user: dict, role_ids=(), joined_at: str | None = None) -> dict:
+    return {'user': user, 'roles': [str(r) for r in role_ids], 'joined_at': joined_at or iso_now(),
+            'deaf': False, 'mute': False, 'flags': 0}
+
+
+def role_payload(role_id: int, name: str, position: int, permissions: int = 0) -> dict:
+    return {'id': str(role_id), 'name': name, 'position': position, 'permissions': str(permissions), 'color': 0,
+            'hoist': False, 'managed': False, 'mentionable': True, 'flags': 0}
+
+
+def channel_payload(channel_id: int, guild_id: int, name: str, type: int = 0, parent_id: int | None = None, topic: str | None = None) -> dict:
+    return {'id': str(channel_id), 'guild_id': str(guild_id), 'name': name, 'type': type, 'position': 0,
+            'permission_overwrites': [], 'parent_id': str(parent_id) if parent_id else None, 'topic': topic, 'nsfw': False}
+
+
+def message_payload(channel_id: int, author: dict, content: str = '', embeds=(), message_id: int | None = None) -> dict:
+    return {'id': str(message_id or snowflake()), 'channel_id': str(channel_id), 'author': author, 'content': content or '',
+            'embeds': list(embeds), 'attachments': [], 'mentions': [], 'mention_roles': [], 'pinned': False,
+            'mention_everyone': False, 'tts': False, 'timestamp': iso_now(), 'edited_timestamp': None,
+            'type': 0, 'flags': 0, 'components': []}
+
+
+def presence_payload(guild_id: int, user_id: int, streaming: bool = False, rng=random) -> dict:
+    """PRESENCE_UPDATE : un stream (type 1) ou un jeu quelconque."""
+    if streaming: activity = {'type': 1, 'name': 'Twitch', 'url': f'https://twitch.tv/u{user_id}', 'details': 'Scrim', 'state': 'EA FC'}
+    else: activity = {'type': 0, 'name': rng.choice(('EA FC', 'Rocket League', 'Valorant'))}
+    return {'user': {'id': str(user_id)}, 'guild_id': str(guild_id), 'status': rng.choice(('online', 'idle', 'dnd')),
+            'activities': [activity], 'client_status': {'desktop': 'online'}}
+
+
+def reaction_payload(guild_id: int, channel_id: int, message_id: int, member: dict, emoji: str = '✅') -> dict:
+    """MESSAGE_REACTION_ADD tel qu'envoyé sur un serveur (membre inclus)."""
+    return {'user_id': member['user']['id'], 'channel_id': str(channel_id), 'message_id': str(message_id), 'guild_id': str(guild_id),
+            'emoji': {'id': None, 'name': emoji}, 'member': member, 'burst': False, 'type': 0}
+
+
+def _long_lived(task: asyncio.Task) -> bool:
+    """Workers permanents : un par abonné du bus ('event-bus:<abonné>') et le journal d'audit ('audit-log')."""
+    name = task.get_name()
+    return name == 'audit-log' or (name.startswith('event-bus:') and name.count(':') == 1)
+
+
+async def drain(*keep: asyncio.Task, bot=None):
+    """Attend la fin des tâches d'événements créées par dispatch (hors tâche courante, `keep` et workers permanents).
+    Avec `bot`, attend aussi que les files du bus d'événements soient traitées."""
+    ignored = {asyncio.current_task(), *keep}
+    bus = getattr(bot, 'event_bus', None)
+    while True:
+        if (pending := [t for t in asyncio.all_tasks() if t not in ignored and not _long_lived(t)]):
+            await asyncio.gather(*pending, return_exceptions=True)
+        elif bus and any(not s.queue.empty() for s in bus.subscriptions):
+            await asyncio.gather(*(s.queue.join() for s in bus.subscriptions))
+        else: return
+
+
+def _template_regex(path: str) -> re.Pattern:
+    return re.compile('^' + re.sub(r'\{(\w+)\}', r'(?P<\1>[^/]+)', re.escape(path).replace(r'\{', '{').replace(r'\}', '}')) + '$')
+
+
+class FakeResponse:
+    """Réponse minimale acceptée par discord.HTTPException et json_or_text."""
+    def __init__(self, status: int, data=None, reason: str = 'OK'):
+        self.status = status
+        self.reason = reason
+        self._data = data
+        self.headers = {'content-type': 'application/json'}
+
+    async def text(self, encoding: str = 'utf-8') -> str:
+        return json.dumps(self._data) if self._data is not None else ''
+
+    async def __aenter__(self): return self
+    async def __aexit__(self, *exc): return False
+
+
+class FakeBackend:
+    """État du faux serveur + enregistrement des appels REST (route -> nombre, latence simulée)."""
+
+    def __init__(self, latency: float = 0.0, route_latency: dict | None = None):
+        self.latency = latency
+        self.route_latency = route_latency or {}
+        self.calls: Counter = Counter()
+        self.log: list[tuple[float, str]] = []
+        self.members: dict[int, dict[int, dict]] = {} # guild_id -> user_id -> member payload
+        self.bot_user: dict = user_payload(snowflake(), 'PurBot', bot=True)
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.records: list[tuple[str, dict, dict, object]] = [] # (route, paramètres, corps envoyé, réponse)
+        self._waiters: list[tuple[object, asyncio.Future]] = []
+        self.state = None # ConnectionState : renvoie les événements gateway des créations/suppressions (make_world(echo=True))
+        self.messages: dict[int, dict] = {} # message_id -> payload (fetch_message)
+        self.reactions: dict[tuple[int, str], list[dict]] = {} # (message_id, emoji) -> utilisateurs, IDs croissants
+
+    def reset(self):
+        self.calls.clear(); self.log.clear(); self.records.clear(); self.peak_in_flight = 0
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    async def handle(self, method: str, path: str, params: dict, payload) -> tuple[int, object]:
+        key = f"{method} {path}"
+        self.calls[key] += 1
+        scope = call_scope.get()
+        if scope is not None: scope.calls[key] += 1
+        self.log.append((time.perf_counter(), key))
+        self.in_flight += 1; self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            delay = self.route_latency.get(key, self.latency)
+            if delay: await asyncio.sleep(delay)
+            status, data = self._respond(method, path, params, payload or {})
+        finally:
+            self.in_flight -= 1
+        if status < 300: self._record((key, params, payload or {}, data))
+        return status, data
+
+    def _record(self, record: tuple):
+        self.records.append(record)
+        for waiter in list(self._waiters):
+            check, future = waiter
+            if not future.done() and check(record):
+                future.set_result(record); self._waiters.remove(waiter)
+        if self.state is not None: self._echo(*record)
+
+    async def wait_for_call(self, check, timeout: float = 30.0) -> tuple[str, dict, dict, object]:
+        """Premier appel réussi (déjà reçu ou à venir) pour lequel check(route, paramètres, corps, réponse) est vrai."""
+        for record in self.records:
+            if check(record): return record
+        future = asyncio.get_running_loop().create_future()
+        waiter = (check, future)
+        self._waiters.append(waiter)
+        try: return await asyncio.wait_for(future, timeout)
+        finally:
+            if waiter in self._waiters: self._waiters.remove(waiter)
+
+    def _echo(self, key: str, p: dict, payload: dict, data):
+        """Événements gateway que Discord enverrait après l'appel, livrés à l'itération suivante de la boucle."""
+        state, loop = self.state, asyncio.get_running_loop()
+        if key == 'POST /guilds/{guild_id}/channels':
+            loop.call_soon(state.parse_channel_create, data)
+        elif key == 'DELETE /channels/{channel_id}':
+            channel = state.get_channel(int(p['channel_id']))
+            if channel is not None and getattr(channel, 'guild', None):
+                loop.call_soon(state.parse_channel_delete, {'id': p['channel_id'], 'guild_id': str(channel.guild.id), 'type': channel.type.value})
+        elif key.startswith(('PUT /guilds/{guild_id}/members/{user_id}', 'DELETE /guilds/{guild_id}/members/{user_id}/roles', 'PATCH /guilds/{guild_id}/members/{user_id}')):
+            member = self.members.get(int(p['guild_id']), {}).get(int(p['user_id']))
+            if member: loop.call_soon(state.parse_guild_member_update, {**member, 'guild_id': p['guild_id']})
+
+    def _respond(self, method: str, path: str, p: dict, payload: dict) -> tuple[int, object]:
+        key = f"{method} {path}"
+        if key == 'GET /guilds/{guild_id}/members/{user_id}':
+            member = self.members.get(int(p['guild_id']), {}).get(int(p['user_id']))
+            return (200, member) if member else (404, {'code': 10007, 'message': 'Unknown Member'})
+        if key == 'GET /guilds/{guild_id}/members': # Pagination par ID croissant (limit <= 1000, after)
+            after, limit = int(p.get('after') or 0), int(p.get('limit') or 1)
+            members = sorted(self.members.get(int(p['guild_id']), {}).items())
+            return 200, [m for uid, m in members if uid > after][:limit]
+        if key == 'GET /channels/{channel_id}/messages/{message_id}':
+            message = self.messages.get(int(p['message_id']))
+            if not message: return 404, {'code': 10008, 'message': 'Unknown Message'}
+            reactions = [{'emoji': {'id': None, 'name': emoji}, 'count': len(users), 'me': False, 'count_details': {'burst': 0, 'normal': len(users)},
+                          'me_burst': False, 'burst_colors': []} for (mid, emoji), users in self.reactions.items() if mid == int(p['message_id'])]
+            return 200, {**message, 'reactions': reactions}
+        if key == 'GET /channels/{channel_id}/messages/{message_id}/reactions/{emoji}':
+            users = self.reactions.get((int(p['message_id']), urllib.parse.unquote(p['emoji'])), [])
+            after, limit = int(p.get('after') or 0), int(p.get('limit') or 25)
+            return 200, [u for u in users if int(u['id']) > after][:limit]
+        if key == 'PATCH /guilds/{guild_id}/members/{user_id}':
+            member = dict(self.members.get(int(p['guild_id']), {}).get(int(p['user_id'])) or member_payload(user_payload(int(p['user_id']), 'inconnu')))
+            if 'roles' in payload: member['roles'] = [str(r) for r in payload['roles']]
+            if int(p['user_id']) in self.members.get(int(p['guild_id']), {}): self.members[int(p['guild_id'])][int(p['user_id'])] = member
+            return 200, member
+        if key in ('PUT /guilds/{guild_id}/members/{user_id}/roles/{role_id}', 'DELETE /guilds/{guild_id}/members/{user_id}/roles/{role_id}'):
+            member = self.members.get(int(p['guild_id']), {}).get(int(p['user_id']))
+            if member:
+                roles = [r for r in member['roles'] if r != p['role_id']] + ([p['role_id']] if method == 'PUT' else [])
+                self.members[int(p['guild_id'])][int(p['user_id'])] = {**member, 'roles': roles}
+            return 204, None
+        if key == 'POST /channels/{channel_id}/messages':
+            data = message_payload(int(p['channel_id']), self.bot_user, payload.get('content'), payload.get('embeds') or ())
+            data['components'] = payload.get('components') or []
+            return 200, data
+        if key == 'PATCH /channels/{channel_id}/messages/{message_id}':
+            return 200, message_payload(int(p['channel_id']), self.bot_user, payload.get('content'), payload.get('embeds') or (), int(p['message_id']))
+        if key == 'POST /guilds/{guild_id}/channels':
+            return 200, channel_payload(snowflake(), int(p['guild_id']), payload.get('name', 'salon'), payload.get('type', 0), payload.get('parent_id'), payload.get('topic'))
+        if key == 'POST /channels/{channel_id}/threads':
+            data = channel_payload(snowflake(), 0, payload.get('name', 'thread'), payload.get('type', 12), int(p['channel_id']))
+            data.update({'owner_id': self.bot_user['id'], 'thread_metadata': {'archived': False, 'auto_archive_duration': 10080, 'archive_timestamp': iso_now(), 'locked': False}})
+            return 200, data
+        if key == 'DELETE /channels/{channel_id}':
+            return 200, channel_payload(int(p['channel_id']), 0, 'supprime')
+        if key == 'POST /users/@me/channels':
+            return 200, {'id': str(snowflake()), 'type': 1, 'recipients': [user_payload(int(payload.get('recipient_id', 0)), 'dm')]}
+        if key == 'POST /interactions/{webhook_id}/{webhook_token}/callback':
+            return 200, {'interaction': {'id': p['webhook_id'], 'type': 2}}
+        if key in ('POST /webhooks/{webhook_id}/{webhook_token}', 'PATCH /webhooks/{webhook_id}/{webhook_token}/messages/@original',
+                   'PATCH /webhooks/{webhook_id}/{webhook_token}/messages/{message_id}'):
+            return 200, message_payload(snowflake(), self.bot_user, payload.get('content'), payload.get('embeds') or ())
+        if key == 'PUT /applications/{application_id}/guilds/{guild_id}/commands':
+            self.synced_commands = [{**c, 'id': str(snowflake()), 'application_id': p['application_id'], 'guild_id': p['guild_id'], 'version': str(snowflake())}
+                                    for c in payload]
+            return 200, self.synced_commands
+        if method == 'GET':
+            return 200, []
+        return 204, None
+
+
+# Routes connues (gabarits), pour retrouver les paramètres à partir de l'URL
+_ROUTES = [
+    '/guilds/{guild_id}/members/{user_id}/roles/{role_id}', '/guilds/{guild_id}/members/{user_id}',
+    '/guilds/{guild_id}/members', '/guilds/{guild_id}/channels', '/guilds/{guild_id}',
+    '/channels/{channel_id}/messages/{message_id}/reactions/{emoji}/@me', '/channels/{channel_id}/messages/{message_id}/reactions/{emoji}',
+    '/channels/{channel_id}/messages/bulk-delete',
+    '/channels/{channel_id}/messages/{message_id}', '/channels/{channel_id}/messages', '/channels/{channel_id}/threads',
+    '/channels/{channel_id}/thread-members/{user_id}', '/channels/{channel_id}/pins/{message_id}', '/channels/{channel_id}/pins',
+    '/channels/{channel_id}', '/users/@me/channels', '/applications/{application_id}/guilds/{guild_id}/commands',
+    '/interactions/{webhook_id}/{webhook_token}/callback', '/webhooks/{webhook_id}/{webhook_token}/messages/@original',
+    '/webhooks/{webhook_id}/{webhook_token}/messages/{message_id}', '/webhooks/{webhook_id}/{webhook_token}',
+]
+_ROUTE_REGEX = [(path, _template_regex(path)) for path in _ROUTES]
+
+
+def _match(url: str) -> tuple[str, dict]:
+    path = url.split('/api/v10', 1)[-1].split('?', 1)[0]
+    for template, regex in _ROUTE_REGEX:
+        m = regex.match(path)
+        if m: return template, m.groupdict()
+    return path, {}
+
+
+class RecordingHTTPClient(HTTPClient):
+    """HTTPClient dont les requêtes REST sont servies par le FakeBackend."""
+
+    def __init__(self, backend: FakeBackend, loop):
+        super().__init__(loop)
+        self.backend = backend
+        self._HTTPClient__session = FakeSession(backend) # Utilisé par les interactions/webhooks
+
+    async def request(self, route, *, files=None, form=None, **kwargs):
+        template, params = _match(route.url)
+        params.update({k: v for k, v in (kwargs.get('params') or {}).items() if v is not None}) # Paramètres de requête (limit, after...)
+        status, data = await self.backend.handle(route.method, template, params, kwargs.get('json'))
+        if status == 404: raise discord.NotFound(FakeResponse(404, data, 'Not Found'), data)
+        if status == 403: raise discord.Forbidden(FakeResponse(403, data, 'Forbidden'), data)
+        return data
+
+
+class FakeSession:
+    """Remplace l'aiohttp.ClientSession utilisée par l'adaptateur webhook des interactions."""
+
+    def __init__(self, backend: FakeBackend):
+        self.backend = backend
+
+    def request(self, method, url, data=None, **kwargs):
+        return _FakeRequest(self.backend, method, url, data)
+
+
+class _FakeRequest:
+    def __init__(self, backend, method, url, data):
+        self.backend, self.method, self.url, self.data = backend, method, url, data
+
+    async def __aenter__(self):
+        template, params = _match(self.url)
+        payload = json.loads(self.data) if isinstance(self.data, str) else None
+        status, data = await self.backend.handle(self.method, template, params, payload)
+        return FakeResponse(status, data)
+
+    async def __aexit__(self, *exc): return False
+
+
+class FakeWorld:
+    """Bot réel + serveur synthétique (rôles, salons, membres) branchés sur le FakeBackend."""
+
+    def __init__(self, bot: commands.Bot, backend: FakeBackend, guild: discord.Guild):
+        self.bot, self.backend, self.guild = bot, backend, guild
+        self.state = bot._connection
+        self.roles: dict[str, discord.Role] = {}
+        self.channels: dict[str, discord.TextChannel] = {}
+
+    def add_role(self, key: str, position: int = 1, permissions: int = 0) -> discord.Role:
+        role = discord.Role(guild=self.guild, state=self.state, data=role_payload(snowflake(), key, position, permissions))
+        self.guild._add_role(role)
+        self.roles[key] = role
+        return role
+
+    def add_text_channel(self, key: str, parent_id: int | None = None, topic: str | None = None, type: int = 0):
+        factory, _ = discord.channel._guild_channel_factory(type)
+        channel = factory(state=self.state, guild=self.guild, data=channel_payload(snowflake(), self.guild.id, key, type, parent_id, topic))
+        self.guild._add_channel(channel)
+        self.channels[key] = channel
+        return channel
+
+    def add_member(self, name: str, role_keys=(), cache: bool = True) -> discord.Member:
+        data = member_payload(user_payload(snowflake(), name), [self.roles[k].id for k in role_keys])
+        self.backend.members.setdefault(self.guild.id, {})[int(data['user']['id'])] = data
+        member = discord.Member(data=data, guild=self.guild, state=self.state)
+        if cache: self.guild._add_member(member)
+        return member
+
+    def member_data(self, member_id: int) -> dict:
+        return self.backend.members[self.guild.id][member_id]
+
+    def message(self, channel, content: str = '', embeds=()) -> discord.Message:
+        return discord.Message(state=self.state, channel=channel, data=message_payload(channel.id, self.backend.bot_user, content, [e.to_dict() for e in embeds]))
+
+    def interaction_payload(self, user: discord.Member, channel, type: int, data: dict, message: discord.Message | dict | None = None) -> dict:
+        """INTERACTION_CREATE (3 = composant, 5 = formulaire) ; `message` : Message ou payload renvoyé par le backend."""
+        payload = {
+            'id': str(snowflake()), 'application_id': self.backend.bot_user['id'], 'type': type, 'token': f"tok{snowflake()}", 'version': 1,
+            'guild_id': str(self.guild.id), 'channel': {'id': str(channel.id), 'type': channel.type.value}, 'channel_id': str(channel.id),
+            'member': self.member_data(user.id) | {'permissions': '8' if user.guild_permissions.administrator else '0'},
+            'data': data, 'app_permissions': '8', 'locale': 'fr',
+        }
+        if isinstance(message, dict): payload['message'] = message
+        elif message is not None:
+            payload['message'] = message_payload(channel.id, self.backend.bot_user, message.content, [e.to_dict() for e in message.embeds], message.id)
+        return payload
+
+    def interaction(self, user: discord.Member, channel, custom_id: str, message: discord.Message | None = None) -> discord.Interaction:
+        data = self.interaction_payload(user, channel, 3, {'custom_id': custom_id, 'component_type': 2}, message)
+        return discord.Interaction(data=data, state=self.state)
+
+    def click(self, user: discord.Member, channel, message: dict, custom_id: str, values: list[str] | None = None) -> dict:
+        """Clic sur un bouton (ou choix dans un menu si `values`) d'un message envoyé par le bot, via la gateway.
+        Retourne le payload de l'interaction."""
+        data = {'custom_id': custom_id, 'component_type': 3 if values is not None else 2}
+        if values is not None: data['values'] = values
+        payload = self.interaction_payload(user, channel, 3, data, message)
+        self.state.parse_interaction_create(payload)
+        return payload
+
+    def submit_modal(self, user: discord.Member, channel, modal: dict, values: dict[str, str]) -> dict:
+        """Validation d'un formulaire (payload 'data' de la réponse type 9) ; `values` par libellé de champ."""
+        rows = []
+        for row in modal['components']:
+            field = row['components'][0]
+            rows.append({'type': 1, 'components': [{'type': 4, 'custom_id': field['custom_id'], 'value': values.get(field['label'], field.get('value') or '')}]})
+        payload = self.interaction_payload(user, channel, 5, {'custom_id': modal['custom_id'], 'components': rows})
+        self.state.parse_interaction_create(payload)
+        return payload
+
+
+async def make_world(config: dict | None = None, latency: float = 0.0, route_latency: dict | None = None,
+                     intents: discord.Intents | None = None, bot_factory=commands.Bot, echo: bool = False, **bot_options) -> FakeWorld:
+    """Construit un bot non connecté avec un serveur synthétique. À appeler dans une boucle asyncio active.
+    bot_options est transmis au constructeur du bot (member_cache_flags, enable_raw_presences...).
+    echo=True : les créations/suppressions de salons et changements de rôles reviennent comme événements gateway."""
+    backend = FakeBackend(latency, route_latency)
+    bot = bot_factory(command_prefix='!', intents=intents or discord.Intents.all(), **bot_options)
+    bot.loop = asyncio.get_running_loop()
+    http = RecordingHTTPClient(backend, bot.loop)
+    bot.http = http
+    bot.tree._http = http # Référence prise à la construction de l'arbre des commandes slash
+    state = bot._connection
+    state.http = http
+    if echo: backend.state = state
+    state.user = discord.ClientUser(state=state, data=backend.bot_user)
+    state.application_id = int(backend.bot_user['id'])
+
+    guild_id = snowflake()
+    guild = discord.Guild(data={'id': str(guild_id), 'name': 'Pur Esport (bench)', 'roles': [role_payload(guild_id, '@everyone', 0)],
+                                'owner_id': str(snowflake()), 'member_count': 0, 'features': [], 'emojis': [], 'stickers': []}, state=state)
+    state._add_guild(guild)
+    world = FakeWorld(bot, backend, guild)
+    bot_role = world.add_role('bot', position=100, permissions=8)
+    bot_member_data = member_payload(backend.bot_user, [bot_role.id])
+    backend.members.setdefault(guild_id, {})[int(backend.bot_user['id'])] = bot_member_data
+    guild._add_member(discord.Member(data=bot_member_data, guild=guild, state=state))
+    bot.config = {'GUILD_ID': guild_id, **(config or {})}
+    return world
@@ -0,0 +1,234 @@
+# bench/load_journeys.py
+# Test de charge des parcours utilisateurs, sur les vrais callbacks de vues et le faux serveur :
+#   inscription : réaction aux règles -> MP -> bouton « Créer mon joueur » du panneau épinglé -> formulaire -> 4 menus
+#                 -> rôles, présentation, purge du salon
+#   ticket      : bouton « Créer un ticket » (TicketCreationView) -> salon privé -> bouton « Fermer le ticket »
+#   évaluation  : ouverture par le staff -> bouton « Test approuvé » (EvaluationActionView) -> rôles, suppression
+# Les sessions simultanées augmentent par paliers. Rapporte les appels REST par parcours, la durée côté bot
+# (hors temps de réflexion des joueurs) et le plus grand palier tenu avant que le p95 ne dépasse
+# `--degradation` fois celui du premier palier.
+# Usage : python -m bench.load_journeys [--levels 1,8,32,128] [--latency 0.05] [--think 0.2] [--degradation 1.5]
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from bench.fakes import call_scope, make_world, message_payload, reaction_payload, snowflake
+from utils.bot import PurEsportBot
+from utils.watchdog import LoopWatchdog
+
+COGS = ['cogs.registration', 'cogs.onboarding', 'cogs.ticket_system', 'cogs.evaluation']
+KINDS = ('inscription', 'ticket', 'évaluation')
+POST_MESSAGE = 'POST /channels/{channel_id}/messages'
+CALLBACK = 'POST /interactions/{webhook_id}/{webhook_token}/callback'
+MODAL_NAME_LABEL = 'Nom de joueur principal (GT/PSN/EA ID)'
+MODAL_ANSWERS = {MODAL_NAME_LABEL: 'Joueur_EA', 'Expérience Club Pro': "D1 depuis deux saisons, jeu en pivot."}
+
+
+class Journey:
+    """Un parcours : appels REST attribués (via call_scope) et tâches créées pendant le parcours."""
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.calls: Counter = Counter()
+        self.tasks: set[asyncio.Task] = set()
+        self.deferred: set[asyncio.Task] = set() # Suppressions différées (delete_after, delete(delay=...))
+        self.think = 0.0
+        self.duration = 0.0
+        self.error: str | None = None
+
+    @property
+    def bot_time(self) -> float:
+        return self.duration - self.think
+
+
+def track_journey_tasks(loop: asyncio.AbstractEventLoop):
+    """Rattache chaque tâche créée (listeners, callbacks de vues, nettoyages) au parcours courant,
+    sauf les minuteries d'expiration des vues. Les suppressions différées sont comptées à part."""
+    def factory(loop, coro, **kwargs):
+        task = asyncio.Task(coro, loop=loop, **kwargs)
+        context = kwargs.get('context') # Contexte propre de la tâche (ex. workers du bus, démarrés dans un contexte vide)
+        journey = context.get(call_scope) if context is not None else call_scope.get()
+        name = getattr(coro, '__qualname__', '')
+        if journey is not None and 'timeout_task' not in name:
+            (journey.deferred if 'delete.<locals>' in name else journey.tasks).add(task)
+        return task
+    loop.set_task_factory(factory)
+
+
+async def settle(tasks: set[asyncio.Task]):
+    while (pending := [t for t in tasks if not t.done()]):
+        await asyncio.wait(pending)
+
+
+def components(message: dict) -> list[dict]:
+    return [c for row in message.get('components') or [] for c in row.get('components', [])]
+
+
+def footer(message: dict) -> str:
+    return " ".join((e.get('footer') or {}).get('text', '') for e in message.get('embeds') or [])
+
+
+class LoadTest:
+    def __init__(self, world, think: float, rng: random.Random):
+        self.world, self.think_time, self.rng = world, think, rng
+        self.guild, self.backend = world.guild, world.backend
+
+    async def think(self, journey: Journey):
+        if self.think_time:
+            await asyncio.sleep(self.think_time); journey.think += self.think_time
+
+    async def message(self, check) -> dict:
+        """Prochain message posté par le bot qui satisfait check(payload)."""
+        return (await self.backend.wait_for_call(lambda r: r[0] == POST_MESSAGE and check(r[3])))[3]
+
+    async def registration(self, journey: Journey):
+        world, channel = self.world, self.world.channels['inscription']
+        user = world.add_member(f'recrue{snowflake() % 100000}', ['nouveau'])
+        rules = world.channels['règles']
+        world.state.parse_message_reaction_add(reaction_payload(self.guild.id, rules.id, world.bot.config['RULES_MESSAGE_ID'], world.member_data(user.id)))
+        await self.message(lambda m: user.mention in (m['content'] or '') and 'Créer mon joueur' in m['content']) # MP vers le panneau
+        await self.think(journey)
+        click = world.click(user, channel, world.registration_panel, 'persistent_register_button')
+        _, _, body, _ = await self.backend.wait_for_call(lambda r: r[0] == CALLBACK and r[1]['webhook_id'] == click['id'] and r[2].get('type') == 9)
+        await self.think(journey)
+        world.submit_modal(user, channel, body['data'], {**MODAL_ANSWERS, MODAL_NAME_LABEL: f'Joueur_EA_{user.id}'}) # Noms uniques (doublons refusés)
+        answered = set()
+        for _ in range(4): # Postes principal/secondaire, disponibilités, compétitions
+            menu = await self.message(lambda m: user.mention in m['content'] and m['id'] not in answered and any(c['type'] == 3 for c in components(m)))
+            answered.add(menu['id'])
+            select = components(menu)[0]
+            picked = self.rng.sample(select['options'], self.rng.randint(select.get('min_values', 1), select.get('max_values', 1)))
+            await self.think(journey)
+            world.click(user, channel, menu, select['custom_id'], [o['value'] for o in picked])
+
+    async def ticket(self, journey: Journey):
+        world = self.world
+        user = world.add_member(f'membre{snowflake() % 100000}')
+        panel = world.channels['tickets']
+        world.click(user, panel, message_payload(panel.id, self.backend.bot_user, message_id=world.ticket_panel_id), 'create_ticket_button')
+        welcome = await self.message(lambda m: f"CréateurID:{user.id}" in footer(m))
+        channel = self.guild.get_channel(int(welcome['channel_id']))
+        await self.think(journey)
+        world.click(user, channel, welcome, 'close_ticket_button_in_channel')
+
+    async def evaluation(self, journey: Journey):
+        world = self.world
+        player = world.add_member(f'test{snowflake() % 100000}', ['joueur_test'])
+        await world.bot.get_cog('EvaluationCog')._start_evaluation(self.guild, world.staff, player)
+        panel = await self.message(lambda m: f"EvaluateID:{player.id}" in footer(m) and components(m))
+        channel = self.guild.get_channel(int(panel['channel_id']))
+        await self.think(journey)
+        world.click(world.staff, channel, panel, 'eval_approve')
+
+    async def session(self, kind: str) -> Journey:
+        journey = Journey(kind)
+        call_scope.set(journey) # Propre à cette tâche, hérité par tout ce qu'elle déclenche
+        steps = {'inscription': self.registration, 'ticket': self.ticket, 'évaluation': self.evaluation}[kind]
+        start = time.perf_counter()
+        try:
+            await steps(journey)
+            await settle(journey.tasks)
+        except Exception as e:
+            journey.error = f"{e.__class__.__name__}: {e}"
+        journey.duration = time.perf_counter() - start
+        await settle(journey.deferred) # Leurs appels REST comptent, pas leur délai
+        return journey
+
+    async def level(self, sessions: int) -> tuple[list[Journey], float, dict]:
+        self.backend.reset()
+        watchdog = LoopWatchdog(interval=0.01, threshold=2.0)
+        watchdog.start()
+        start = time.perf_counter()
+        journeys = await asyncio.gather(*(self.session(kind) for kind in KINDS for _ in range(sessions)))
+        wall = time.perf_counter() - start
+        await watchdog.stop()
+        return journeys, wall, {'peak_in_flight': self.backend.peak_in_flight, 'loop_lag_p99': watchdog.lag.quantile(0.99)}
+
+
+async def build(latency: float):
+    world = await make_world(latency=latency, bot_factory=PurEsportBot, echo=True)
+    for key, position in (('admin', 50), ('staff', 40), ('joueur_club', 30), ('joueur_test', 20), ('vérifié', 10), ('nouveau', 5)):
+        world.add_role(key, position=position)
+    for key in ('règles', 'inscription', 'présentations', 'tickets', 'logs-tickets'): world.add_text_channel(key)
+    ticket_category = world.add_text_channel('Tickets', type=4); eval_category = world.add_text_channel('Évaluations', type=4)
+    world.staff = world.add_member('staff', ['admin', 'staff'])
+    world.ticket_panel_id = snowflake()
+    roles, channels = world.roles, world.channels
+    world.bot.config.update({
+        'ADMIN_ROLE_ID': roles['admin'].id, 'TICKET_STAFF_ROLE_IDS': [roles['staff'].id], 'VERIFIED_PLAYER_ROLE_ID': roles['vérifié'].id,
+        'NEW_PLAYER_ROLE_ID': roles['nouveau'].id, 'JOUEUR_TEST_ROLE_ID': roles['joueur_test'].id, 'JOUEUR_CLUB_ROLE_ID': roles['joueur_club'].id,
+        'RULES_CHANNEL_ID': channels['règles'].id, 'RULES_MESSAGE_ID': snowflake(), 'REGISTRATION_CHANNEL_ID': channels['inscription'].id,
+        'PRESENTATION_CHANNEL_ID': channels['présentations'].id, 'TICKET_CREATION_CHANNEL_ID': channels['tickets'].id,
+        'TICKET_LOG_CHANNEL_ID': channels['logs-tickets'].id, 'TICKET_CATEGORY_ID': ticket_category.id, 'EVALUATION_CATEGORY_ID': eval_category.id,
+        'TICKET_MODE': 'channel', 'EVALUATION_MODE': 'channel', 'LOOP_LAG_THRESHOLD_MS': 0,
+    })
+    bot = world.bot
+    for name in COGS: await bot.load_extension(name)
+    await bot.setup_hook() # Vues persistantes (boutons d'inscription, de ticket et d'évaluation)
+    # Délais de nettoyage à zéro ; données joueurs dans un fichier temporaire
+    registration, tickets, evaluation = (sys.modules[f'cogs.{n}'] for n in ('registration', 'ticket_system', 'evaluation'))
+    registration.CLEANUP_DELAY = tickets.CLOSE_DELAY = evaluation.CLEANUP_DELAY = 0
+    data_dir = tempfile.mkdtemp(prefix='pur-bench-')
+    registration.PLAYER_DATA_FILE = os.path.join(data_dir, 'player_data.json')
+    registration.PLAYER_ARCHIVE_DIR = os.path.join(data_dir, 'player_archive')
+    registration_cog = bot.get_cog('RegistrationCog')
+    registration_cog.rosters.clear() # Rechargées depuis les fichiers temporaires
+    await registration_cog.ensure_panel(registration_cog.roster(world.guild)) # Panneau épinglé unique, comme au on_ready
+    world.registration_panel = (await world.backend.wait_for_call(
+        lambda r: r[0] == POST_MESSAGE and any(c.get('custom_id') == 'persistent_register_button' for c in components(r[3]))))[3]
+    return world
+
+
+def summarize(journeys: list[Journey]) -> dict[str, dict]:
+    summary = {}
+    for kind in KINDS:
+        done = [j for j in journeys if j.kind == kind]
+        ok = sorted(j.bot_time for j in done if not j.error)
+        calls = Counter()
+        for j in done: calls.update(j.calls)
+        summary[kind] = {'count': len(done), 'errors': [j.error for j in done if j.error], 'calls': sum(calls.values()) / max(1, len(done)),
+                         'routes': {route: n / len(done) for route, n in calls.most_common()},
+                         'p50': ok[len(ok) // 2] if ok else 0.0, 'p95': ok[min(len(ok) - 1, int(len(ok) * 0.95))] if ok else 0.0}
+    return summary
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--levels', default='1,8,32,128', help="Sessions simultanées par parcours, par palier")
+    parser.add_argument('--latency', type=float, default=0.05, help="Latence REST simulée (s)")
+    parser.add_argument('--think', type=float, default=0.2, help="Temps de réflexion d'un joueur entre deux actions (s)")
+    parser.add_argument('--degradation', type=float, default=1.5, help="Facteur de p95 au-delà duquel un palier est considéré dégradé")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    track_journey_tasks(asyncio.get_running_loop())
+    world = await build(args.latency)
+    test = LoadTest(world, args.think, random.Random(args.seed))
+    levels = [int(n) for n in args.levels.split(',')]
+    baseline, sustained, failed = None, 0, False
+    for sessions in levels:
+        journeys, wall, extra = await test.level(sessions)
+        summary = summarize(journeys)
+        print(f"--- {sessions} session(s) simultanée(s) par parcours : {len(journeys)} parcours en {wall:.2f}s,"
+              f" pic {extra['peak_in_flight']} appels REST en vol, retard boucle p99 {extra['loop_lag_p99'] * 1000:.1f} ms")
+        for kind, s in summary.items():
+            print(f"  {kind:<12} {s['calls']:5.1f} appels REST/parcours | côté bot p50 {s['p50']:6.3f}s  p95 {s['p95']:6.3f}s"
+                  + (f" | {len(s['errors'])} échecs ({s['errors'][0]})" if s['errors'] else ""))
+        if baseline is None:
+            baseline = summary
+            for kind, s in summary.items():
+                print(f"  Détail {kind} : " + ", ".join(f"{route} x{n:.0f}" for route, n in s['routes'].items()))
+        degraded = any(s['errors'] or s['p95'] > args.degradation * max(baseline[k]['p95'], 1e-3) for k, s in summary.items())
+        if degraded: failed = True
+        elif not failed: sustained = sessions
+    print(f"Sessions simultanées tenues sans dégradation (p95 <= x{args.degradation} du premier palier) : "
+          + (f"{sustained} par parcours ({sustained * len(KINDS)} au total)" if sustained else "aucune"))
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
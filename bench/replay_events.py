@@ -0,0 +1,190 @@
+# bench/replay_events.py
+# Rejoue des rafales d'événements gateway synthétiques (PRESENCE_UPDATE, GUILD_MEMBER_ADD/REMOVE,
+# MESSAGE_REACTION_ADD sur le message des règles) sur les vrais listeners des Cogs, via les parseurs
+# de discord.py. Rapporte le débit, la latence p50/p99 par listener, le retard de la boucle et les
+# appels REST émis. Chaque exécution est ajoutée à un fichier JSON et comparée à la précédente.
+# Usage : python -m bench.replay_events [--events 20000] [--rate 5000] [--mix presence=70,join=10,leave=10,reaction=10]
+#                                       [--members 5000] [--latency 0.02] [--lean] [--output bench/results/replay_events.json]
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import random
+import time
+from collections import defaultdict
+
+from bench.fakes import drain, make_world, member_payload, presence_payload, reaction_payload, snowflake, user_payload
+from utils.bot import PurEsportBot
+from utils.members import get_member_resolver, member_cache_flags_from_config
+from utils.metrics import Metrics
+from utils.startup import current_version
+from utils.watchdog import LoopWatchdog
+
+COGS = ['cogs.onboarding', 'cogs.member_events', 'cogs.stream_notifier']
+DEFAULT_MIX = 'presence=70,join=10,leave=10,reaction=10'
+STREAMER_RATIO = 0.02 # Part des membres ayant le rôle suivi
+STREAM_RATIO = 0.05   # Part des présences qui sont des débuts/fins de stream
+
+
+class SampledMetrics(Metrics):
+    """Metrics qui garde aussi chaque durée de listener, pour des percentiles exacts."""
+
+    def __init__(self):
+        super().__init__()
+        self.samples: dict[str, list[float]] = defaultdict(list)
+
+    def observe_listener(self, event: str, listener: str, seconds: float, failed: bool = False):
+        super().observe_listener(event, listener, seconds, failed)
+        self.samples[listener].append(seconds)
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values: return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def parse_mix(text: str) -> dict[str, float]:
+    mix = {}
+    for part in text.split(','):
+        kind, _, weight = part.partition('=')
+        if kind.strip() not in ('presence', 'join', 'leave', 'reaction'): raise SystemExit(f"Type d'événement inconnu : {kind}")
+        mix[kind.strip()] = float(weight or 1)
+    return mix
+
+
+async def build(members: int, latency: float, lean: bool):
+    """Serveur synthétique configuré pour les Cogs rejoués ; retourne (world, pools)."""
+    options = dict(member_cache_flags=member_cache_flags_from_config('none'), chunk_guilds_at_startup=False,
+                   enable_raw_presences=True) if lean else {}
+    world = await make_world(latency=latency, bot_factory=PurEsportBot, metrics=SampledMetrics(), **options)
+    for key in ('admin', 'verified', 'new_player', 'streamer', 'stream_ping'): world.add_role(key, position=5)
+    channels = {key: world.add_text_channel(key) for key in ('rules', 'registration', 'arrivals', 'departures', 'aide', 'streams')}
+    rules_message_id = snowflake()
+    world.bot.config.update({
+        'RULES_CHANNEL_ID': channels['rules'].id, 'RULES_MESSAGE_ID': rules_message_id, 'REGISTRATION_CHANNEL_ID': channels['registration'].id,
+        'ARRIVALS_CHANNEL_ID': channels['arrivals'].id, 'DEPARTURES_CHANNEL_ID': channels['departures'].id, 'AIDE_CHANNEL_ID': channels['aide'].id,
+        'VERIFIED_PLAYER_ROLE_ID': world.roles['verified'].id, 'NEW_PLAYER_ROLE_ID': world.roles['new_player'].id,
+        'STREAM_WATCH_ROLE_ID': world.roles['streamer'].id, 'STREAM_ANNOUNCE_CHANNEL_ID': channels['streams'].id,
+        'STREAM_PING_ROLE_ID': world.roles['stream_ping'].id, 'ADMIN_ROLE_ID': world.roles['admin'].id, 'LEAN_MEMBER_CACHE': lean,
+    })
+    get_member_resolver(world.bot)
+    for name in COGS: await world.bot.load_extension(name)
+
+    created = [world.add_member(f'joueur{i}', ['streamer'] if i < members * STREAMER_RATIO else ['new_player'], cache=not lean)
+               for i in range(members)]
+    ids = [m.id for m in created]
+    half = len(ids) // 2 # Première moitié : membres stables (présences, réactions) ; seconde : départs
+    pools = {'streamers': ids[:max(1, int(members * STREAMER_RATIO))], 'stable': ids[:half], 'leaving': ids[half:],
+             'unverified': ids[int(members * STREAMER_RATIO):half], 'rules': (channels['rules'].id, rules_message_id)}
+    return world, pools
+
+
+def generate(world, pools: dict, count: int, mix: dict[str, float], rng: random.Random) -> list[tuple[str, str, dict]]:
+    """Liste d'événements (type, parseur, données) générée à l'avance, hors mesure."""
+    guild_id = world.guild.id
+    kinds, weights = zip(*mix.items())
+    leaving, unverified = list(pools['leaving']), list(pools['unverified'])
+    rng.shuffle(leaving); rng.shuffle(unverified)
+    events = []
+    for kind in rng.choices(kinds, weights, k=count):
+        if kind == 'leave' and not leaving or kind == 'reaction' and not unverified: kind = 'presence'
+        if kind == 'presence':
+            if rng.random() < STREAM_RATIO: user_id = rng.choice(pools['streamers']); streaming = rng.random() < 0.5
+            else: user_id = rng.choice(pools['stable']); streaming = False
+            events.append((kind, 'parse_presence_update', presence_payload(guild_id, user_id, streaming, rng)))
+        elif kind == 'join':
+            data = member_payload(user_payload(snowflake(), f'nouveau{len(events)}'))
+            world.backend.members[guild_id][int(data['user']['id'])] = data # Existe côté « Discord »
+            events.append((kind, 'parse_guild_member_add', {**data, 'guild_id': str(guild_id)}))
+        elif kind == 'leave':
+            user_id = leaving.pop()
+            events.append((kind, 'parse_guild_member_remove', {'guild_id': str(guild_id), 'user': world.member_data(user_id)['user']}))
+        else:
+            channel_id, message_id = pools['rules']
+            events.append((kind, 'parse_message_reaction_add', reaction_payload(guild_id, channel_id, message_id, world.member_data(unverified.pop()))))
+    return events
+
+
+async def replay(world, events: list[tuple[str, str, dict]], rate: float) -> dict:
+    state = world.state
+    watchdog = LoopWatchdog(interval=0.01, threshold=1.0)
+    watchdog.start()
+    start = time.perf_counter()
+    for index, (_, parser, data) in enumerate(events):
+        if rate:
+            delay = start + index / rate - time.perf_counter()
+            if delay > 0: await asyncio.sleep(delay)
+        getattr(state, parser)(data)
+        await asyncio.sleep(0) # Un message websocket par itération de la boucle, comme en réel
+    injected = time.perf_counter() - start
+    await drain(watchdog._task, bot=world.bot)
+    wall = time.perf_counter() - start
+    await watchdog.stop()
+    return {'injected_s': injected, 'wall_s': wall, 'loop_lag_p99_ms': watchdog.lag.quantile(0.99) * 1000, 'loop_lag_max_ms': watchdog.lag.max * 1000}
+
+
+def compare(previous: dict, result: dict):
+    """Écarts avec l'exécution précédente aux mêmes paramètres."""
+    print(f"Comparaison avec {previous['date']} ({previous['version']}) :")
+    print(f"  débit {previous['throughput']:.0f} -> {result['throughput']:.0f} év/s ({(result['throughput'] / previous['throughput'] - 1) * 100:+.1f} %)")
+    for listener, stats in result['listeners'].items():
+        before = previous['listeners'].get(listener)
+        if before: print(f"  {listener}: p99 {before['p99_ms']:.2f} -> {stats['p99_ms']:.2f} ms")
+    if previous['rest_total'] != result['rest_total']: print(f"  appels REST {previous['rest_total']} -> {result['rest_total']}")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--events', type=int, default=20000)
+    parser.add_argument('--rate', type=float, default=5000, help="Événements/s injectés (0 = au plus vite)")
+    parser.add_argument('--mix', default=DEFAULT_MIX)
+    parser.add_argument('--members', type=int, default=5000)
+    parser.add_argument('--latency', type=float, default=0.02, help="Latence REST simulée (s)")
+    parser.add_argument('--lean', action='store_true', help="Mode cache membres léger (LEAN_MEMBER_CACHE=1)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=os.path.join('bench', 'results', 'replay_events.json'))
+    args = parser.parse_args()
+
+    world, pools = await build(args.members, args.latency, args.lean)
+    events = generate(world, pools, args.events, parse_mix(args.mix), random.Random(args.seed))
+    world.backend.reset()
+    timing = await replay(world, events, args.rate)
+
+    samples = world.bot.metrics.samples
+    errors = defaultdict(int)
+    for (_, listener), count in world.bot.metrics.listener_errors.items(): errors[listener] += count
+    params = {k: getattr(args, k) for k in ('events', 'rate', 'mix', 'members', 'latency', 'lean', 'seed')}
+    result = {
+        'date': datetime.datetime.now().isoformat(timespec='seconds'), 'version': current_version(), 'params': params,
+        'events': {kind: sum(1 for e in events if e[0] == kind) for kind in parse_mix(args.mix)},
+        'throughput': len(events) / timing['wall_s'], **timing,
+        'listeners': {listener: {'count': len(values), 'p50_ms': percentile(values, 0.5) * 1000, 'p99_ms': percentile(values, 0.99) * 1000,
+                                 'max_ms': max(values) * 1000, 'errors': errors[listener]}
+                      for listener, values in sorted(samples.items())},
+        'rest': dict(world.backend.calls.most_common()), 'rest_total': world.backend.total_calls,
+        'rest_peak_in_flight': world.backend.peak_in_flight,
+    }
+
+    print(f"{len(events)} événements ({', '.join(f'{k} {v}' for k, v in result['events'].items())}) injectés en {timing['injected_s']:.2f}s,"
+          f" traités en {timing['wall_s']:.2f}s : {result['throughput']:.0f} év/s | retard boucle p99 {timing['loop_lag_p99_ms']:.1f} ms, max {timing['loop_lag_max_ms']:.1f} ms")
+    for listener, stats in result['listeners'].items():
+        print(f"  {listener:<45} {stats['count']:>6} appels  p50 {stats['p50_ms']:7.2f} ms  p99 {stats['p99_ms']:7.2f} ms  max {stats['max_ms']:7.2f} ms"
+              + (f"  {stats['errors']} erreurs" if stats['errors'] else ""))
+    print(f"Appels REST : {result['rest_total']} (pic {result['rest_peak_in_flight']} simultanés)")
+    for route, count in result['rest'].items(): print(f"  {route:<60} {count:>6}")
+
+    history = []
+    if os.path.exists(args.output):
+        with open(args.output, 'r', encoding='utf-8') as f: history = json.load(f)
+    previous = next((run for run in reversed(history) if run['params'] == params), None)
+    if previous: compare(previous, result)
+    history.append(result)
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f: json.dump(history, f, indent=2, ensure_ascii=False)
+    print(f"Résultats ajoutés à {args.output}")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
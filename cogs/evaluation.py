@@ -1,11 +1,18 @@
 # cogs/evaluation.py
 import discord
 from discord.ext import commands
-from discord import ui, utils
+from discord import ui, utils, app_commands
 import logging
 import asyncio
 import re
-import os
+from utils.spaces import PrivateSpaceProvisioner, is_private_space, read_space_marker
+from utils.locks import KeyedLock
+from utils.members import get_member_resolver, has_any_role
+from utils.guilds import guild_config
+from utils.audit import get_audit_log
+from utils.events import EvaluationDecided, get_event_bus
+from utils.ratelimit import RateBudget
+from utils.views import get_view_registry
 
 logger = logging.getLogger(__name__)
 
@@ -16,53 +23,63 @@ def sanitize_channel_name(name):
     name = re.sub(r'[-_]+', '-', name)
     return name[:90]
 
-open_eval_channels = {}
+open_eval_channels = {} # (guild_id, member_id) -> ID de l'espace d'évaluation ouvert
+
+# Une décision à la fois PAR SALON d'évaluation (les salons différents avancent en parallèle)
+_decision_locks = KeyedLock()
+_decided_channels = set() # Salons dont la décision est prise (anti double-clic)
+_cleanup_tasks = set()    # Références fortes vers les suppressions différées
+CLEANUP_DELAY = 15
 
 # --- Vue Persistante pour les boutons de décision ---
 class EvaluationActionView(ui.View):
     def __init__(self, bot: commands.Bot):
         super().__init__(timeout=None)
         self.bot = bot
-        self._processing_lock = asyncio.Lock()
 
     async def handle_decision(self, interaction: discord.Interaction, approved: bool):
-        async with self._processing_lock:
-            user_who_clicked = interaction.user; channel = interaction.channel; guild = interaction.guild
-            if not isinstance(channel, discord.TextChannel) or not guild:
-                try: await interaction.response.send_message("Erreur interne.", ephemeral=True)
-                except: pass # Ignore if interaction already responded
-                return
-
-            evaluated_member_id = None
-            if channel.topic and "EvaluateID:" in channel.topic:
-                match = re.search(r'EvaluateID:(\d+)', channel.topic)
-                if match:
-                    try: evaluated_member_id = int(match.group(1))
-                    except ValueError: pass
-
-            if not evaluated_member_id:
-                logger.error(f"Impossible trouver EvaluateID topic {channel.name}")
-                try: await interaction.response.send_message("Erreur: Joueur non identifiable.", ephemeral=True)
-                except: pass
-                return
-
-            evaluated_member = None
-            try: evaluated_member = await guild.fetch_member(evaluated_member_id)
-            except discord.NotFound: logger.warning(f"Membre éval ({evaluated_member_id}) introuvable (fetch).")
-            except discord.HTTPException: evaluated_member = guild.get_member(evaluated_member_id); logger.warning(f"Erreur HTTP fetch {evaluated_member_id}, fallback cache.")
-
-            # Vérifier permissions cliqueur
-            staff_ids_key = 'EVALUATION_STAFF_ROLE_IDS' if 'EVALUATION_STAFF_ROLE_IDS' in self.bot.config else 'TICKET_STAFF_ROLE_IDS'
-            staff_role_ids = self.bot.config.get(staff_ids_key, [])
-            admin_role_id = self.bot.config.get('ADMIN_ROLE_ID')
-            is_staff = any(role.id in staff_role_ids for role in getattr(user_who_clicked, 'roles', []))
-            is_admin_role = any(role.id == admin_role_id for role in getattr(user_who_clicked, 'roles', [])) if admin_role_id else False
-            has_admin_perm = user_who_clicked.guild_permissions.administrator
-            if not is_staff and not is_admin_role and not has_admin_perm:
-                 try: await interaction.response.send_message("Seul un admin ou staff peut décider.", ephemeral=True)
-                 except: pass
-                 return
+        async with _decision_locks(interaction.channel_id):
+            evaluated_member_id = await self._process_decision(interaction, approved)
+        # La suppression différée se fait hors section critique
+        if evaluated_member_id is not None:
+            task = asyncio.create_task(self._delayed_cleanup(interaction, evaluated_member_id))
+            _cleanup_tasks.add(task); task.add_done_callback(_cleanup_tasks.discard)
+
+    async def _process_decision(self, interaction: discord.Interaction, approved: bool) -> int | None:
+        """Applique la décision. Retourne l'ID évalué si le salon doit être nettoyé, sinon None."""
+        user_who_clicked = interaction.user; channel = interaction.channel; guild = interaction.guild
+        if not is_private_space(channel) or not guild:
+            try: await interaction.response.send_message("Erreur interne.", ephemeral=True)
+            except: pass # Ignore if interaction already responded
+            return
+
+        # Topic du salon, ou footer de l'embed en mode thread
+        evaluated_member_id = read_space_marker(channel, 'EvaluateID', interaction.message)
+
+        if not evaluated_member_id:
+            logger.error(f"Impossible trouver EvaluateID topic {channel.name}")
+            try: await interaction.response.send_message("Erreur: Joueur non identifiable.", ephemeral=True)
+            except: pass
+            return
+
+        # Cache gateway d'abord, REST seulement si nécessaire
+        evaluated_member = await get_member_resolver(self.bot).get(guild, evaluated_member_id)
+        if not evaluated_member: logger.warning(f"Membre éval ({evaluated_member_id}) introuvable.")
+
+        # Vérifier permissions cliqueur (rôles staff/admin du serveur)
+        if not is_staff(self.bot, user_who_clicked) and not user_who_clicked.guild_permissions.administrator:
+             try: await interaction.response.send_message("Seul un admin ou staff peut décider.", ephemeral=True)
+             except: pass
+             return
 
+        if channel.id in _decided_channels:
+             try: await interaction.response.send_message("Une décision a déjà été prise pour cette évaluation.", ephemeral=True)
+             except: pass
+             return
+        _decided_channels.add(channel.id)
+
+        cleanup = False
+        try:
             # Désactiver boutons
             try:
                 disabled_view = ui.View(timeout=None)
@@ -81,47 +98,63 @@ class EvaluationActionView(ui.View):
                 action_successful = await self.approve_member(interaction, evaluated_member)
             else:
                 action_successful = await self.reject_member(interaction, evaluated_member)
+            await get_event_bus(self.bot).publish(EvaluationDecided(guild.id, channel_id=channel.id, member_id=evaluated_member_id, approved=approved,
+                                                                    decided_by=user_who_clicked, applied=action_successful))
 
-            # Nettoyage final
+            # Nettoyage final (planifié par handle_decision, hors verrou)
             if action_successful or evaluated_member is None:
-                logger.info(f"Nettoyage de {channel.name} dans 15s.")
-                await interaction.followup.send("Fin de l'évaluation. Ce salon sera supprimé dans 15 secondes.", ephemeral=False)
-                await asyncio.sleep(15)
-                try:
-                    await channel.delete(reason=f"Évaluation terminée par {str(user_who_clicked)}")
-                    logger.info(f"Salon évaluation {channel.name} supprimé.")
-                    if evaluated_member_id in open_eval_channels and open_eval_channels[evaluated_member_id] == channel.id:
-                        try: del open_eval_channels[evaluated_member_id]
-                        except KeyError: pass
-                        logger.info(f"Salon évaluation {channel.id} retiré état mémoire pour {evaluated_member_id}.")
-                except Exception as e_del: logger.error(f"Erreur suppression salon éval {channel.name}: {e_del}", exc_info=True)
-            else:
-                logger.warning(f"Nettoyage de {channel.name} annulé car action principale échouée.")
-                await interaction.followup.send("L'action principale ayant échoué, le salon ne sera pas supprimé automatiquement.", ephemeral=True)
+                cleanup = True
+                return evaluated_member_id
+            logger.warning(f"Nettoyage de {channel.name} annulé car action principale échouée.")
+            await interaction.followup.send("L'action principale ayant échoué, le salon ne sera pas supprimé automatiquement.", ephemeral=True)
+            return None
+        finally:
+            # Sans nettoyage planifié (échec géré ou exception), la décision peut être reprise
+            if not cleanup: _decided_channels.discard(channel.id)
+
+    async def _delayed_cleanup(self, interaction: discord.Interaction, evaluated_member_id: int):
+        """Annonce puis supprime le salon d'évaluation après CLEANUP_DELAY secondes."""
+        channel = interaction.channel; user_who_clicked = interaction.user
+        logger.info(f"Nettoyage de {channel.name} dans {CLEANUP_DELAY}s.")
+        try:
+            await interaction.followup.send(f"Fin de l'évaluation. Ce salon sera supprimé dans {CLEANUP_DELAY} secondes.", ephemeral=False)
+            await asyncio.sleep(CLEANUP_DELAY)
+            eval_cog = self.bot.get_cog('EvaluationCog')
+            if eval_cog: await eval_cog.spaces.delete(channel, reason=f"Évaluation terminée par {str(user_who_clicked)}")
+            else: await channel.delete(reason=f"Évaluation terminée par {str(user_who_clicked)}")
+            logger.info(f"Salon évaluation {channel.name} supprimé.")
+            eval_key = (channel.guild.id, evaluated_member_id)
+            if open_eval_channels.get(eval_key) == channel.id:
+                try: del open_eval_channels[eval_key]
+                except KeyError: pass
+                logger.info(f"Salon évaluation {channel.id} retiré état mémoire pour {evaluated_member_id}.")
+        except Exception as e_del: logger.error(f"Erreur suppression salon éval {channel.name}: {e_del}", exc_info=True)
+        finally:
+            _decided_channels.discard(channel.id)
 
 
     async def approve_member(self, interaction: discord.Interaction, member: discord.Member | None) -> bool:
         """Logique d'approbation. Retourne True si succès."""
-        guild = interaction.guild
-        joueur_club_role_id = self.bot.config.get('JOUEUR_CLUB_ROLE_ID')
-        joueur_test_role_id = self.bot.config.get('JOUEUR_TEST_ROLE_ID')
+        guild = interaction.guild; config = guild_config(self.bot, guild)
         result_message = f"✅ **Test approuvé** par {interaction.user.mention}."
 
-        if not joueur_club_role_id or not joueur_test_role_id:
+        if not config or not config.get('JOUEUR_CLUB_ROLE_ID') or not config.get('JOUEUR_TEST_ROLE_ID'):
              logger.error("Config rôles Club/Test manquante."); await interaction.followup.send("Erreur config rôles.", ephemeral=True); return False
-        joueur_club_role = guild.get_role(joueur_club_role_id); joueur_test_role = guild.get_role(joueur_test_role_id)
+        joueur_club_role = config.role('JOUEUR_CLUB_ROLE_ID'); joueur_test_role = config.role('JOUEUR_TEST_ROLE_ID')
         if not joueur_club_role or not joueur_test_role:
              logger.error(f"Rôle Club ou Test introuvable."); await interaction.followup.send("Erreur: Rôle requis introuvable.", ephemeral=True); return False
         if guild.me.top_role <= joueur_club_role or guild.me.top_role <= joueur_test_role:
              logger.error(f"Hiérarchie insuffisante."); await interaction.followup.send("Erreur: Hiérarchie rôle insuffisante.", ephemeral=True); return False
 
         if not member:
-            topic_id_str = interaction.channel.topic.split('EvaluateID:')[1].split(')')[0] if interaction.channel and interaction.channel.topic and 'EvaluateID:' in interaction.channel.topic else 'Inconnu'
+            topic_id_str = read_space_marker(interaction.channel, 'EvaluateID', interaction.message) or 'Inconnu'
             await interaction.followup.send(result_message + f"\nMembre introuvable (ID: {topic_id_str}).", ephemeral=False); return True
 
         role_change_success = False
         try:
-            await member.edit(roles=[role for role in member.roles if role != joueur_test_role] + [joueur_club_role], reason=f"Test approuvé par {str(interaction.user)}")
+            # Ajout/retrait ciblés : `member` peut venir du cache du résolveur, une liste complète effacerait un rôle récent
+            reason = f"Test approuvé par {str(interaction.user)}"
+            await member.add_roles(joueur_club_role, reason=reason); await member.remove_roles(joueur_test_role, reason=reason)
             logger.info(f"Rôles MAJ {member.name}: +{joueur_club_role.name}, -{joueur_test_role.name}")
             result_message += f"\n{member.mention} a reçu le rôle {joueur_club_role.mention} (rôle {joueur_test_role.mention} retiré)."
             role_change_success = True
@@ -139,7 +172,7 @@ class EvaluationActionView(ui.View):
         kick_success = False
 
         if not member:
-             topic_id_str = interaction.channel.topic.split('EvaluateID:')[1].split(')')[0] if interaction.channel and interaction.channel.topic and 'EvaluateID:' in interaction.channel.topic else 'Inconnu'
+             topic_id_str = read_space_marker(interaction.channel, 'EvaluateID', interaction.message) or 'Inconnu'
              await interaction.followup.send(result_message + f"\nMembre introuvable (ID: {topic_id_str}).", ephemeral=False); return True
 
         # --- CORRECTION SYNTAXE Ligne ~140 ---
@@ -174,56 +207,184 @@ class EvaluationActionView(ui.View):
         await self.handle_decision(interaction, approved=False)
 
 
+# --- Permission staff (rôles staff ET admin du serveur), partagée par les commandes d'évaluation (préfixe et slash) ---
+def staff_role_ids(config) -> list[int]:
+    """Rôles staff des évaluations (EVALUATION_STAFF_ROLE_IDS, sinon ceux des tickets), rôle admin compris."""
+    return [config.get('ADMIN_ROLE_ID'), *(config.get('EVALUATION_STAFF_ROLE_IDS') or config.get('TICKET_STAFF_ROLE_IDS') or [])]
+
+
+def is_staff(bot, user) -> bool:
+    config = guild_config(bot, getattr(user, 'guild', None))
+    return bool(config) and has_any_role(user, staff_role_ids(config))
+
+
+staff_only = commands.check(lambda ctx: is_staff(ctx.bot, ctx.author))
+staff_only_app = app_commands.check(lambda interaction: is_staff(interaction.client, interaction.user))
+
+# Budget de création en masse (salons/threads par seconde, créations simultanées)
+BULK_CREATE_RATE = 1.0
+BULK_CREATE_BURST = 3
+BULK_CREATE_CONCURRENCY = 3
+BULK_PROGRESS_INTERVAL = 2.0 # Secondes minimum entre deux éditions du message de progression
+
+
 # --- Classe Cog Evaluation ---
 class EvaluationCog(commands.Cog, name="EvaluationCog"):
     """Cog pour gérer l'évaluation des joueurs en test."""
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.open_eval_channels = open_eval_channels
+        self.spaces = PrivateSpaceProvisioner(bot, 'EVALUATION')
+        self._provisioning = set() # (guild_id, member_id) dont l'espace est en cours de création
 
-    @commands.command(name="testresultat", aliases=["eval"])
-    # Permission Check (Utilise les rôles staff ET admin)
-    @commands.has_any_role(int(os.getenv('ADMIN_ROLE_ID') or 0), *(int(rid) for rid in (os.getenv('EVALUATION_STAFF_ROLE_IDS') or os.getenv('TICKET_STAFF_ROLE_IDS') or '').split(',') if rid.isdigit()))
-    async def test_resultat(self, ctx: commands.Context, member: discord.Member):
-        """Crée un salon d'évaluation pour un joueur en test."""
-        # ... (Code de la commande comme précédemment) ...
-        author = ctx.author; guild = ctx.guild
-        joueur_test_role_id = self.bot.config.get('JOUEUR_TEST_ROLE_ID');
-        if not joueur_test_role_id: return await ctx.send("Erreur config: Rôle Joueur Test.", ephemeral=True)
-        joueur_test_role = guild.get_role(joueur_test_role_id)
-        if not joueur_test_role: return await ctx.send(f"Erreur config: Rôle Joueur Test introuvable.", ephemeral=True)
-        if joueur_test_role not in member.roles: return await ctx.send(f"{member.mention} n'a pas rôle {joueur_test_role.mention}.", ephemeral=True)
-        if member.id in self.open_eval_channels:
-            existing_channel = guild.get_channel(self.open_eval_channels[member.id])
-            if existing_channel: return await ctx.send(f"Salon éval déjà ouvert : {existing_channel.mention}", ephemeral=True)
-            else: del self.open_eval_channels[member.id]
-        category_id = self.bot.config.get('EVALUATION_CATEGORY_ID'); category = guild.get_channel(category_id) if category_id else None
-        staff_ids_key = 'EVALUATION_STAFF_ROLE_IDS' if 'EVALUATION_STAFF_ROLE_IDS' in self.bot.config else 'TICKET_STAFF_ROLE_IDS'
-        staff_role_ids = self.bot.config.get(staff_ids_key, [])
-        staff_roles = [guild.get_role(rid) for rid in staff_role_ids if rid]; staff_roles = [r for r in staff_roles if r]
-        admin_role_id = self.bot.config.get('ADMIN_ROLE_ID'); admin_role = guild.get_role(admin_role_id) if admin_role_id else None
+    async def cog_load(self):
+        self._audit_subscription = get_event_bus(self.bot).subscribe(EvaluationDecided, self.log_decision, name='evaluation_audit')
+
+    async def cog_unload(self):
+        get_event_bus(self.bot).unsubscribe(self._audit_subscription)
+
+    async def log_decision(self, event: EvaluationDecided):
+        """Abonné du bus : décision d'évaluation dans le journal d'audit (AUDIT_LOG_CHANNEL_ID, optionnel)."""
+        embed = discord.Embed(title="✅ Test approuvé" if event.approved else "❌ Test non concluant",
+                              description=f"<@{event.member_id}> ({event.member_id}) — décision de {event.decided_by.mention}.",
+                              color=discord.Color.green() if event.approved else discord.Color.red(), timestamp=utils.utcnow())
+        if not event.applied: embed.add_field(name="Attention", value="Rôles ou expulsion non appliqués.", inline=False)
+        get_audit_log(self.bot).log(event.guild_id, embed)
+
+    def _existing_space(self, guild: discord.Guild, member_id: int):
+        """Espace d'évaluation déjà ouvert pour ce membre (nettoie les entrées orphelines)."""
+        if (guild.id, member_id) not in self.open_eval_channels: return None
+        existing = guild.get_channel_or_thread(self.open_eval_channels[(guild.id, member_id)])
+        if not existing: self.open_eval_channels.pop((guild.id, member_id), None)
+        return existing
+
+    async def _provision_evaluation(self, guild: discord.Guild, author: discord.Member, member: discord.Member):
+        """Crée l'espace d'évaluation et y poste la vue de décision. Retourne l'espace, ou None si échec."""
+        config = guild_config(self.bot, guild)
+        staff_roles = config.roles('EVALUATION_STAFF_ROLE_IDS') or config.roles('TICKET_STAFF_ROLE_IDS')
+        admin_role = config.role('ADMIN_ROLE_ID')
         overwrites = { guild.default_role: discord.PermissionOverwrite(view_channel=False), member: discord.PermissionOverwrite(view_channel=True, send_messages=True), author: discord.PermissionOverwrite(view_channel=True, send_messages=True), guild.me: discord.PermissionOverwrite(view_channel=True, send_messages=True, manage_channels=True, embed_links=True, manage_messages=True) }
         for role in staff_roles: overwrites[role] = discord.PermissionOverwrite(view_channel=True, send_messages=True, manage_messages=True)
         if admin_role and admin_role not in staff_roles: overwrites[admin_role] = discord.PermissionOverwrite(view_channel=True, send_messages=True, manage_messages=True)
-        channel_name = f"eval-{sanitize_channel_name(member.name)}-{str(member.id)[-4:]}"; new_channel = None
+        channel_name = f"eval-{sanitize_channel_name(member.name)}-{str(member.id)[-4:]}"
+        self._provisioning.add((guild.id, member.id))
         try:
             topic = f"Évaluation de {str(member)} (ID: {member.id}). Lancé par {str(author)}. EvaluateID:{member.id}"
-            new_channel = await guild.create_text_channel(name=channel_name, category=category, overwrites=overwrites, topic=topic, reason=f"Éval par {str(author)} pour {str(member)}"); self.open_eval_channels[member.id] = new_channel.id; logger.info(f"Salon éval créé: {new_channel.name} pour {member.name}")
-        except Exception as e: logger.error(f"Erreur création salon éval: {e}", exc_info=True); return await ctx.send("Erreur création salon.", ephemeral=True)
-        if new_channel:
-            try:
-                eval_view = EvaluationActionView(bot=self.bot); embed = discord.Embed(title=f"📋 Évaluation de {member.display_name}", description=(f"Session par {author.mention} pour {member.mention}.\n\n**Décision Staff :**"), color=discord.Color.dark_purple())
-                await new_channel.send(embed=embed, view=eval_view); await ctx.send(f"Salon éval créé : {new_channel.mention}", ephemeral=True)
-            except Exception as e_msg: logger.error(f"Erreur envoi message/vue éval {new_channel.name}: {e_msg}")
+            new_channel = await self.spaces.create(guild, name=channel_name, topic=topic, overwrites=overwrites, members=[member, author], reason=f"Éval par {str(author)} pour {str(member)}"); self.open_eval_channels[(guild.id, member.id)] = new_channel.id; logger.info(f"Salon éval créé: {new_channel.name} pour {member.name}")
+        except Exception as e: logger.error(f"Erreur création salon éval: {e}", exc_info=True); return None
+        finally: self._provisioning.discard((guild.id, member.id))
+        try:
+            eval_view = EvaluationActionView(bot=self.bot); embed = discord.Embed(title=f"📋 Évaluation de {member.display_name}", description=(f"Session par {author.mention} pour {member.mention}.\n\n**Décision Staff :**"), color=discord.Color.dark_purple())
+            embed.set_footer(text=f"EvaluateID:{member.id}") # Les threads n'ont pas de topic
+            content = " ".join(r.mention for r in overwrites if isinstance(r, discord.Role) and r != guild.default_role) if isinstance(new_channel, discord.Thread) else None
+            await new_channel.send(content=content or None, embed=embed, view=eval_view)
+        except Exception as e_msg: logger.error(f"Erreur envoi message/vue éval {new_channel.name}: {e_msg}")
+        return new_channel
+
+    async def _start_evaluation(self, guild: discord.Guild, author: discord.Member, member: discord.Member) -> str:
+        """Vérifie puis crée l'espace d'évaluation d'un joueur. Retourne le message pour l'auteur."""
+        config = guild_config(self.bot, guild)
+        if not config or not config.get('JOUEUR_TEST_ROLE_ID'): return "Erreur config: Rôle Joueur Test."
+        joueur_test_role = config.role('JOUEUR_TEST_ROLE_ID')
+        if not joueur_test_role: return f"Erreur config: Rôle Joueur Test introuvable."
+        if joueur_test_role not in member.roles: return f"{member.mention} n'a pas rôle {joueur_test_role.mention}."
+        existing_channel = self._existing_space(guild, member.id)
+        if existing_channel: return f"Salon éval déjà ouvert : {existing_channel.mention}"
+        if (guild.id, member.id) in self._provisioning: return f"Salon éval en cours de création pour {member.mention}."
+        new_channel = await self._provision_evaluation(guild, author, member)
+        if not new_channel: return "Erreur création salon."
+        return f"Salon éval créé : {new_channel.mention}"
+
+    @commands.command(name="testresultat", aliases=["eval"])
+    @staff_only
+    async def test_resultat(self, ctx: commands.Context, member: discord.Member):
+        """Crée un salon d'évaluation pour un joueur en test."""
+        await ctx.send(await self._start_evaluation(ctx.guild, ctx.author, member), ephemeral=True)
+
+    @app_commands.command(name="testresultat", description="Crée l'espace d'évaluation d'un joueur en test.")
+    @app_commands.describe(joueur="Joueur en test (sans évaluation ouverte)")
+    @app_commands.guild_only()
+    @staff_only_app
+    async def test_resultat_slash(self, interaction: discord.Interaction, joueur: str):
+        await interaction.response.defer(ephemeral=True, thinking=True) # La création peut dépasser 3 s
+        member = await get_member_resolver(self.bot).get(interaction.guild, int(joueur)) if joueur.isdigit() else None
+        if not member: return await interaction.followup.send("Joueur introuvable : choisissez-le dans la liste.", ephemeral=True)
+        await interaction.followup.send(await self._start_evaluation(interaction.guild, interaction.user, member), ephemeral=True)
+
+    @test_resultat_slash.autocomplete('joueur')
+    async def test_player_autocomplete(self, interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
+        """Joueurs ayant le rôle Joueur Test, sans évaluation ouverte ni en cours."""
+        guild = interaction.guild; config = guild_config(self.bot, guild)
+        joueur_test_role = config.role('JOUEUR_TEST_ROLE_ID') if config else None
+        if not joueur_test_role: return []
+        members = await get_member_resolver(self.bot).search(guild, current, role=joueur_test_role, limit=50)
+        return [app_commands.Choice(name=f"{m.display_name} ({m.name})"[:100], value=str(m.id)) for m in members
+                if (guild.id, m.id) not in self.open_eval_channels and (guild.id, m.id) not in self._provisioning][:25]
+
+    async def _bulk_evaluate(self, guild: discord.Guild, author: discord.Member, members, role: discord.Role | None, send):
+        """Crée les espaces d'évaluation de plusieurs joueurs sous budget. `send(texte)` poste le message de progression."""
+        config = guild_config(self.bot, guild)
+        joueur_test_role = config.role('JOUEUR_TEST_ROLE_ID') if config else None
+        if not joueur_test_role: return await send("Erreur config: Rôle Joueur Test introuvable.")
+        if not members: members = await get_member_resolver(self.bot).role_members(guild, role or joueur_test_role)
+        targets = list({m.id: m for m in members if not m.bot}.values())
+
+        skipped_ids = {m.id for m in targets if joueur_test_role not in m.roles or self._existing_space(guild, m.id) or (guild.id, m.id) in self._provisioning}
+        todo = [m for m in targets if m.id not in skipped_ids]; skipped = [m for m in targets if m.id in skipped_ids]
+        created, failed = [], []
+        progress = await send(f"⏳ Évaluations : 0/{len(todo)} créées ({len(skipped)} ignorées : déjà ouvertes ou sans rôle {joueur_test_role.name}).")
+        last_edit = 0.0
+
+        async def report(final: bool = False):
+            nonlocal last_edit
+            now = asyncio.get_running_loop().time()
+            if not final and now - last_edit < BULK_PROGRESS_INTERVAL: return
+            last_edit = now
+            text = (f"{'✅' if final else '⏳'} Évaluations : {len(created)}/{len(todo)} créées"
+                    f"{f', {len(failed)} en erreur' if failed else ''} ({len(skipped)} ignorées).")
+            if final and failed: text += "\nÉchecs : " + ", ".join(m.mention for m in failed)
+            try: await progress.edit(content=text)
+            except discord.HTTPException as e: logger.warning(f"Édition progression évaluations impossible: {e}")
+
+        budget = RateBudget(BULK_CREATE_RATE, burst=BULK_CREATE_BURST, concurrency=BULK_CREATE_CONCURRENCY)
+        async def provision(member: discord.Member):
+            async with budget:
+                if self._existing_space(guild, member.id) or (guild.id, member.id) in self._provisioning: return # Ouvert entre-temps
+                channel = await self._provision_evaluation(guild, author, member)
+            (created if channel else failed).append(member)
+            if len(created) + len(failed) < len(todo): await report()
+
+        logger.info(f"Évaluations en masse par {author}: {len(todo)} à créer, {len(skipped)} ignorées.")
+        await asyncio.gather(*(provision(m) for m in todo))
+        await report(final=True)
+
+    @commands.command(name="evalmasse", aliases=["evalbulk"])
+    @staff_only
+    async def test_resultat_bulk(self, ctx: commands.Context, members: commands.Greedy[discord.Member], role: discord.Role | None = None):
+        """Crée les salons d'évaluation de plusieurs joueurs (mentions, ou tout un rôle ; défaut : rôle Joueur Test)."""
+        await self._bulk_evaluate(ctx.guild, ctx.author, members, role, ctx.send)
+
+    @app_commands.command(name="evalmasse", description="Crée les espaces d'évaluation de tous les joueurs d'un rôle (défaut : Joueur Test).")
+    @app_commands.describe(role="Rôle dont les membres seront évalués")
+    @app_commands.guild_only()
+    @staff_only_app
+    async def test_resultat_bulk_slash(self, interaction: discord.Interaction, role: discord.Role | None = None):
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        # Progression postée dans le salon : le jeton de l'interaction expire après 15 min, avant la fin d'un gros rôle
+        await interaction.followup.send("Création des évaluations lancée : progression dans ce salon.", ephemeral=True)
+        await self._bulk_evaluate(interaction.guild, interaction.user, [], role, interaction.channel.send)
+
 
 # Fonction setup
 async def setup(bot: commands.Bot):
     # ... (code setup comme précédemment) ...
     required_ids = ['GUILD_ID', 'ADMIN_ROLE_ID', 'JOUEUR_TEST_ROLE_ID', 'JOUEUR_CLUB_ROLE_ID']
+    if bot.config.get('EVALUATION_MODE') == 'thread': required_ids.append('EVALUATION_THREAD_PARENT_ID')
     optional_ids = ['EVALUATION_CATEGORY_ID', 'TICKET_STAFF_ROLE_IDS', 'EVALUATION_STAFF_ROLE_IDS']
     missing = [k for k in required_ids if not bot.config.get(k)]
     staff_ids_key = 'EVALUATION_STAFF_ROLE_IDS' if bot.config.get('EVALUATION_STAFF_ROLE_IDS') else 'TICKET_STAFF_ROLE_IDS'
     if not bot.config.get(staff_ids_key): missing.append(f"{staff_ids_key} (ou TICKET_STAFF_ROLE_IDS)")
     if missing: logger.error(f"Config manquante EvaluationCog: {', '.join(missing)}.")
     await bot.add_cog(EvaluationCog(bot))
+    get_view_registry(bot).contribute('EvaluationActionView', EvaluationActionView)
     logger.info("Cog Evaluation chargé.")
\ No newline at end of file
@@ -0,0 +1,79 @@
+# cogs/guild_config.py
+import discord
+from discord.ext import commands
+from discord import app_commands
+import logging
+from utils.guilds import GUILD_CONFIG_KEYS, get_guild_configs, guild_config, parse_config_value
+
+logger = logging.getLogger(__name__)
+
+MAX_LISTED = 25 # Champs par embed (limite Discord)
+
+
+class GuildConfigCog(commands.Cog, name="GuildConfig"):
+    """Configuration propre à chaque serveur (data/guild_config.json) : salons, rôles et modes sans redémarrage."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.store = get_guild_configs(bot)
+
+    async def cog_check(self, ctx: commands.Context) -> bool:
+        # Pour le groupe et chaque sous-commande (préfixe et slash) : un serveur neuf n'a pas encore d'ADMIN_ROLE_ID
+        if ctx.guild is None: raise commands.NoPrivateMessage()
+        if not ctx.author.guild_permissions.administrator: raise commands.MissingPermissions(['administrator'])
+        return True
+
+    @commands.hybrid_group(name="serveur", help="Configuration du bot pour ce serveur.")
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.guild_only()
+    async def server_config(self, ctx: commands.Context):
+        if ctx.invoked_subcommand is None: await self.show_config(ctx)
+
+    @server_config.command(name="voir", help="Valeurs propres à ce serveur.")
+    async def show_config(self, ctx: commands.Context):
+        config = guild_config(self.bot, ctx.guild)
+        if not config: return await ctx.send("Ce serveur n'est pas encore servi : `/serveur definir` l'ajoute.", ephemeral=True)
+        overrides = config.overrides
+        embed = discord.Embed(title=f"⚙️ Configuration de {ctx.guild.name}", color=discord.Color.blurple(),
+                              description=("Serveur principal : le .env s'applique aux clés non définies ici." if config.primary
+                                           else "Seuls les réglages généraux du .env s'appliquent ici (pas les IDs)."))
+        for key in sorted(overrides)[:MAX_LISTED]: embed.add_field(name=key, value=f"`{overrides[key]}`", inline=True)
+        if not overrides: embed.add_field(name="Aucune valeur propre", value="`/serveur definir CLE valeur`", inline=False)
+        await ctx.send(embed=embed, ephemeral=True)
+
+    @server_config.command(name="definir", help="Définit une valeur pour ce serveur (ex. TICKET_LOG_CHANNEL_ID #logs).")
+    @app_commands.describe(cle="Clé de configuration (ex. RULES_CHANNEL_ID)", valeur="ID, mention de salon/rôle, ou texte")
+    async def set_config(self, ctx: commands.Context, cle: str, *, valeur: str):
+        key = cle.strip().upper()
+        if key not in GUILD_CONFIG_KEYS: return await ctx.send(f"Clé inconnue ou propre au processus (.env) : {key}.", ephemeral=True)
+        try: value = parse_config_value(key, valeur)
+        except ValueError as e: return await ctx.send(f"Erreur : {e}", ephemeral=True)
+        added = not self.store.serves(ctx.guild.id)
+        self.store.register(ctx.guild.id).set(**{key: value})
+        logger.info(f"Config du serveur {ctx.guild.id} modifiée par {ctx.author} : {key} = {value!r}.")
+        await ctx.send(f"✅ {key} = `{value}` pour ce serveur." + (" Serveur ajouté : commandes slash en cours de publication." if added else ""), ephemeral=True)
+        if added: await self.store.sync_commands()
+
+    @server_config.command(name="retirer", help="Retire une valeur propre à ce serveur (retour à la valeur héritée).")
+    @app_commands.describe(cle="Clé de configuration")
+    async def unset_config(self, ctx: commands.Context, cle: str):
+        config = guild_config(self.bot, ctx.guild)
+        key = cle.strip().upper()
+        if not config or key not in config.overrides: return await ctx.send(f"{key} n'est pas défini pour ce serveur.", ephemeral=True)
+        config.set(**{key: None})
+        logger.info(f"Config du serveur {ctx.guild.id} : {key} retiré par {ctx.author}.")
+        await ctx.send(f"✅ {key} retiré pour ce serveur.", ephemeral=True)
+
+    @set_config.autocomplete('cle')
+    @unset_config.autocomplete('cle')
+    async def key_autocomplete(self, interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
+        config = guild_config(self.bot, interaction.guild)
+        keys = set(config.overrides) if config else set()
+        keys |= GUILD_CONFIG_KEYS # Les valeurs propres déjà enregistrées restent proposées (pour /serveur retirer)
+        current = current.strip().upper()
+        return [app_commands.Choice(name=key, value=key) for key in sorted(keys) if current in key][:25]
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(GuildConfigCog(bot))
+    logger.info("Cog GuildConfig chargé.")
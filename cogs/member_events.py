@@ -4,9 +4,14 @@ from discord.ext import commands
 import logging
 import datetime
 from discord import utils
+from utils.pipeline import MemberContext, get_member_pipeline
 
 logger = logging.getLogger(__name__)
 
+# Images bannières (plutôt paysage)
+IMAGE_URL_BANNIERE_ARRIVEE = "https://i.imgur.com/XKAuUKv.png"
+IMAGE_URL_BANNIERE_DEPART = "https://i.imgur.com/XKAuUKv.png"
+
 # --- Helper Function pour formater la durée ---
 def format_duration(duration: datetime.timedelta) -> str:
     """Formate un timedelta en une chaîne lisible (jours, heures, minutes)."""
@@ -30,59 +35,46 @@ def format_duration(duration: datetime.timedelta) -> str:
 
 
 class MemberEventsCog(commands.Cog):
-    """Cog pour gérer les événements d'arrivée et de départ des membres."""
+    """Cog pour gérer les annonces d'arrivée et de départ des membres (étapes des pipelines membres)."""
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
 
-    # === Fonction on_member_join MODIFIÉE pour utiliser les Champs ===
-    @commands.Cog.listener()
-    async def on_member_join(self, member: discord.Member):
-        """Envoyé lorsqu'un membre rejoint le serveur."""
-        guild = member.guild
-        guild_id = self.bot.config.get('GUILD_ID')
-        if not guild_id or guild.id != guild_id: return
-
-        arrivals_channel_id = self.bot.config.get('ARRIVALS_CHANNEL_ID')
-        if not arrivals_channel_id: return logger.warning("ARRIVALS_CHANNEL_ID non configuré.")
-
-        arrivals_channel = guild.get_channel(arrivals_channel_id)
-        if not arrivals_channel or not isinstance(arrivals_channel, discord.TextChannel):
-            return logger.error(f"Salon arrivées ({arrivals_channel_id}) introuvable/invalide.")
+    async def cog_load(self):
+        get_member_pipeline(self.bot, 'join').add_stage('welcome_embed', self.welcome_stage, order=50)
+        get_member_pipeline(self.bot, 'leave').add_stage('departure_embed', self.departure_stage, order=50)
 
-        logger.info(f"Nouveau membre rejoint : {member.name} ({member.id})")
+    async def cog_unload(self):
+        get_member_pipeline(self.bot, 'join').remove_stage('welcome_embed')
+        get_member_pipeline(self.bot, 'leave').remove_stage('departure_embed')
 
-        # --- Préparation des informations et mentions ---
-        member_count = guild.member_count
-        server_name = guild.name
-        rules_channel_id = self.bot.config.get('RULES_CHANNEL_ID')
-        registration_channel_id = self.bot.config.get('REGISTRATION_CHANNEL_ID')
-        ticket_channel_id = self.bot.config.get('AIDE_CHANNEL_ID')
+    # === Arrivées : embed de bienvenue avec Champs ===
+    async def welcome_stage(self, ctx: MemberContext):
+        """Prépare l'embed de bienvenue dans le salon des arrivées."""
+        member, guild = ctx.member, ctx.guild
+        if not ctx.config.get('ARRIVALS_CHANNEL_ID'): return logger.warning("ARRIVALS_CHANNEL_ID non configuré.")
+        arrivals_channel = ctx.channel('ARRIVALS_CHANNEL_ID')
+        if not arrivals_channel: return logger.error(f"Salon arrivées ({ctx.config.get('ARRIVALS_CHANNEL_ID')}) introuvable/invalide.")
 
-        # Mentions (avec fallback texte)
-        rules_channel_mention = f"`#{(guild.get_channel(rules_channel_id) or 'règlement').name}`"
-        if rules_channel_id and (chan := guild.get_channel(rules_channel_id)): rules_channel_mention = chan.mention
+        logger.info("Nouveau membre rejoint : %s (%s)", member.name, member.id)
 
-        registration_channel_mention = f"`#{(guild.get_channel(registration_channel_id) or 'enregistrement-joueur').name}`"
-        if registration_channel_id and (chan := guild.get_channel(registration_channel_id)): registration_channel_mention = chan.mention
-
-        ticket_channel_mention = f"`#{(guild.get_channel(ticket_channel_id) or 'sos-ticket').name}`"
-        if ticket_channel_id and (chan := guild.get_channel(ticket_channel_id)): ticket_channel_mention = chan.mention
+        # --- Mentions (avec fallback texte) ---
+        rules_channel_mention = ctx.mention('RULES_CHANNEL_ID', 'règlement')
+        registration_channel_mention = ctx.mention('REGISTRATION_CHANNEL_ID', 'enregistrement-joueur')
+        ticket_channel_mention = ctx.mention('AIDE_CHANNEL_ID', 'sos-ticket')
 
         # --- Création de l'embed d'arrivée avec Champs ---
         embed = discord.Embed(
-            title=f"👋 Bienvenue sur {server_name}, {member.display_name} !",
-            # Description plus courte : juste le message de bienvenue et le compte
+            title=f"👋 Bienvenue sur {guild.name}, {member.display_name} !",
             description=(
                 f"{member.mention} vient de nous rejoindre.\n"
-                f"Nous sommes désormais **{member_count}** membres ✨\n\n"
-                # On enlève les étapes d'ici
+                f"Nous sommes désormais **{guild.member_count}** membres ✨\n\n"
             ),
-            color=discord.Color.blue() # Ou une autre couleur
+            color=discord.Color.blue()
         )
         embed.set_thumbnail(url=member.display_avatar.url) # Avatar du membre
 
-        # --- AJOUT DES CHAMPS pour les étapes ---
+        # --- Champs pour les étapes ---
         embed.add_field(
             name="1️⃣ Valider le Règlement",
             value=f"Lis et valide le règlement dans {rules_channel_mention}.",
@@ -98,67 +90,48 @@ class MemberEventsCog(commands.Cog):
             value=f"N'hésite pas à créer un ticket dans {ticket_channel_mention}.",
             inline=False
         )
-        # Ajouter la conclusion comme un champ sans titre (ou avec un titre comme "Et ensuite ?")
         embed.add_field(
             name="\u200b", # Caractère invisible pour un champ sans titre apparent
             value="*Voila tu sais tout et c'est maintenant à toi de jouer et passons de bon moments ensemble!*",
             inline=False
         )
-        # --- FIN AJOUT CHAMPS ---
-
-
         embed.set_footer(text=f"ID: {member.id}") # Footer minimaliste
 
-        # --- Image bannière pour l'arrivée (code existant) ---
-        # Assurez-vous que l'URL est la bonne et que l'image est plutôt paysage
-        IMAGE_URL_BANNIERE_ARRIVEE = "https://i.imgur.com/XKAuUKv.png" # URL de votre fichier
-
-        # Le check avec "URL_DE_VOTRE_IMAGE_BIENVENUE_ICI" n'est plus utile si vous avez mis la vraie URL
+        # --- Image bannière pour l'arrivée ---
         if IMAGE_URL_BANNIERE_ARRIVEE:
             try:
                 embed.set_image(url=IMAGE_URL_BANNIERE_ARRIVEE)
-                logger.info(f"Ajout de l'image de bienvenue pour {member.name}")
+                logger.debug("Ajout de l'image de bienvenue pour %s", member.name)
             except Exception as e_img:
                  logger.error(f"Impossible définir image arrivée (URL: {IMAGE_URL_BANNIERE_ARRIVEE}): {e_img}")
         else:
             logger.info("Pas d'URL configurée pour l'image bannière d'arrivée.")
 
-        # --- Envoyer l'embed ---
-        try:
-            await arrivals_channel.send(embed=embed)
-        except discord.Forbidden:
-            logger.error(f"Permissions manquantes (Send Messages/Embed Links) dans {arrivals_channel.name}")
-        except Exception as e:
-             logger.error(f"Erreur inattendue envoi arrivée pour {member.name}: {e}", exc_info=True)
-    # === FIN DE on_member_join ===
-
-
-    # === Fonction on_member_remove (inchangée) ===
-    @commands.Cog.listener()
-    async def on_member_remove(self, member: discord.Member):
-        """Envoyé lorsqu'un membre quitte le serveur."""
-        # ... (Tout le code de on_member_remove reste exactement comme dans votre fichier) ...
-        guild_id = self.bot.config.get('GUILD_ID')
-        if not guild_id or member.guild.id != guild_id: return
+        ctx.send(arrivals_channel, embed=embed) # Envoyé par le pipeline avec les autres actions
+    # === FIN des arrivées ===
 
-        departures_channel_id = self.bot.config.get('DEPARTURES_CHANNEL_ID')
-        if not departures_channel_id: return logger.warning("DEPARTURES_CHANNEL_ID non configuré.")
 
-        departures_channel = member.guild.get_channel(departures_channel_id)
-        if not departures_channel or not isinstance(departures_channel, discord.TextChannel):
-             return logger.error(f"Salon départs ({departures_channel_id}) introuvable/invalide.")
+    # === Départs ===
+    async def departure_stage(self, ctx: MemberContext):
+        """Prépare l'embed de départ. ctx.member est un Member si le membre était en cache,
+        sinon un simple User (date d'arrivée inconnue, mode cache léger)."""
+        member = ctx.member
+        if not ctx.config.get('DEPARTURES_CHANNEL_ID'): return logger.warning("DEPARTURES_CHANNEL_ID non configuré.")
+        departures_channel = ctx.channel('DEPARTURES_CHANNEL_ID')
+        if not departures_channel: return logger.error(f"Salon départs ({ctx.config.get('DEPARTURES_CHANNEL_ID')}) introuvable/invalide.")
 
-        logger.info(f"Membre parti : {member.name} ({member.id})")
+        logger.info("Membre parti : %s (%s)", member.name, member.id)
 
         duration_text = "a rejoint le serveur"
-        if member.joined_at:
+        joined_at = getattr(member, 'joined_at', None) # Absent pour un User hors cache
+        if joined_at:
             try:
-                now = utils.utcnow(); duration = now - member.joined_at
+                now = utils.utcnow(); duration = now - joined_at
                 if duration.total_seconds() >= 0: duration_text = f"était avec nous {format_duration(duration)}"
-                else: duration_text += f" le {utils.format_dt(member.joined_at, style='D')}"
+                else: duration_text += f" le {utils.format_dt(joined_at, style='D')}"
             except Exception as e:
                  logger.error(f"Erreur calcul durée {member.name}: {e}")
-                 duration_text += f" le {utils.format_dt(member.joined_at, style='D')}" if member.joined_at else ""
+                 duration_text += f" le {utils.format_dt(joined_at, style='D')}"
         else: duration_text = "Présence de durée inconnue"
 
         embed = discord.Embed(
@@ -169,16 +142,13 @@ class MemberEventsCog(commands.Cog):
         embed.set_thumbnail(url=member.display_avatar.url)
         embed.set_footer(text=duration_text)
 
-        IMAGE_URL_BANNIERE_DEPART = "https://i.imgur.com/XKAuUKv.png" # Gardez VOTRE URL ici
-        # Simplification de la condition
         if IMAGE_URL_BANNIERE_DEPART:
              try: embed.set_image(url=IMAGE_URL_BANNIERE_DEPART)
              except Exception as e_img: logger.error(f"Err image départ URL({IMAGE_URL_BANNIERE_DEPART}): {e_img}")
         else: logger.info("Pas d'URL image bannière départ.")
 
-        try: await departures_channel.send(embed=embed)
-        except Exception as e: logger.error(f"Erreur envoi départ {member.name}: {e}", exc_info=True)
-    # === FIN de on_member_remove ===
+        ctx.send(departures_channel, embed=embed)
+    # === FIN des départs ===
 
 
 # Fonction setup (inchangée)
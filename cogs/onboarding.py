@@ -1,62 +1,73 @@
 # cogs/onboarding.py
 import discord
 from discord.ext import commands
+from discord import app_commands
 import logging
-import json
-import os
-# Importe la classe de la Vue depuis registration.py
-# Cette ligne causera une erreur si registration.py a une SyntaxError
-from .registration import RegistrationView
+import asyncio
+import time
+from collections import Counter
+from utils.guilds import GuildConfig, admin_only, get_guild_configs, guild_config
+from utils.members import get_member_resolver
+from utils.ratelimit import RateBudget
+from utils.pipeline import MemberContext, get_member_pipeline
 
 logger = logging.getLogger(__name__)
 
+POINTER_FALLBACK_DELAY = 60 # Secondes avant suppression du rappel posté dans le salon si les MP sont fermés
+# Réconciliation des réactions au règlement manquées pendant une absence du bot
+RECONCILE_CHECKPOINT_KEY = 'rules_reconcile_checkpoint' # Clé d'état du serveur (config_runtime.json) : dernier réacteur traité
+RECONCILE_PAGE_SIZE = 100 # Réacteurs par requête (maximum de l'API)
+RECONCILE_RATE = 5.0 # Transitions de rôles par seconde (PUT du rôle vérifié, DELETE du rôle nouveau joueur)
+RECONCILE_BURST = 5
+RECONCILE_CONCURRENCY = 5
+RECONCILE_PROGRESS_INTERVAL = 15.0 # Secondes minimum entre deux logs de progression
+RECONCILE_CHECKPOINT_INTERVAL = 2.0 # Secondes minimum entre deux écritures du point de reprise
+
 class OnboardingCog(commands.Cog):
     """Cog pour gérer l'arrivée des nouveaux membres et la validation des règles."""
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        # Récupère l'ID depuis la config chargée dans main.py
-        self.rules_message_id = self.bot.config.get('RULES_MESSAGE_ID')
+        self.rules_message_ids: dict[int, int | None] = {} # Par serveur, lus au premier accès
+        self._reconcile_task: asyncio.Task | None = None
 
-    def save_rules_message_id(self, message_id: int):
-        """Sauvegarde l'ID du message des règles dans config_runtime.json"""
-        try:
-            data = {}
-            try:
-                with open(self.bot.runtime_config_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-            except (FileNotFoundError, json.JSONDecodeError):
-                logger.warning(f"Fichier {self.bot.runtime_config_path} non trouvé ou invalide lors de la lecture pour sauvegarde. Création/Écrasement.")
-            except Exception as e_read:
-                 logger.error(f"Erreur de lecture de {self.bot.runtime_config_path}: {e_read}")
-                 return # Ne pas continuer si on ne peut pas lire
-
-            data['rules_message_id'] = message_id
-            with open(self.bot.runtime_config_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=4)
-
-            self.bot.config['RULES_MESSAGE_ID'] = message_id
-            self.rules_message_id = message_id
-            logger.info(f"ID du message des règles ({message_id}) sauvegardé dans {self.bot.runtime_config_path} et mis à jour en mémoire.")
-
-        except IOError as e:
-            logger.error(f"Erreur d'écriture lors de la sauvegarde de l'ID du message des règles: {e}")
-        except Exception as e:
-            logger.error(f"Erreur inattendue lors de la sauvegarde de l'ID du message des règles: {e}")
+    async def cog_load(self):
+        get_member_pipeline(self.bot, 'join').add_stage('new_player_role', self.new_player_role_stage, order=10)
+
+    async def cog_unload(self):
+        get_member_pipeline(self.bot, 'join').remove_stage('new_player_role')
+        if self._reconcile_task: self._reconcile_task.cancel() # Le point de reprise permet de continuer plus tard
+
+    def rules_message_id(self, config: GuildConfig) -> int | None:
+        """ID du message des règles du serveur (mémorisé : lu à chaque réaction)."""
+        if config.guild_id not in self.rules_message_ids:
+            self.rules_message_ids[config.guild_id] = config.read_state('rules_message_id') or config.get('RULES_MESSAGE_ID')
+        return self.rules_message_ids[config.guild_id]
+
+    def save_rules_message_id(self, config: GuildConfig, message_id: int):
+        """Sauvegarde l'ID du message des règles (config_runtime.json pour le serveur principal, guild_config.json sinon)."""
+        config.update_state(rules_message_id=message_id)
+        if config.primary: self.bot.config['RULES_MESSAGE_ID'] = message_id
+        self.rules_message_ids[config.guild_id] = message_id
+        logger.info(f"ID du message des règles ({message_id}) sauvegardé pour le serveur {config.guild_id} et mis à jour en mémoire.")
 
 
-    @commands.command(name='postrules', help="Poste le message des règles et enregistre son ID.")
-    @commands.has_role(int(os.getenv('ADMIN_ROLE_ID'))) # Assurez-vous que ADMIN_ROLE_ID est bien un int dans config
+    # Commande hybride : !postrules ou /postrules (sans l'intent message_content)
+    @commands.hybrid_command(name='postrules', help="Poste le message des règles et enregistre son ID.")
+    @admin_only
+    @app_commands.guild_only()
     async def post_rules_message(self, ctx: commands.Context):
         """(Re)poste le message des règles."""
-        rules_channel_id = self.bot.config.get('RULES_CHANNEL_ID')
+        await ctx.defer(ephemeral=True) # En slash : suppression/envoi/réaction dépassent parfois 3 s
+        config = guild_config(self.bot, ctx.guild)
+        rules_channel_id = config.get('RULES_CHANNEL_ID')
         if not rules_channel_id:
              await ctx.send("Erreur : RULES_CHANNEL_ID non configuré.")
-             logger.error("RULES_CHANNEL_ID non trouvé dans bot.config")
+             logger.error(f"RULES_CHANNEL_ID non configuré pour le serveur {ctx.guild.id}")
              return
 
-        rules_channel = self.bot.get_channel(rules_channel_id)
-        if not rules_channel or not isinstance(rules_channel, discord.TextChannel):
+        rules_channel = config.text_channel('RULES_CHANNEL_ID')
+        if not rules_channel:
             await ctx.send(f"Erreur : Salon des règles ({rules_channel_id}) introuvable/invalide.")
             logger.error(f"Salon des règles introuvable ou invalide : {rules_channel_id}")
             return
@@ -76,17 +87,18 @@ class OnboardingCog(commands.Cog):
 
         try:
             # Supprimer l'ancien message si possible
-            if self.rules_message_id:
+            old_message_id = self.rules_message_id(config)
+            if old_message_id:
                  try:
-                     old_message = await rules_channel.fetch_message(self.rules_message_id)
+                     old_message = await rules_channel.fetch_message(old_message_id)
                      await old_message.delete()
-                     logger.info(f"Ancien message des règles ({self.rules_message_id}) supprimé.")
+                     logger.info(f"Ancien message des règles ({old_message_id}) supprimé.")
                  except Exception: pass # Ignore si non trouvé ou erreur
 
             # Envoyer le nouveau
             rules_message = await rules_channel.send(embed=embed)
             await rules_message.add_reaction("✅")
-            self.save_rules_message_id(rules_message.id)
+            self.save_rules_message_id(config, rules_message.id)
             await ctx.send(f"Message des règles posté dans {rules_channel.mention} (ID: {rules_message.id}).", delete_after=15)
             logger.info(f"Message des règles posté par {ctx.author}, ID: {rules_message.id}")
         except discord.Forbidden:
@@ -95,30 +107,33 @@ class OnboardingCog(commands.Cog):
         except Exception as e:
             await ctx.send(f"Erreur inattendue lors de l'envoi du message des règles: {e}")
             logger.error(f"Erreur dans post_rules_message: {e}", exc_info=True)
-        try: await ctx.message.delete(delay=15)
-        except Exception: pass
+        if not ctx.interaction: # Le message de commande n'existe qu'en préfixe
+            try: await ctx.message.delete(delay=15)
+            except Exception: pass
 
 
     @commands.Cog.listener()
     async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
         """Attribue le rôle vérifié et envoie le bouton d'enregistrement."""
-        if payload.user_id == self.bot.user.id or not self.rules_message_id or payload.message_id != self.rules_message_id or str(payload.emoji) != '✅':
-            return
+        if payload.user_id == self.bot.user.id or str(payload.emoji) != '✅': return
+        config = guild_config(self.bot, payload.guild_id)
+        if not config or payload.message_id != self.rules_message_id(config): return
 
         guild = self.bot.get_guild(payload.guild_id)
         if not guild: return
-        member = guild.get_member(payload.user_id)
+        # payload.member est fourni par la gateway ; sinon résolution partagée (cache puis REST)
+        member = payload.member or await get_member_resolver(self.bot).get(guild, payload.user_id)
         if not member: return
 
-        verified_role_id = self.bot.config.get('VERIFIED_PLAYER_ROLE_ID')
-        new_player_role_id = self.bot.config.get('NEW_PLAYER_ROLE_ID')
-        reg_channel_id = self.bot.config.get('REGISTRATION_CHANNEL_ID')
+        verified_role_id = config.get('VERIFIED_PLAYER_ROLE_ID')
+        new_player_role_id = config.get('NEW_PLAYER_ROLE_ID')
+        reg_channel_id = config.get('REGISTRATION_CHANNEL_ID')
 
         if not verified_role_id or not reg_channel_id:
             logger.error("VERIFIED_PLAYER_ROLE_ID ou REGISTRATION_CHANNEL_ID manquant dans la config!")
             return
 
-        verified_role = guild.get_role(verified_role_id)
+        verified_role = config.role('VERIFIED_PLAYER_ROLE_ID')
         if not verified_role:
             logger.error(f"Rôle vérifié ({verified_role_id}) introuvable.")
             return
@@ -128,33 +143,17 @@ class OnboardingCog(commands.Cog):
         # === Attribution du rôle Vérifié ===
         try:
             await member.add_roles(verified_role, reason="A accepté le règlement via réaction.")
-            logger.info(f"Rôle '{verified_role.name}' ajouté à {member.display_name}.")
+            logger.info("Rôle '%s' ajouté à %s.", verified_role.name, member.display_name)
 
             # Retirer ancien rôle si configuré et présent
             if new_player_role_id:
-                new_player_role = guild.get_role(new_player_role_id)
+                new_player_role = config.role('NEW_PLAYER_ROLE_ID')
                 if new_player_role and new_player_role in member.roles:
                     try: await member.remove_roles(new_player_role, reason="Règlement accepté.")
                     except Exception as e_rem: logger.warning(f"Impossible de retirer le rôle Nouveau Joueur pour {member.name}: {e_rem}")
 
-            # === Envoyer le message avec le bouton ===
-            reg_channel = guild.get_channel(reg_channel_id)
-            if reg_channel and isinstance(reg_channel, discord.TextChannel):
-                try:
-                    # Créer et envoyer la vue avec le bouton
-                    view = RegistrationView(bot=self.bot) # Assurez-vous que RegistrationView est importé
-                    welcome_message = (
-                        f"Bienvenue {member.mention} ! Vous avez accepté le règlement.\n\n"
-                        "Cliquez sur le bouton ci-dessous pour commencer votre enregistrement :"
-                    )
-                    await reg_channel.send(welcome_message, view=view)
-                    logger.info(f"Message avec bouton d'enregistrement envoyé à {member.name} dans {reg_channel.name}")
-                except discord.Forbidden:
-                    logger.error(f"Permissions manquantes pour envoyer le message avec bouton dans {reg_channel.name}")
-                except Exception as e_send:
-                    logger.error(f"Erreur lors de l'envoi du message avec bouton: {e_send}")
-            else:
-                 logger.warning(f"Salon d'enregistrement ({reg_channel_id}) introuvable ou invalide.")
+            # === Indiquer le panneau d'enregistrement (MP, plus de message par membre dans le salon) ===
+            await self.send_registration_pointer(config, member)
 
         except discord.Forbidden:
             logger.error(f"Permissions manquantes pour ajouter le rôle '{verified_role.name}' à {member.display_name}.")
@@ -163,20 +162,137 @@ class OnboardingCog(commands.Cog):
         except Exception as e_add:
              logger.error(f"Erreur lors de l'attribution du rôle Vérifié à {member.name}: {e_add}", exc_info=True)
 
+    async def send_registration_pointer(self, config: GuildConfig, member: discord.Member) -> bool:
+        """Indique le panneau d'enregistrement à un membre qui vient d'être vérifié : MP, ou rappel court
+        dans le salon d'enregistrement si ses MP sont fermés. Retourne True si le rappel a été envoyé."""
+        reg_channel = config.text_channel('REGISTRATION_CHANNEL_ID')
+        if not reg_channel:
+            logger.warning(f"Salon d'enregistrement ({config.get('REGISTRATION_CHANNEL_ID')}) introuvable ou invalide.")
+            return False
+        registration_cog = self.bot.get_cog('RegistrationCog')
+        panel_url = registration_cog.panel_url(member.guild) if registration_cog else None
+        pointer = (f"Bienvenue {member.mention} ! Vous avez accepté le règlement.\n\n"
+                   f"Pour créer votre joueur, cliquez sur « Créer mon joueur » dans {reg_channel.mention}"
+                   + (f" : {panel_url}" if panel_url else "."))
+        try:
+            await member.send(pointer)
+            logger.info("Lien vers le panneau d'enregistrement envoyé en MP à %s", member.name)
+            return True
+        except discord.Forbidden: # MP fermés : rappel court dans le salon, supprimé automatiquement
+            try: await reg_channel.send(pointer, delete_after=POINTER_FALLBACK_DELAY); return True
+            except Exception as e_send: logger.error(f"Erreur lors de l'envoi du rappel d'enregistrement: {e_send}")
+        except Exception as e_send:
+            logger.error(f"Erreur lors de l'envoi du MP d'enregistrement à {member.name}: {e_send}")
+        return False
+
 
+    # --- Réconciliation au démarrage ---
     @commands.Cog.listener()
-    async def on_member_join(self, member: discord.Member):
-        """Attribue le rôle Nouveau Joueur à l'arrivée."""
-        guild_id = self.bot.config.get('GUILD_ID')
-        if not guild_id or member.guild.id != guild_id: return
-
-        new_player_role_id = self.bot.config.get('NEW_PLAYER_ROLE_ID')
-        if new_player_role_id:
-            role = member.guild.get_role(new_player_role_id)
-            if role:
-                try: await member.add_roles(role, reason="Nouveau membre rejoint.")
-                except Exception as e: logger.error(f"Impossible d'ajouter le rôle Nouveau Joueur à {member.name}: {e}")
-            else: logger.warning(f"Rôle Nouveau Joueur ({new_player_role_id}) introuvable.")
+    async def on_ready(self):
+        # on_ready suit chaque nouvelle session gateway (IDENTIFY) : les réactions faites entre-temps n'ont pas été reçues
+        if self._reconcile_task and not self._reconcile_task.done(): return
+        self._reconcile_task = asyncio.create_task(self.reconcile_rules_reactions(), name='rules-reconcile')
+
+    async def reconcile_rules_reactions(self, config: GuildConfig | None = None) -> Counter | None:
+        """Réconcilie le serveur `config`, ou chaque serveur servi l'un après l'autre (statistiques cumulées)."""
+        if config is not None: return await self.reconcile_guild_rules(config)
+        results = [await self.reconcile_guild_rules(config) for config in get_guild_configs(self.bot).all()]
+        results = [stats for stats in results if stats is not None]
+        return sum(results, Counter()) if results else None
+
+    async def reconcile_guild_rules(self, config: GuildConfig) -> Counter | None:
+        """Attribue le rôle vérifié aux membres ayant réagi ✅ au règlement pendant que le bot était hors ligne.
+
+        Les réacteurs sont paginés par 100 (IDs croissants) et comparés par différence d'ensembles aux
+        membres déjà vérifiés ; les transitions (vérifié +, nouveau joueur -) partent en ajout/retrait ciblés
+        (PUT/DELETE du rôle) sous RateBudget. Le dernier ID traité est sauvegardé hors de la boucle, au plus toutes
+        les RECONCILE_CHECKPOINT_INTERVAL secondes : une exécution interrompue reprend quelques pages en arrière au pire.
+        """
+        guild = config.guild
+        rules_message_id = self.rules_message_id(config)
+        if not guild or not rules_message_id: return None
+        rules_channel = config.text_channel('RULES_CHANNEL_ID')
+        verified_role = config.role('VERIFIED_PLAYER_ROLE_ID')
+        if not rules_channel or not verified_role:
+            logger.error(f"Réconciliation du règlement impossible sur {guild.name} : salon des règles ou rôle vérifié introuvable.")
+            return None
+        new_player_role = config.role('NEW_PLAYER_ROLE_ID')
+        pointers = config.text_channel('REGISTRATION_CHANNEL_ID') is not None
+        if not pointers: logger.warning(f"Réconciliation du règlement sur {guild.name} : salon d'enregistrement introuvable, aucun rappel envoyé.")
+        try: rules_message = await rules_channel.fetch_message(rules_message_id)
+        except discord.HTTPException as e:
+            logger.warning(f"Réconciliation du règlement : message {rules_message_id} inaccessible ({e}).")
+            return None
+        reaction = discord.utils.find(lambda r: str(r.emoji) == '✅', rules_message.reactions)
+        if not reaction: return None
+
+        checkpoint = config.read_state(RECONCILE_CHECKPOINT_KEY) or {}
+        after = checkpoint.get('after') if checkpoint.get('message_id') == rules_message.id else None
+        resolver = get_member_resolver(self.bot)
+        verified_ids = {m.id for m in await resolver.role_members(guild, verified_role)}
+        stats = Counter(); budget = RateBudget(RECONCILE_RATE, burst=RECONCILE_BURST, concurrency=RECONCILE_CONCURRENCY)
+        started = last_log = last_save = time.monotonic(); last_page: list[int] = []
+        logger.info(f"Réconciliation du règlement : {reaction.count} réactions ✅, {len(verified_ids)} membres vérifiés"
+                    + (f", reprise après l'utilisateur {after}." if after else "."))
+
+        async def verify(member: discord.Member):
+            reason = "A accepté le règlement via réaction (pendant une absence du bot)."
+            async with budget:
+                try:
+                    # Ajout/retrait ciblés plutôt qu'une liste complète tirée du cache du résolveur
+                    await member.add_roles(verified_role, reason=reason)
+                    if new_player_role and new_player_role in member.roles: await member.remove_roles(new_player_role, reason=reason)
+                    stats['verified'] += 1; verified_ids.add(member.id)
+                except discord.HTTPException as e:
+                    stats['errors'] += 1; logger.warning(f"Réconciliation : rôles de {member} non modifiés ({e}).")
+                    return
+            if not pointers: return
+            # Même rappel que sur le chemin direct, sous le même budget que les transitions de rôles
+            async with budget:
+                if await self.send_registration_pointer(config, member): stats['pointed'] += 1
+
+        async def save_checkpoint():
+            nonlocal last_save
+            last_save = time.monotonic()
+            await config.update_state_async(**{RECONCILE_CHECKPOINT_KEY: {'message_id': rules_message.id, 'after': last_page[-1]}})
+
+        async def process(page: list[int]):
+            nonlocal last_log, last_page
+            stats['reactors'] += len(page)
+            missing = set(page) - verified_ids - {self.bot.user.id}
+            if missing:
+                members = await resolver.get_many(guild, missing)
+                stats['departed'] += len(missing) - len(members)
+                await asyncio.gather(*(verify(m) for m in members.values() if not m.bot))
+            last_page = page
+            if time.monotonic() - last_save >= RECONCILE_CHECKPOINT_INTERVAL: await save_checkpoint()
+            if time.monotonic() - last_log >= RECONCILE_PROGRESS_INTERVAL:
+                last_log = time.monotonic()
+                logger.info(f"Réconciliation du règlement : {stats['reactors']} réacteurs parcourus, {stats['verified']} vérifiés, "
+                            f"{stats['departed']} partis, {stats['errors']} erreurs.")
+
+        page: list[int] = []
+        try:
+            async for user in reaction.users(limit=None, after=discord.Object(after) if after else None):
+                page.append(user.id)
+                if len(page) >= RECONCILE_PAGE_SIZE: await process(page); page = []
+            if page: await process(page)
+        except discord.HTTPException as e:
+            logger.error(f"Réconciliation du règlement interrompue ({e}) ; reprise au prochain démarrage.")
+            if last_page: await save_checkpoint()
+            return stats
+        await config.update_state_async(**{RECONCILE_CHECKPOINT_KEY: None}) # Terminée : prochaine exécution complète
+        logger.info(f"Réconciliation du règlement terminée en {time.monotonic() - started:.1f}s : {stats['reactors']} réacteurs, "
+                    f"{stats['verified']} vérifiés ({stats['pointed']} rappels d'enregistrement), {stats['departed']} partis, {stats['errors']} erreurs.")
+        return stats
+
+    async def new_player_role_stage(self, ctx: MemberContext):
+        """Étape du pipeline d'arrivée : attribue le rôle Nouveau Joueur (appliqué avec les autres rôles)."""
+        new_player_role_id = ctx.config.get('NEW_PLAYER_ROLE_ID')
+        if not new_player_role_id: return
+        role = ctx.role('NEW_PLAYER_ROLE_ID')
+        if role: ctx.add_role(role, reason="Nouveau membre rejoint.")
+        else: logger.warning(f"Rôle Nouveau Joueur ({new_player_role_id}) introuvable.")
 
 
 # Fonction setup
@@ -0,0 +1,93 @@
+# cogs/performance.py
+import discord
+from discord.ext import commands
+from discord import app_commands
+import logging
+import math
+import time
+from utils.metrics import MetricsServer, resolver_collector
+from utils.members import get_member_resolver
+from utils.guilds import admin_only
+
+logger = logging.getLogger(__name__)
+
+PERF_TOP = 5 # Lignes par section dans !perf
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:.0f} ms" if seconds >= 0.01 else f"{seconds * 1000:.1f} ms"
+
+
+class PerformanceCog(commands.Cog, name="Performance"):
+    """Expose les métriques du bot : endpoint Prometheus local et résumé !perf pour les admins."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.metrics = bot.metrics
+        self._collector = resolver_collector(get_member_resolver(bot))
+        self.server = None
+        port = self.bot.config.get('METRICS_PORT')
+        if port: self.server = MetricsServer(self.metrics, self.bot.config.get('METRICS_HOST') or '127.0.0.1', port)
+
+    async def cog_load(self):
+        self.metrics.collectors.append(self._collector)
+        if self.server:
+            try: await self.server.start()
+            except OSError as e: logger.error(f"Impossible de démarrer l'endpoint métriques sur le port {self.server.port}: {e}"); self.server = None
+
+    async def cog_unload(self):
+        if self._collector in self.metrics.collectors: self.metrics.collectors.remove(self._collector)
+        if self.server: await self.server.stop()
+
+    def summary_embed(self) -> discord.Embed:
+        m = self.metrics
+        uptime = int(time.time() - m.started)
+        embed = discord.Embed(title="📈 Performances du bot", color=discord.Color.dark_teal(), timestamp=discord.utils.utcnow())
+        embed.description = (f"En ligne depuis {uptime // 3600} h {uptime % 3600 // 60:02d} min — latence gateway {_ms(self.bot.latency) if math.isfinite(self.bot.latency) else 'n/a'}"
+                             + (f"\nEndpoint : `http://{self.server.host}:{self.server.port}/metrics`" if self.server else ""))
+
+        events = m.events.most_common(PERF_TOP)
+        embed.add_field(name=f"Événements gateway ({sum(m.events.values())})", inline=False,
+                        value="\n".join(f"`{name}` : {count}" for name, count in events) or "Aucun")
+
+        slowest = sorted(m.listeners.items(), key=lambda item: item[1].quantile(0.95), reverse=True)[:PERF_TOP]
+        embed.add_field(name="Listeners les plus lents (p95 / max)", inline=False,
+                        value="\n".join(f"`{listener}` ({event}) : {_ms(h.quantile(0.95))} / {_ms(h.max)} sur {h.count}"
+                                        + (f", {m.listener_errors[(event, listener)]} erreurs" if m.listener_errors[(event, listener)] else "")
+                                        for (event, listener), h in slowest) or "Aucun")
+
+        routes = {}
+        errors = 0
+        for (method, route, status), count in m.rest_calls.items():
+            routes[f"{method} {route}"] = routes.get(f"{method} {route}", 0) + count
+            if not 200 <= status < 300: errors += count
+        top_routes = sorted(routes.items(), key=lambda item: item[1], reverse=True)[:PERF_TOP]
+        embed.add_field(name=f"Appels REST ({sum(routes.values())}, {errors} hors 2xx)", inline=False,
+                        value="\n".join(f"`{route}` : {count}" for route, count in top_routes) or "Aucun")
+
+        ack = m.interaction_ack
+        embed.add_field(name="Accusé des interactions", inline=True,
+                        value=f"p50 {_ms(ack.quantile(0.5))} · p95 {_ms(ack.quantile(0.95))} · max {_ms(ack.max)} ({ack.count})" if ack.count else "Aucune")
+        stats = get_member_resolver(self.bot).stats
+        embed.add_field(name="Résolution des membres", inline=True,
+                        value=" · ".join(f"{k} {v}" for k, v in sorted(stats.items())) or "Aucune")
+        watchdog = getattr(self.bot, 'watchdog', None)
+        lag = watchdog.recent_lag.snapshot() if watchdog else None
+        if lag and lag.count:
+            embed.add_field(name=f"Retard de la boucle, {watchdog.recent_lag.window / 60:.0f} dernières min ({watchdog.stalls} blocages)", inline=False,
+                            value=f"p50 {_ms(lag.quantile(0.5))} · p99 {_ms(lag.quantile(0.99))} · max {_ms(lag.max)}"
+                                  + (f"\nDernier responsable : `{watchdog.last_culprit}`" if watchdog.last_culprit else ""))
+        return embed
+
+    @commands.hybrid_command(name="perf", help="Résumé des métriques de performance du bot.")
+    @admin_only
+    @app_commands.guild_only()
+    async def perf(self, ctx: commands.Context):
+        """Affiche le résumé des métriques (admins)."""
+        await ctx.send(embed=self.summary_embed(), ephemeral=True)
+
+
+async def setup(bot: commands.Bot):
+    if not hasattr(bot, 'metrics'): return logger.error("PerformanceCog nécessite PurEsportBot (bot.metrics absent).")
+    await bot.add_cog(PerformanceCog(bot))
+    logger.info("Cog Performance chargé.")
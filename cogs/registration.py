@@ -1,15 +1,33 @@
 # cogs/registration.py
 import discord
 from discord.ext import commands
-from discord import ui
+from discord import ui, app_commands
 import logging
 import json
 import os
 import asyncio
+import threading
+import time
+from collections import Counter
+from utils.archive import ColdArchive
+from utils.audit import get_audit_log
+from utils.events import BLOCK, MemberJoined, PlayerRegistered, get_event_bus
+from utils.locks import KeyedLock
+from utils.guilds import GuildConfig, get_guild_configs, guild_config
+from utils.members import get_member_resolver
+from utils.search import ExactNameIndex, TrigramIndex
+from utils.views import get_view_registry
 
 logger = logging.getLogger(__name__)
 
 PLAYER_DATA_FILE = 'data/player_data.json'
+PLAYER_ARCHIVE_DIR = 'data/player_archive' # Fiches des joueurs partis (segments gzip JSON Lines), restaurées au retour
+CLEANUP_DELAY = 10 # Secondes avant la purge du salon d'enregistrement
+PANEL_RUNTIME_KEY = 'registration_panel_message_id' # Clé de config_runtime.json : panneau épinglé
+# Rafraîchissement des pseudos/avatars (débit et intervalle : PLAYER_REFRESH_RATE, PLAYER_REFRESH_INTERVAL_HOURS)
+REFRESH_BATCH_SIZE = 100 # Joueurs résolus par lot (une requête gateway pour les absents du cache)
+REFRESH_START_DELAY = 300 # Secondes après on_ready avant le premier balayage (laisse passer la reconnexion)
+REFRESH_SAVE_INTERVAL = 30.0 # Secondes minimum entre deux écritures du fichier pendant un balayage
 
 # --- Définition des listes d'options ---
 POSITIONS = [
@@ -69,8 +87,9 @@ class RegistrationView(ui.View):
         """Callback exécuté quand le bouton 'Créer mon joueur' est cliqué."""
         logger.info(f"Bouton 'Créer mon joueur' cliqué par {interaction.user.name} ({interaction.user.id})")
         registration_cog = self.bot.get_cog('RegistrationCog')
-        if not registration_cog:
-            logger.error("Impossible de récupérer le RegistrationCog dans la vue.")
+        roster = registration_cog.roster(interaction.guild) if registration_cog else None
+        if not roster:
+            logger.error("Impossible de récupérer le RegistrationCog (ou les joueurs du serveur) dans la vue.")
             await interaction.response.send_message("Une erreur interne s'est produite (Cog non trouvé). Contactez un admin.", ephemeral=True)
             return
 
@@ -81,92 +100,460 @@ class RegistrationView(ui.View):
              return
 
         # Vérifications (déjà enregistré, rôle)
-        # Assurez-vous que ces clés existent bien dans bot.config (chargées depuis .env)
-        verified_role_id = self.bot.config.get('VERIFIED_PLAYER_ROLE_ID')
+        verified_role_id = roster.config.get('VERIFIED_PLAYER_ROLE_ID')
         if not verified_role_id:
              logger.error("VERIFIED_PLAYER_ROLE_ID non trouvé dans la configuration du bot.")
              await interaction.response.send_message("Erreur de configuration interne (Rôle Vérifié).", ephemeral=True)
              return
 
-        if str(author.id) in registration_cog.player_data:
+        if str(author.id) in roster.data:
             await interaction.response.send_message("Vous êtes déjà enregistré.", ephemeral=True)
             logger.warning(f"{author.name} a cliqué sur register mais est déjà enregistré.")
             return
 
-        verified_role = guild.get_role(verified_role_id)
+        verified_role = roster.config.role('VERIFIED_PLAYER_ROLE_ID')
         if not verified_role or verified_role not in author.roles:
              await interaction.response.send_message("Vous n'avez pas (ou plus) le rôle requis pour vous enregistrer.", ephemeral=True)
              logger.warning(f"{author.name} a cliqué sur register sans le rôle requis.")
              return
 
-        # Lancer le processus
-        await interaction.response.send_message("Préparation du formulaire d'enregistrement...", ephemeral=True)
-        # Utilise followup car la réponse initiale doit être rapide (moins de 3s)
-        await interaction.followup.send(f"Ok {author.mention}, nous allons commencer ici.", ephemeral=True)
-        # Passe l'interaction originale pour pouvoir récupérer user, guild, channel etc.
-        await registration_cog._start_registration_flow(interaction)
-
-
-# --- Classe Cog Principale ---
-class RegistrationCog(commands.Cog):
-    """Cog gérant le flux d'enregistrement et les données joueurs."""
-    def __init__(self, bot: commands.Bot):
-        self.bot = bot
-        self.player_data = self.load_player_data()
+        # Lancer le processus : les réponses texte passent par un formulaire (pas besoin de l'intent message_content)
+        await interaction.response.send_modal(RegistrationModal(registration_cog, roster))
+
+
+def identity_fields(user: discord.abc.User) -> dict:
+    """Champs d'identité Discord copiés dans la fiche du joueur (figés jusqu'au prochain rafraîchissement)."""
+    return {'discord_name': str(user), 'discord_display_name': user.display_name,
+            'avatar_url': str(user.avatar.url) if user.avatar else None}
+
+
+def parse_choices(text: str, options: list[discord.SelectOption]) -> list[str] | None:
+    """'lundi, VPG France' -> valeurs des options (valeur ou libellé, casse ignorée). None si un choix est inconnu."""
+    lookup = {}
+    for option in options: lookup[option.label.lower()] = lookup[option.value.lower()] = option.value
+    values = []
+    for part in text.split(','):
+        part = part.strip().lower()
+        if not part: continue
+        if part not in lookup: return None
+        if lookup[part] not in values: values.append(lookup[part])
+    return values or None
+
+
+def player_embed(data: dict, description: str | None = None) -> discord.Embed:
+    """Fiche d'un joueur (présentation publique et commande /joueur)."""
+    embed = discord.Embed(
+        title=f"✨ Présentation : {data.get('discord_display_name', data.get('nom_joueur', 'Joueur'))} ✨",
+        description=description or f"<@{data.get('discord_id')}>",
+        color=discord.Color.from_rgb(0, 153, 255)
+    )
+    if data.get('avatar_url'):
+        embed.set_thumbnail(url=data['avatar_url'])
+    embed.add_field(name="Nom Joueur", value=data.get('nom_joueur', 'N/A'), inline=False)
+    embed.add_field(name="Poste Principal", value=data.get('poste_principal', 'N/A'), inline=True)
+    embed.add_field(name="Poste Secondaire", value=data.get('poste_secondaire', 'N/A'), inline=True)
+    embed.add_field(name="Disponibilités", value=data.get('disponibilites', 'N/A'), inline=False)
+    embed.add_field(name="Ancien Club", value=data.get('ancien_club', 'N/A'), inline=True)
+    embed.add_field(name="Compétitions Jouées", value=data.get('competitions_jouees', 'N/A'), inline=False)
+    embed.add_field(name="Expérience Détail", value=data.get('experience', 'N/A') or 'N/A', inline=False)
+    embed.set_footer(text=f"ID: {data.get('discord_id')}")
+    embed.timestamp = discord.utils.utcnow()
+    return embed
+
+
+# --- Formulaire (modal) pour les réponses texte ---
+class RegistrationModal(ui.Modal, title="Créer mon joueur"):
+    """Nom de joueur, ancien club et expérience ; les choix (postes, dispos, compétitions) suivent en menus."""
+    nom_joueur = ui.TextInput(label="Nom de joueur principal (GT/PSN/EA ID)", max_length=64)
+    ancien_club = ui.TextInput(label="Dernier club Pro (ou 'Aucun')", max_length=100, default="Aucun")
+    experience = ui.TextInput(label="Expérience Club Pro", style=discord.TextStyle.paragraph, max_length=1000,
+                              placeholder="Divisions, style de jeu, années...")
+
+    def __init__(self, registration_cog: 'RegistrationCog', roster: 'PlayerRoster'):
+        super().__init__(timeout=600)
+        self.registration_cog = registration_cog
+        self.roster = roster
+
+    async def on_submit(self, interaction: discord.Interaction):
+        answers = {'nom_joueur': self.nom_joueur.value.strip(), 'ancien_club': self.ancien_club.value.strip() or "Aucun",
+                   'experience': self.experience.value.strip()}
+        duplicates = self.roster.gamertags.owners(answers['nom_joueur'], exclude=str(interaction.user.id))
+        if duplicates: # Même nom de joueur (casse, accents et séparateurs ignorés) déjà enregistré
+            logger.warning(f"Nom de joueur '{answers['nom_joueur']}' refusé pour {interaction.user} : déjà utilisé par {duplicates[0]}.")
+            return await interaction.response.send_message(
+                f"Le nom de joueur **{answers['nom_joueur']}** est déjà utilisé par <@{duplicates[0]}>. "
+                "Contactez un admin s'il s'agit bien de vous.", ephemeral=True)
+        await interaction.response.send_message(f"Ok {interaction.user.mention}, choisissez maintenant vos postes et disponibilités ci-dessous.", ephemeral=True)
+        # Passe l'interaction du formulaire pour récupérer user, guild, channel etc.
+        await self.registration_cog._start_registration_flow(interaction, self.roster, answers)
+
+    async def on_error(self, interaction: discord.Interaction, error: Exception):
+        logger.error(f"Erreur formulaire d'enregistrement pour {interaction.user}: {error}", exc_info=error)
+        try: await interaction.followup.send("Une erreur s'est produite. Contactez un admin.", ephemeral=True)
+        except Exception: pass
+
+
+# --- Données joueurs d'un serveur ---
+class PlayerRoster:
+    """Joueurs enregistrés d'un serveur : fiches (JSON), index des noms, archive froide et panneau d'enregistrement.
+    Le serveur principal garde data/player_data.json ; les autres ont leurs fichiers sous data/guilds/<id>/."""
+
+    def __init__(self, config: GuildConfig):
+        self.config = config
+        self.guild_id = config.guild_id
+        self.path = config.data_path(PLAYER_DATA_FILE)
+        self.data = self.load_player_data() # Joueurs présents sur le serveur ; les partis sont dans self.archive
+        self.archive = ColdArchive(config.data_path(PLAYER_ARCHIVE_DIR))
+        self.name_index = TrigramIndex() # Recherche floue : nom de joueur, pseudo et nom affiché Discord
+        self.gamertags = ExactNameIndex() # Doublons : nom de joueur seulement (un pseudo Discord identique n'en est pas un)
+        for user_id, entry in self.data.items(): self.index_player(user_id, entry)
+        self.panel_message_id: int | None = config.read_state(PANEL_RUNTIME_KEY)
+        self.panel_lock = asyncio.Lock()
+        self.presentation_locks = KeyedLock() # Une édition de présentation à la fois par joueur
+        self._save_lock = threading.Lock() # Écritures du fichier : boucle et thread (save_player_data_async)
+        self._save_seq = self._saved_seq = 0 # Un instantané plus ancien que le fichier n'est jamais écrit
 
     def load_player_data(self) -> dict:
         """Charge les données des joueurs depuis le fichier JSON."""
-        # ... (code inchangé) ...
-        if os.path.exists(PLAYER_DATA_FILE):
+        if os.path.exists(self.path):
             try:
-                with open(PLAYER_DATA_FILE, 'r', encoding='utf-8') as f:
+                with open(self.path, 'r', encoding='utf-8') as f:
                     content = f.read()
                     if not content: return {}
                     return json.loads(content)
             except json.JSONDecodeError:
-                logger.error(f"Erreur décodage JSON: {PLAYER_DATA_FILE}")
+                logger.error(f"Erreur décodage JSON: {self.path}")
                 return {}
             except Exception as e:
-                 logger.error(f"Erreur chargement {PLAYER_DATA_FILE}: {e}", exc_info=True)
+                 logger.error(f"Erreur chargement {self.path}: {e}", exc_info=True)
                  return {}
         return {}
 
     def save_player_data(self):
         """Sauvegarde les données actuelles des joueurs dans le fichier JSON."""
-        # ... (code inchangé) ...
-        try:
-            with open(PLAYER_DATA_FILE, 'w', encoding='utf-8') as f:
-                json.dump(self.player_data, f, indent=4, ensure_ascii=False)
-        except Exception as e:
-            logger.error(f"Erreur sauvegarde {PLAYER_DATA_FILE}: {e}", exc_info=True)
+        self._save_seq += 1
+        self._write_snapshot(self.data, self._save_seq)
+
+    async def save_player_data_async(self):
+        """Comme save_player_data, hors de la boucle : l'écriture porte sur une copie de `data`
+        (les fiches sont remplacées, jamais modifiées en place)."""
+        self._save_seq += 1
+        await asyncio.to_thread(self._write_snapshot, dict(self.data), self._save_seq)
+
+    def _write_snapshot(self, data: dict, seq: int):
+        with self._save_lock:
+            if seq < self._saved_seq: return # Une sauvegarde plus récente est déjà sur disque
+            try:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                with open(f"{self.path}.tmp", 'w', encoding='utf-8') as f:
+                    json.dump(data, f, indent=4, ensure_ascii=False)
+                os.replace(f"{self.path}.tmp", self.path)
+                self._saved_seq = seq
+            except Exception as e:
+                logger.error(f"Erreur sauvegarde {self.path}: {e}", exc_info=True)
+
+    # --- Index des noms et recherche ---
+    def index_player(self, user_id: str, entry: dict):
+        self.name_index.add(user_id, entry.get('nom_joueur', ''), entry.get('discord_name', ''), entry.get('discord_display_name', ''))
+        self.gamertags.add(user_id, entry.get('nom_joueur', ''))
+
+    def store_player(self, user_id: str, entry: dict):
+        """Enregistre un joueur : données en mémoire, index des noms, puis fichier."""
+        self.store_players({user_id: entry})
+
+    def store_players(self, entries: dict[str, dict], save: bool = True):
+        """Enregistre plusieurs joueurs avec une seule écriture du fichier (aucune si `save` est faux : à l'appelant de sauvegarder)."""
+        for user_id, entry in entries.items():
+            self.data[user_id] = entry # Remplacé, jamais modifié en place (voir RosterExportCog)
+            self.index_player(user_id, entry)
+        if save: self.save_player_data()
+
+    def update_player(self, user_id: str, **changes) -> dict | None:
+        """Écriture partielle : applique `changes` à la fiche existante. Retourne la nouvelle fiche (None si inconnu)."""
+        entry = self.data.get(user_id)
+        if entry is None: return None
+        entry = {**entry, **changes}
+        self.store_player(user_id, entry)
+        return entry
+
+    def archive_players(self, user_ids, save: bool = True) -> int:
+        """Déplace les fiches des joueurs partis vers l'archive froide (une écriture de chaque côté ; voir store_players pour `save`)."""
+        entries = {uid: self.data.pop(uid) for uid in user_ids if uid in self.data}
+        if not entries: return 0
+        self.archive.archive(entries)
+        for user_id in entries: self.name_index.remove(user_id); self.gamertags.remove(user_id)
+        if save: self.save_player_data()
+        return len(entries)
+
+    def restore_player(self, user_id: str) -> dict | None:
+        """Remet en place la fiche archivée d'un joueur revenu sur le serveur."""
+        if user_id in self.data or user_id not in self.archive: return None
+        entry = self.archive.restore(user_id)
+        if entry is not None: self.store_player(user_id, entry)
+        return entry
+
+    def search_players(self, query: str, limit: int = 25) -> list[tuple[str, dict, float]]:
+        """Joueurs dont un nom ressemble à `query`, du plus proche au moins proche."""
+        return [(uid, self.data[uid], score) for uid, score in self.name_index.search(query, limit=limit) if uid in self.data]
+
+    def set_panel(self, message_id: int | None):
+        self.panel_message_id = message_id
+        if message_id: self.config.update_state(**{PANEL_RUNTIME_KEY: message_id})
 
 
-    # --- Fonctions Helper pour poser les questions ---
+# --- Classe Cog Principale ---
+class RegistrationCog(commands.Cog):
+    """Cog gérant le flux d'enregistrement et les données joueurs (une PlayerRoster par serveur servi)."""
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.rosters: dict[int, PlayerRoster] = {}
+        for config in get_guild_configs(bot).all(): self.roster(config.guild_id) # Chargées avant la connexion
+        self._refresh_task: asyncio.Task | None = None
+
+    async def cog_load(self):
+        # Aucun événement perdu : une fiche non restaurée ou une présentation manquante se verraient
+        bus = get_event_bus(self.bot)
+        self._subscriptions = [bus.subscribe(MemberJoined, self.restore_on_join, name='player_restore', policy=BLOCK),
+                               bus.subscribe(PlayerRegistered, self.present_player, name='player_presentation', policy=BLOCK),
+                               bus.subscribe(PlayerRegistered, self.log_registration, name='registration_audit')]
+
+    async def cog_unload(self):
+        if self._refresh_task: self._refresh_task.cancel()
+        for subscription in self._subscriptions: get_event_bus(self.bot).unsubscribe(subscription)
+
+    def roster(self, guild: discord.abc.Snowflake | int | None) -> PlayerRoster | None:
+        """Joueurs du serveur (objet Guild ou ID), chargés au premier accès ; None si le serveur n'est pas servi."""
+        config = guild_config(self.bot, guild)
+        if not config: return None
+        roster = self.rosters.get(config.guild_id)
+        if roster is None: roster = self.rosters[config.guild_id] = PlayerRoster(config)
+        return roster
+
+    @commands.Cog.listener()
+    async def on_raw_member_remove(self, payload: discord.RawMemberRemoveEvent):
+        # Version brute : reçue même si le membre n'est pas dans le cache gateway
+        roster = self.roster(payload.guild_id)
+        if roster and roster.archive_players([str(payload.user.id)]): logger.info("Fiche joueur de %s archivée (départ du serveur).", payload.user)
+
+    async def restore_on_join(self, event: MemberJoined):
+        """Abonné du bus : restaure la fiche archivée d'un joueur revenu (lecture gzip hors du pipeline d'arrivée)."""
+        roster = self.roster(event.guild_id)
+        if roster and roster.restore_player(str(event.member.id)) is not None: logger.info("Fiche joueur de %s restaurée depuis l'archive.", event.member)
+
+    async def present_player(self, event: PlayerRegistered):
+        """Abonné du bus : présentation publique d'un joueur qui vient de s'enregistrer."""
+        await self.publish_presentation(event.member.guild, str(event.member.id))
+
+    async def log_registration(self, event: PlayerRegistered):
+        """Abonné du bus : inscription dans le journal d'audit (AUDIT_LOG_CHANNEL_ID, optionnel)."""
+        member, entry = event.member, event.entry
+        embed = discord.Embed(title="📋 Nouveau joueur enregistré", color=discord.Color.blue(), timestamp=discord.utils.utcnow(),
+                              description=f"{member.mention} ({member.id}) — **{entry.get('nom_joueur', '?')}**")
+        if entry.get('poste_principal'): embed.add_field(name="Poste", value=entry['poste_principal'], inline=True)
+        get_audit_log(self.bot).log(event.guild_id, embed)
+
+    @commands.hybrid_command(name="joueur", help="Affiche la fiche d'un joueur enregistré (recherche floue par nom).")
+    @app_commands.guild_only()
+    @app_commands.describe(nom="Nom de joueur, pseudo ou nom affiché Discord")
+    async def show_player(self, ctx: commands.Context, *, nom: str):
+        """Fiche du joueur correspondant le mieux (la valeur d'autocomplétion est son ID Discord)."""
+        roster = self.roster(ctx.guild)
+        if not roster: return await ctx.send("Ce serveur n'est pas configuré.", ephemeral=True)
+        entry = roster.data.get(nom.strip())
+        if entry is None:
+            results = roster.search_players(nom, limit=1)
+            if not results: return await ctx.send(f"Aucun joueur ne correspond à « {nom} ».", ephemeral=True)
+            entry = results[0][1]
+        await ctx.send(embed=player_embed(entry), ephemeral=True)
+
+    @show_player.autocomplete('nom')
+    async def show_player_autocomplete(self, interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
+        roster = self.roster(interaction.guild)
+        if not current.strip() or not roster:
+            return []
+        return [app_commands.Choice(name=f"{entry.get('nom_joueur', '?')} ({entry.get('discord_name', uid)})"[:100], value=uid)
+                for uid, entry, _ in roster.search_players(current, limit=25)]
+
+    # --- Panneau d'enregistrement (un seul message épinglé, recréé s'il disparaît) ---
+
+    def panel_url(self, guild: discord.Guild) -> str | None:
+        """Lien vers le panneau d'enregistrement, s'il existe."""
+        roster = self.roster(guild)
+        channel_id = roster.config.get('REGISTRATION_CHANNEL_ID') if roster else None
+        if not channel_id or not roster.panel_message_id: return None
+        return f"https://discord.com/channels/{guild.id}/{channel_id}/{roster.panel_message_id}"
+
+    async def ensure_panel(self, roster: PlayerRoster) -> discord.Message | None:
+        """Vérifie que le panneau du serveur existe dans REGISTRATION_CHANNEL_ID ; le (re)poste et l'épingle sinon."""
+        channel = roster.config.text_channel('REGISTRATION_CHANNEL_ID')
+        if not channel:
+            return logger.error(f"Salon d'enregistrement ({roster.config.get('REGISTRATION_CHANNEL_ID')}) introuvable sur le serveur {roster.guild_id} : panneau non publié.")
+        async with roster.panel_lock: # Suppressions simultanées / reconnexion : un seul panneau
+            if roster.panel_message_id:
+                try: return await channel.fetch_message(roster.panel_message_id)
+                except discord.NotFound: logger.warning(f"Panneau d'enregistrement ({roster.panel_message_id}) disparu : nouvelle publication.")
+                except discord.HTTPException as e: return logger.error(f"Impossible de vérifier le panneau d'enregistrement: {e}")
+
+            embed = discord.Embed(
+                title="📝 Enregistrement des joueurs",
+                description=("Vous avez accepté le règlement ? Cliquez sur le bouton ci-dessous pour créer votre joueur.\n\n"
+                             "Un formulaire s'ouvre, puis quelques menus (postes, disponibilités, compétitions)."),
+                color=discord.Color.green()
+            )
+            try:
+                panel = await channel.send(embed=embed, view=RegistrationView(bot=self.bot))
+            except discord.HTTPException as e:
+                return logger.error(f"Impossible de publier le panneau d'enregistrement dans {channel.name}: {e}")
+            try: await panel.pin(reason="Panneau d'enregistrement")
+            except discord.HTTPException as e: logger.warning(f"Impossible d'épingler le panneau d'enregistrement: {e}")
+            roster.set_panel(panel.id)
+            logger.info(f"Panneau d'enregistrement publié dans {channel.name} (ID: {panel.id}).")
+            return panel
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # Aussi après une reconnexion : un panneau a pu être supprimé entre-temps
+        rosters = [self.roster(config.guild_id) for config in get_guild_configs(self.bot).all()]
+        await asyncio.gather(*(self.ensure_panel(roster) for roster in rosters))
+        if self.bot.config.get('PLAYER_REFRESH_INTERVAL_HOURS') and not (self._refresh_task and not self._refresh_task.done()):
+            self._refresh_task = asyncio.create_task(self._refresh_loop(), name='player-refresh')
+
+    # --- Rafraîchissement des pseudos et avatars enregistrés ---
+
+    async def _refresh_loop(self):
+        await asyncio.sleep(REFRESH_START_DELAY)
+        while True:
+            try:
+                for config in get_guild_configs(self.bot).all(): await self.refresh_identities(self.roster(config.guild_id))
+            except asyncio.CancelledError: raise
+            except Exception as e: logger.error(f"Rafraîchissement des profils joueurs interrompu: {e}", exc_info=True)
+            await asyncio.sleep(self.bot.config['PLAYER_REFRESH_INTERVAL_HOURS'] * 3600)
+
+    async def refresh_identities(self, roster: PlayerRoster) -> Counter | None:
+        """Met à jour discord_name, discord_display_name et avatar_url des joueurs enregistrés du serveur.
+
+        Les joueurs sont traités par lots : cache membres d'abord, query_members par paquets de 100 pour les
+        autres (MemberResolver.get_many). Les fiches modifiées sont remplacées en mémoire ; le fichier est écrit hors de
+        la boucle (asyncio.to_thread), au plus toutes les REFRESH_SAVE_INTERVAL secondes et en fin de balayage.
+        Le débit est limité à PLAYER_REFRESH_RATE joueurs par seconde pour rester en retrait du trafic interactif.
+        Les joueurs confirmés partis sont archivés ; en cas d'erreur de résolution, leur fiche reste en place.
+        """
+        guild = roster.config.guild
+        if not guild: return logger.error(f"Rafraîchissement des profils : serveur {roster.guild_id} introuvable.")
+        rate = self.bot.config.get('PLAYER_REFRESH_RATE') or 20
+        resolver = get_member_resolver(self.bot)
+        stats = Counter(); start = last_save = time.monotonic(); dirty = False
+        user_ids = [uid for uid in roster.data if uid.isdigit()] # Copie : des joueurs s'enregistrent pendant le balayage
+
+        for offset in range(0, len(user_ids), REFRESH_BATCH_SIZE):
+            batch = user_ids[offset:offset + REFRESH_BATCH_SIZE]
+            batch_start = time.monotonic()
+            members = await resolver.get_many(guild, [int(uid) for uid in batch])
+            changed = {}
+            for user_id, member in members.items():
+                entry = roster.data.get(str(user_id))
+                if entry is None: continue # Supprimé pendant la résolution
+                fresh = identity_fields(member)
+                if any(entry.get(key) != value for key, value in fresh.items()): changed[str(user_id)] = {**entry, **fresh}
+            if changed: roster.store_players(changed, save=False)
+            # Partis avant l'archivage au départ (ou pendant une absence du bot) : confirmés par le résolveur
+            departed = [uid for uid in batch if int(uid) not in members and resolver.is_departed(guild.id, int(uid))]
+            archived = roster.archive_players(departed, save=False)
+            stats['archived'] += archived; dirty = dirty or bool(changed or archived)
+            if dirty and time.monotonic() - last_save >= REFRESH_SAVE_INTERVAL:
+                await roster.save_player_data_async(); last_save = time.monotonic(); dirty = False
+            stats['checked'] += len(batch); stats['updated'] += len(changed); stats['absent'] += len(batch) - len(members)
+            await asyncio.sleep(max(0.0, len(batch) / rate - (time.monotonic() - batch_start)))
+        if dirty: await roster.save_player_data_async()
+
+        logger.info(f"Profils joueurs de {guild.name} rafraîchis en {time.monotonic() - start:.0f}s : {stats['checked']} vérifiés, "
+                    f"{stats['updated']} mis à jour, {stats['absent']} absents du serveur ({stats['archived']} archivés).")
+        return stats
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        roster = self.rosters.get(payload.guild_id)
+        if roster and roster.panel_message_id and payload.message_id == roster.panel_message_id:
+            roster.panel_message_id = None; await self.ensure_panel(roster)
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent):
+        roster = self.rosters.get(payload.guild_id)
+        if roster and roster.panel_message_id and roster.panel_message_id in payload.message_ids:
+            roster.panel_message_id = None; await self.ensure_panel(roster)
+
+
+    # --- Présentation publique et modification du profil ---
+
+    async def publish_presentation(self, guild: discord.Guild, user_id: str) -> discord.Message | discord.PartialMessage | None:
+        """Modifie sur place la présentation du joueur (presentation_message_id de sa fiche), ou la poste si elle n'existe pas."""
+        roster = self.roster(guild)
+        if not roster: return None
+        channel = roster.config.text_channel('PRESENTATION_CHANNEL_ID')
+        if not channel:
+            return logger.error(f"Salon présentation ({roster.config.get('PRESENTATION_CHANNEL_ID')}) introuvable/invalide.")
+        async with roster.presentation_locks(user_id):
+            entry = roster.data.get(user_id)
+            if entry is None: return None
+            embed = player_embed(entry, description=f"<@{user_id}> a terminé son enregistrement !")
+            message_id = entry.get('presentation_message_id')
+            if message_id:
+                message = channel.get_partial_message(message_id) # Un seul PATCH, sans relire le message
+                try:
+                    await message.edit(embed=embed)
+                    logger.info("Présentation de %s modifiée dans #%s", user_id, channel.name)
+                    return message
+                except discord.NotFound: logger.warning(f"Présentation de {user_id} ({message_id}) supprimée : nouvelle publication.")
+                except discord.HTTPException as e: return logger.error(f"Erreur modification présentation de {user_id}: {e}")
+            try: message = await channel.send(embed=embed)
+            except discord.HTTPException as e: return logger.error(f"Erreur envoi embed présentation: {e}")
+            roster.update_player(user_id, presentation_message_id=message.id)
+            logger.info(f"Embed présentation pour {user_id} envoyé dans #{channel.name}")
+            return message
+
+    @commands.hybrid_command(name="profil", help="Modifie votre fiche joueur (seuls les champs indiqués changent).")
+    @app_commands.guild_only()
+    @app_commands.describe(nom_joueur="Nom de joueur principal (GT/PSN/EA ID)", ancien_club="Dernier club Pro",
+                           experience="Expérience Club Pro", poste_principal="Poste principal", poste_secondaire="Poste secondaire",
+                           disponibilites="Jours séparés par des virgules (ex. Lundi, Jeudi)",
+                           competitions="Compétitions séparées par des virgules (ex. VPGF, EPL)")
+    @app_commands.choices(poste_principal=[app_commands.Choice(name=o.label, value=o.value) for o in POSITIONS],
+                          poste_secondaire=[app_commands.Choice(name=o.label, value=o.value) for o in POSITIONS_SECONDAIRE])
+    async def edit_profile(self, ctx: commands.Context, nom_joueur: str | None = None, ancien_club: str | None = None,
+                           experience: str | None = None, poste_principal: str | None = None, poste_secondaire: str | None = None,
+                           disponibilites: str | None = None, competitions: str | None = None):
+        """Écrit seulement les champs modifiés, puis met à jour la présentation existante au lieu d'en poster une nouvelle."""
+        user_id = str(ctx.author.id)
+        roster = self.roster(ctx.guild)
+        entry = roster.data.get(user_id) if roster else None
+        if entry is None: return await ctx.send("Vous n'êtes pas encore enregistré : utilisez le panneau d'enregistrement.", ephemeral=True)
+
+        changes = {'nom_joueur': nom_joueur, 'ancien_club': ancien_club, 'experience': experience}
+        changes = {key: value.strip() for key, value in changes.items() if value and value.strip()}
+        for key, value, options in (('poste_principal', poste_principal, POSITIONS), ('poste_secondaire', poste_secondaire, POSITIONS_SECONDAIRE),
+                                    ('disponibilites', disponibilites, DAYS), ('competitions_jouees', competitions, COMPETITIONS)):
+            if not value: continue
+            values = parse_choices(value, options)
+            if values is None or (key.startswith('poste') and len(values) != 1):
+                return await ctx.send(f"Valeur invalide pour {key} : « {value} ». Choix possibles : "
+                                      f"{', '.join(o.value for o in options)}.", ephemeral=True)
+            changes[key] = ", ".join(values)
+        changes = {key: value for key, value in changes.items() if entry.get(key) != value}
+        if not changes: return await ctx.send("Aucun changement à enregistrer.", ephemeral=True)
+
+        if 'nom_joueur' in changes:
+            duplicates = roster.gamertags.owners(changes['nom_joueur'], exclude=user_id)
+            if duplicates: return await ctx.send(f"Le nom de joueur **{changes['nom_joueur']}** est déjà utilisé par <@{duplicates[0]}>.", ephemeral=True)
+
+        await ctx.defer(ephemeral=True)
+        roster.update_player(user_id, **changes, **identity_fields(ctx.author))
+        logger.info(f"Profil de {ctx.author} ({user_id}) modifié : {', '.join(changes)}.")
+        message = await self.publish_presentation(ctx.guild, user_id)
+        status = "Présentation mise à jour." if message is not None else "(Erreur mise à jour de la présentation.)"
+        await ctx.send(f"✅ Profil modifié ({', '.join(changes)}). {status}", ephemeral=True)
 
-    async def _ask_question_text(self, target_channel: discord.TextChannel, author: discord.User, question: str, timeout: float = 300.0) -> str | None:
-        """Pose une question texte et attend une réponse message."""
-        # ... (code inchangé - avec suppression de la réponse) ...
-        if not isinstance(target_channel, discord.TextChannel): return None
-        message_q = await target_channel.send(f"{author.mention}, {question}")
-        try:
-            def check(message):
-                return message.author.id == author.id and message.channel.id == target_channel.id
-            response_msg = await self.bot.wait_for('message', check=check, timeout=timeout)
-            response_content = response_msg.content
-            try: await response_msg.delete(delay=1)
-            except Exception: pass
-            return response_content
-        except asyncio.TimeoutError:
-            await target_channel.send(f"{author.mention}, temps écoulé ! Annulation.", delete_after=30)
-            try: await message_q.delete(delay=30)
-            except Exception: pass
-            return None
-        except Exception as e:
-            logger.error(f"Erreur dans _ask_question_text pour {author.name}: {e}")
-            await target_channel.send(f"{author.mention}, erreur. Annulation.", delete_after=30)
-            try: await message_q.delete(delay=30)
-            except Exception: pass
-            return None
+
+    # --- Fonctions Helper pour poser les questions ---
 
     async def _ask_question_select(self, target_channel: discord.TextChannel, author: discord.User, question: str, options: list[discord.SelectOption], base_custom_id: str, min_val: int = 1, max_val: int = 1, timeout: float = 300.0) -> list[str] | None:
         """Pose une question avec un menu déroulant."""
@@ -206,8 +593,8 @@ class RegistrationCog(commands.Cog):
 
     # --- Méthode principale du flux (avec modification pour retrait de rôle) ---
 
-    async def _start_registration_flow(self, interaction_origin: discord.Interaction):
-        """Gère la conversation publique, la sauvegarde, l'ajout/retrait de rôles et la présentation."""
+    async def _start_registration_flow(self, interaction_origin: discord.Interaction, roster: PlayerRoster, answers: dict):
+        """Gère les menus publics (après le formulaire), la sauvegarde, l'ajout/retrait de rôles et la présentation."""
         author = interaction_origin.user
         guild = interaction_origin.guild
         target_channel = interaction_origin.channel
@@ -217,18 +604,15 @@ class RegistrationCog(commands.Cog):
              await interaction_origin.followup.send("Impossible de démarrer l'enregistrement dans ce type de salon.", ephemeral=True)
              return
 
-        responses = {}
+        responses = dict(answers) # nom_joueur, ancien_club, experience (formulaire)
         logger.info(f"Début flux enregistrement public pour {author.name} dans #{target_channel.name}")
         start_message = None
 
         try:
-            start_message = await target_channel.send(f"--- Début de l'enregistrement pour {author.mention} (Répondez aux questions suivantes) ---")
+            start_message = await target_channel.send(f"--- Début de l'enregistrement pour {author.mention} (Choisissez dans les menus suivants) ---")
             session_id_prefix = f"reg_{author.id}" # Simplifié, timestamp pas forcément utile si on gère bien les vues
 
-            # --- Poser les questions ---
-            responses['nom_joueur'] = await self._ask_question_text(target_channel, author, "Quel est votre nom de joueur principal (GT/PSN/EA ID) ?")
-            if responses['nom_joueur'] is None: raise asyncio.CancelledError("Timeout/Erreur Nom Joueur")
-
+            # --- Poser les questions (les réponses texte viennent du formulaire) ---
             poste_principal_result = await self._ask_question_select(target_channel, author, "Poste principal ?", POSITIONS, f"{session_id_prefix}_poste1", max_val=1)
             if poste_principal_result is None: raise asyncio.CancelledError("Timeout/Erreur Poste Principal")
             responses['poste_principal'] = poste_principal_result[0]
@@ -241,16 +625,10 @@ class RegistrationCog(commands.Cog):
             if dispo_result is None: raise asyncio.CancelledError("Timeout/Erreur Disponibilités")
             responses['disponibilites'] = ", ".join(dispo_result)
 
-            responses['ancien_club'] = await self._ask_question_text(target_channel, author, "Dernier club Pro ? (Ou 'Aucun')")
-            if responses['ancien_club'] is None: raise asyncio.CancelledError("Timeout/Erreur Ancien Club")
-
             compets_result = await self._ask_question_select(target_channel, author, "Compétitions jouées ? (Plusieurs choix possibles)", COMPETITIONS, f"{session_id_prefix}_compets", max_val=len(COMPETITIONS))
             if compets_result is None: raise asyncio.CancelledError("Timeout/Erreur Compétitions")
             responses['competitions_jouees'] = ", ".join(compets_result)
 
-            responses['experience'] = await self._ask_question_text(target_channel, author, "Décrivez votre expérience Club Pro (Divisions, style jeu, années...) :")
-            if responses['experience'] is None: raise asyncio.CancelledError("Timeout/Erreur Expérience")
-
             if start_message:
                 try: await start_message.delete()
                 except Exception: pass
@@ -273,47 +651,13 @@ class RegistrationCog(commands.Cog):
 
         # --- Finalisation et Actions Post-Enregistrement ---
         responses['discord_id'] = author.id
-        responses['discord_name'] = str(author)
-        responses['discord_display_name'] = author.display_name
-        responses['avatar_url'] = str(author.avatar.url) if author.avatar else None
+        responses.update(identity_fields(author))
 
-        self.player_data[str(author.id)] = responses
-        self.save_player_data()
+        roster.store_player(str(author.id), responses)
         logger.info(f"Joueur enregistré (public) : {author.name} ({author.id}) - Données sauvegardées.")
 
-        # --- Création Embed Présentation ---
-        # ... (code de l'embed inchangé) ...
-        presentation_embed = discord.Embed(
-            title=f"✨ Présentation : {author.display_name} ✨",
-            description=f"{author.mention} a terminé son enregistrement !",
-            color=discord.Color.from_rgb(0, 153, 255)
-        )
-        if responses['avatar_url']:
-            presentation_embed.set_thumbnail(url=responses['avatar_url'])
-        presentation_embed.add_field(name="Nom Joueur", value=responses.get('nom_joueur', 'N/A'), inline=False)
-        presentation_embed.add_field(name="Poste Principal", value=responses.get('poste_principal', 'N/A'), inline=True)
-        presentation_embed.add_field(name="Poste Secondaire", value=responses.get('poste_secondaire', 'N/A'), inline=True)
-        presentation_embed.add_field(name="Disponibilités", value=responses.get('disponibilites', 'N/A'), inline=False)
-        presentation_embed.add_field(name="Ancien Club", value=responses.get('ancien_club', 'N/A'), inline=True)
-        presentation_embed.add_field(name="Compétitions Jouées", value=responses.get('competitions_jouees', 'N/A'), inline=False)
-        presentation_embed.add_field(name="Expérience Détail", value=responses.get('experience', 'N/A'), inline=False)
-        presentation_embed.set_footer(text=f"ID: {author.id}")
-        presentation_embed.timestamp = discord.utils.utcnow()
-
-
-        # --- Envoi dans #présentations ---
-        presentation_channel_sent = False
-        presentation_channel_id = self.bot.config.get('PRESENTATION_CHANNEL_ID')
-        if presentation_channel_id:
-            presentation_channel = guild.get_channel(presentation_channel_id)
-            if presentation_channel and isinstance(presentation_channel, discord.TextChannel):
-                try:
-                    await presentation_channel.send(embed=presentation_embed)
-                    presentation_channel_sent = True
-                    logger.info(f"Embed présentation pour {author.name} envoyé dans #{presentation_channel.name}")
-                except Exception as e: logger.error(f"Erreur envoi embed présentation: {e}")
-            else: logger.error(f"Salon présentation ({presentation_channel_id}) introuvable/invalide.")
-        else: logger.warning("PRESENTATION_CHANNEL_ID non configuré.")
+        # --- Présentation dans #présentations : postée par l'abonné du bus, les rôles n'attendent pas ---
+        await get_event_bus(self.bot).publish(PlayerRegistered(guild.id, member=author, entry=responses))
 
 
         # !!! DEBUT DE LA MODIFICATION : GESTION DES ROLES !!!
@@ -322,12 +666,12 @@ class RegistrationCog(commands.Cog):
         test_role_name = "Non défini (Test)"
         verified_role_name = "Non défini (Vérifié)"
 
-        test_role_id = self.bot.config.get('JOUEUR_TEST_ROLE_ID')
-        verified_role_id = self.bot.config.get('VERIFIED_PLAYER_ROLE_ID') # ID du rôle à retirer
+        test_role_id = roster.config.get('JOUEUR_TEST_ROLE_ID')
+        verified_role_id = roster.config.get('VERIFIED_PLAYER_ROLE_ID') # ID du rôle à retirer
 
         # Récupérer les objets Rôle
-        test_role = guild.get_role(test_role_id) if test_role_id else None
-        verified_role = guild.get_role(verified_role_id) if verified_role_id else None
+        test_role = roster.config.role('JOUEUR_TEST_ROLE_ID')
+        verified_role = roster.config.role('VERIFIED_PLAYER_ROLE_ID')
 
         if not test_role:
             logger.error(f"Rôle Joueur Test ({test_role_id}) introuvable ou non configuré.")
@@ -370,8 +714,7 @@ class RegistrationCog(commands.Cog):
 
         # --- Message de confirmation final (adapté) ---
         final_confirm_msg_text = f"✅ Enregistrement terminé, {author.mention} !"
-        if presentation_channel_sent: final_confirm_msg_text += " Votre présentation a été postée."
-        else: final_confirm_msg_text += " (Erreur publication présentation)."
+        final_confirm_msg_text += " Votre présentation va être publiée."
 
         if test_role_assigned:
             final_confirm_msg_text += f" Le rôle '{test_role_name}' attribué."
@@ -390,16 +733,16 @@ class RegistrationCog(commands.Cog):
 
         # --- Nettoyage du salon ---
         logger.info(f"Tentative nettoyage {target_channel.name} pour {author.name}")
-        await asyncio.sleep(10)
+        await asyncio.sleep(CLEANUP_DELAY)
 
-        def always_true_check(message): return True # Défini ici pour être sûr
+        def not_panel_check(message): return message.id != roster.panel_message_id and not message.pinned # Le panneau reste
 
         try:
             if final_msg_confirm:
                 try: await final_msg_confirm.delete()
                 except Exception: pass
 
-            deleted_messages = await target_channel.purge(limit=200, check=always_true_check, bulk=True)
+            deleted_messages = await target_channel.purge(limit=200, check=not_panel_check, bulk=True)
             logger.info(f"{len(deleted_messages)} messages purgés dans {target_channel.name}.")
             await target_channel.send("Nettoyage automatique terminé.", delete_after=10)
         except discord.Forbidden:
@@ -421,7 +764,7 @@ async def setup(bot: commands.Bot):
             with open(PLAYER_DATA_FILE, 'w', encoding='utf-8') as f: json.dump({}, f)
         except Exception as e: logger.error(f"Impossible de créer {PLAYER_DATA_FILE}: {e}")
 
-    # Charger le Cog (La vue est enregistrée dans main.py/on_ready maintenant)
+    # Charger le Cog ; la vue persistante est enregistrée une seule fois par PurEsportBot.setup_hook
     await bot.add_cog(RegistrationCog(bot))
-    logger.info("Cog Registration chargé.")
-    # Note: L'enregistrement de la vue persistante est déplacé dans main.py pour plus de sûreté
\ No newline at end of file
+    get_view_registry(bot).contribute('RegistrationView', RegistrationView)
+    logger.info("Cog Registration chargé.")
\ No newline at end of file
@@ -0,0 +1,235 @@
+# cogs/role_migration.py
+import discord
+from discord.ext import commands
+from discord import app_commands
+import logging
+import asyncio
+import json
+import os
+import re
+import time
+from collections import Counter
+from utils.audit import get_audit_log
+from utils.guilds import admin_only, guild_config
+from utils.members import get_member_resolver
+from utils.ratelimit import RateBudget
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_FILE = 'data/role_migration.json' # Migration en cours (reprise après redémarrage)
+MANAGED_ROLE_KEYS = ('VERIFIED_PLAYER_ROLE_ID', 'JOUEUR_TEST_ROLE_ID', 'JOUEUR_CLUB_ROLE_ID') # Rôles remplacés par la cible
+MIGRATION_RATE = 5.0 # Membres modifiés par seconde
+MIGRATION_BURST = 5
+MIGRATION_WORKERS = 5
+CHECKPOINT_INTERVAL = 2.0 # Secondes minimum entre deux écritures du point de reprise
+PROGRESS_INTERVAL = 5.0   # Secondes minimum entre deux éditions du message de progression
+_ID = re.compile(r'\d{15,21}')
+
+
+def parse_player_filters(text: str) -> dict[str, str]:
+    """'joueurs:poste_principal=DC,competitions_jouees=VPGF' -> {'poste_principal': 'DC', 'competitions_jouees': 'VPGF'}."""
+    filters = {}
+    for part in text.partition(':')[2].split(','):
+        key, _, value = part.partition('=')
+        if key.strip() and value.strip(): filters[key.strip()] = value.strip().lower()
+    return filters
+
+
+def player_matches(entry: dict, filters: dict[str, str]) -> bool:
+    """Chaque filtre doit correspondre ; les champs à choix multiples ('Lundi, Mardi') correspondent à l'un des choix."""
+    for key, wanted in filters.items():
+        choices = [c.strip().lower() for c in str(entry.get(key, '')).split(',')]
+        if wanted not in choices: return False
+    return True
+
+
+class RoleMigrationCog(commands.Cog, name="RoleMigration"):
+    """Migration de rôles en masse (changements de saison) : ajout/retrait ciblés par membre, sous budget,
+    avec point de reprise sur disque et mode simulation."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self._task: asyncio.Task | None = None
+
+    async def cog_unload(self):
+        if self._task: self._task.cancel() # Le point de reprise reste sur disque
+
+    # --- Sélection et calcul ---
+    def managed_roles(self, guild: discord.Guild, target: list[discord.Role]) -> set[int]:
+        config = guild_config(self.bot, guild)
+        return {role.id for key in MANAGED_ROLE_KEYS if config and (role := config.role(key))} | {r.id for r in target}
+
+    async def select_members(self, guild: discord.Guild, source: str) -> tuple[list[discord.Member], str]:
+        """Membres désignés par `source` : mention/ID de rôle, ou 'joueurs[:champ=valeur,...]' (joueurs enregistrés)."""
+        resolver = get_member_resolver(self.bot)
+        if source.lower().startswith('joueurs'):
+            registration_cog = self.bot.get_cog('RegistrationCog')
+            roster = registration_cog.roster(guild) if registration_cog else None
+            if not roster: raise commands.BadArgument("RegistrationCog non chargé : joueurs enregistrés indisponibles.")
+            filters = parse_player_filters(source)
+            ids = [int(uid) for uid, entry in roster.data.items() if uid.isdigit() and player_matches(entry, filters)]
+            members = await resolver.get_many(guild, ids)
+            label = "joueurs enregistrés" + (f" ({', '.join(f'{k}={v}' for k, v in filters.items())})" if filters else "")
+            return list(members.values()), label
+        match = _ID.search(source)
+        role = guild.get_role(int(match.group())) if match else discord.utils.get(guild.roles, name=source.strip())
+        if not role: raise commands.BadArgument(f"Source inconnue : {source} (rôle, ou joueurs:champ=valeur).")
+        return await resolver.role_members(guild, role), f"rôle {role.name}"
+
+    def parse_target(self, guild: discord.Guild, text: str) -> list[discord.Role]:
+        """Rôles cibles (mentions, IDs ou noms séparés par des virgules) ; 'aucun' = retirer les rôles gérés."""
+        if text.strip().lower() in ('aucun', 'none', ''): return []
+        ids = _ID.findall(text)
+        roles = [guild.get_role(int(i)) for i in ids] if ids else [discord.utils.get(guild.roles, name=n.strip()) for n in text.split(',')]
+        if not all(roles): raise commands.BadArgument(f"Rôle cible introuvable dans : {text}")
+        if any(r >= guild.me.top_role or r.managed for r in roles): raise commands.BadArgument("Un rôle cible est au-dessus du bot ou géré par une intégration.")
+        return roles
+
+    @staticmethod
+    def role_delta(member: discord.Member, managed: set[int], target_ids: set[int]) -> tuple[list[discord.Role], list[discord.Role]] | None:
+        """(à ajouter, à retirer) pour remplacer les rôles gérés par la cible, ou None si rien ne change.
+        Jamais de liste complète : le membre peut venir du cache du résolveur et effacerait un rôle récent."""
+        current = {r.id for r in member.roles}
+        to_add = [r for rid in target_ids if rid not in current and (r := member.guild.get_role(rid))]
+        to_remove = [r for r in member.roles if r.id in managed and r.id not in target_ids]
+        return (to_add, to_remove) if to_add or to_remove else None
+
+    # --- Exécution ---
+    def _save_checkpoint(self, job: dict | None):
+        try:
+            if job is None:
+                if os.path.exists(CHECKPOINT_FILE): os.remove(CHECKPOINT_FILE)
+                return
+            os.makedirs(os.path.dirname(CHECKPOINT_FILE), exist_ok=True)
+            with open(f"{CHECKPOINT_FILE}.tmp", 'w', encoding='utf-8') as f: json.dump(job, f)
+            os.replace(f"{CHECKPOINT_FILE}.tmp", CHECKPOINT_FILE) # Jamais de point de reprise à moitié écrit
+        except OSError as e: logger.error(f"Écriture du point de reprise {CHECKPOINT_FILE} impossible: {e}")
+
+    def _load_checkpoint(self) -> dict | None:
+        try:
+            with open(CHECKPOINT_FILE, 'r', encoding='utf-8') as f: return json.load(f)
+        except FileNotFoundError: return None
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Point de reprise {CHECKPOINT_FILE} illisible: {e}"); return None
+
+    async def run_job(self, guild: discord.Guild, job: dict, progress: discord.Message | None = None) -> Counter:
+        """Applique la migration aux membres `job['pending']` ; le point de reprise suit l'avancement."""
+        managed, target_ids = set(job['managed']), set(job['target'])
+        stats = Counter(job.get('stats') or {})
+        pending = list(job['pending']); done: set[int] = set()
+        budget = RateBudget(MIGRATION_RATE, burst=MIGRATION_BURST, concurrency=MIGRATION_WORKERS)
+        queue: asyncio.Queue = asyncio.Queue()
+        members = await get_member_resolver(self.bot).get_many(guild, pending)
+        stats['departed'] += len(pending) - len(members)
+        for member in members.values(): queue.put_nowait(member)
+        last_save = last_edit = time.monotonic()
+
+        def checkpoint(final: bool = False):
+            job['pending'] = [] if final else [uid for uid in pending if uid not in done and uid in members]
+            job['stats'] = dict(stats)
+            self._save_checkpoint(None if final else job)
+
+        async def report(final: bool = False):
+            nonlocal last_edit
+            if not progress or (not final and time.monotonic() - last_edit < PROGRESS_INTERVAL): return
+            last_edit = time.monotonic()
+            text = (f"{'✅' if final else '⏳'} Migration des rôles ({job['label']}) : {stats['changed']} modifiés, "
+                    f"{stats['unchanged']} déjà à jour, {stats['departed']} partis, {stats['errors']} erreurs"
+                    f" — {len(done)}/{len(members)}.")
+            try: await progress.edit(content=text)
+            except discord.HTTPException as e: logger.warning(f"Édition progression migration impossible: {e}")
+
+        async def worker():
+            nonlocal last_save
+            while True:
+                try: member = queue.get_nowait()
+                except asyncio.QueueEmpty: return
+                delta = self.role_delta(member, managed, target_ids)
+                if delta is None: stats['unchanged'] += 1
+                else:
+                    to_add, to_remove = delta; reason = f"Migration de rôles par {job['author']}"
+                    async with budget:
+                        try:
+                            if to_add: await member.add_roles(*to_add, reason=reason)
+                            if to_remove: await member.remove_roles(*to_remove, reason=reason)
+                            stats['changed'] += 1
+                        except discord.HTTPException as e:
+                            stats['errors'] += 1; logger.warning(f"Migration : rôles de {member} non modifiés ({e}).")
+                done.add(member.id)
+                if time.monotonic() - last_save >= CHECKPOINT_INTERVAL:
+                    last_save = time.monotonic(); checkpoint()
+                    logger.info(f"Migration des rôles : {len(done)}/{len(members)} traités ({dict(stats)}).")
+                await report()
+
+        await asyncio.gather(*(worker() for _ in range(MIGRATION_WORKERS)))
+        checkpoint(final=True)
+        await report(final=True)
+        logger.info(f"Migration des rôles ({job['label']}) terminée : {dict(stats)}.")
+        embed = discord.Embed(title="🔁 Migration des rôles terminée", color=discord.Color.orange(), timestamp=discord.utils.utcnow(),
+                              description=f"{job['label']} → {', '.join(f'<@&{rid}>' for rid in job['target']) or 'aucun'} (par {job['author']})")
+        embed.add_field(name="Résultat", value=f"{stats['changed']} modifiés, {stats['unchanged']} déjà à jour, "
+                                               f"{stats['departed']} partis, {stats['errors']} erreurs", inline=False)
+        get_audit_log(self.bot).log(guild, embed)
+        return stats
+
+    def _start(self, guild: discord.Guild, job: dict, progress: discord.Message | None):
+        self._task = asyncio.create_task(self.run_job(guild, job, progress), name='role-migration')
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """Reprend une migration interrompue (redémarrage, crash) là où le point de reprise s'est arrêté."""
+        if self._task and not self._task.done(): return
+        job = self._load_checkpoint()
+        if not job or not job.get('pending'): return
+        guild = self.bot.get_guild(job['guild_id'])
+        if not guild: return logger.error(f"Migration interrompue : serveur {job['guild_id']} introuvable.")
+        logger.info(f"Reprise de la migration des rôles ({job['label']}) : {len(job['pending'])} membres restants.")
+        channel = guild.get_channel(job.get('channel_id') or 0)
+        progress = None
+        if isinstance(channel, discord.abc.Messageable):
+            try: progress = await channel.send(f"⏳ Reprise de la migration des rôles ({job['label']}) : {len(job['pending'])} membres restants.")
+            except discord.HTTPException: pass
+        self._start(guild, job, progress)
+
+    # --- Commande ---
+    @commands.hybrid_command(name="migrateroles", help="Migre les rôles joueurs en masse (source -> rôles cibles).")
+    @admin_only
+    @app_commands.guild_only()
+    @app_commands.describe(source="Rôle, ou joueurs[:champ=valeur,...] (joueurs enregistrés)",
+                           cible="Rôles joueurs après migration (séparés par des virgules, ou 'aucun')",
+                           simulation="Compter seulement, sans rien modifier")
+    async def migrate_roles(self, ctx: commands.Context, source: str, cible: str, simulation: bool = False):
+        """Remplace les rôles joueurs gérés (Vérifié, Joueur Test, Joueur Club et la cible) des membres sélectionnés."""
+        await ctx.defer(ephemeral=simulation)
+        if self._task and not self._task.done(): return await ctx.send("Une migration est déjà en cours.")
+        try:
+            target = self.parse_target(ctx.guild, cible)
+            members, label = await self.select_members(ctx.guild, source)
+        except commands.BadArgument as e: return await ctx.send(f"Erreur : {e}")
+        managed, target_ids = self.managed_roles(ctx.guild, target), {r.id for r in target}
+        members = [m for m in members if not m.bot]
+
+        if simulation:
+            transitions = Counter()
+            for member in members:
+                if self.role_delta(member, managed, target_ids) is None: transitions['déjà à jour'] += 1; continue
+                before = ', '.join(r.name for r in member.roles if r.id in managed) or 'aucun'
+                transitions[f"{before} → {', '.join(r.name for r in target) or 'aucun'}"] += 1
+            lines = "\n".join(f"• {name} : {count}" for name, count in transitions.most_common(15))
+            changes = len(members) - transitions['déjà à jour']
+            return await ctx.send(f"🔎 Simulation ({label}) : {len(members)} membres, {changes} à modifier"
+                                  f" (~{changes / MIGRATION_RATE:.0f}s).\n{lines}")
+
+        job = {'guild_id': ctx.guild.id, 'channel_id': ctx.channel.id, 'author': str(ctx.author), 'label': label,
+               'managed': sorted(managed), 'target': sorted(target_ids), 'pending': [m.id for m in members], 'stats': {}}
+        self._save_checkpoint(job)
+        logger.info(f"Migration des rôles par {ctx.author} : {label} -> {[r.name for r in target]} ({len(members)} membres).")
+        progress = await ctx.send(f"⏳ Migration des rôles ({label}) : 0/{len(members)}.")
+        self._start(ctx.guild, job, progress)
+
+
+async def setup(bot: commands.Bot):
+    missing = [key for key in ('GUILD_ID', 'ADMIN_ROLE_ID', *MANAGED_ROLE_KEYS) if not bot.config.get(key)]
+    if missing: logger.warning(f"Config manquante pour RoleMigrationCog: {', '.join(missing)}.")
+    await bot.add_cog(RoleMigrationCog(bot))
+    logger.info("Cog RoleMigration chargé.")
@@ -0,0 +1,63 @@
+# cogs/roster_export.py
+import discord
+from discord.ext import commands
+from discord import app_commands
+import logging
+import asyncio
+import tempfile
+import time
+from typing import Literal
+from utils.export import roster_rows, write_export_parts
+from .evaluation import staff_only
+
+logger = logging.getLogger(__name__)
+
+FILE_SIZE_RATIO = 0.95 # Part de la limite d'upload du serveur utilisée par fichier
+
+
+class RosterExportCog(commands.Cog, name="RosterExport"):
+    """Export de la liste des joueurs enregistrés (CSV ou JSON Lines compressés), généré hors de la boucle."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    @commands.hybrid_command(name="export", help="Exporte les joueurs enregistrés (csv ou jsonl, gzip), filtres optionnels.")
+    @staff_only
+    @app_commands.guild_only()
+    @app_commands.describe(format="csv (tableur) ou jsonl", poste="Poste principal ou secondaire (ex. DC)",
+                           jour="Disponibilité (ex. Lundi)", competition="Compétition jouée (ex. VPGF)")
+    async def export(self, ctx: commands.Context, format: Literal['csv', 'jsonl'] = 'csv', poste: str | None = None,
+                     jour: str | None = None, competition: str | None = None):
+        """Génère l'export dans un thread (fichiers temporaires gzip) puis l'envoie en pièces jointes."""
+        await ctx.defer(ephemeral=True)
+        registration_cog = self.bot.get_cog('RegistrationCog')
+        roster = registration_cog.roster(ctx.guild) if registration_cog else None
+        if not roster: return await ctx.send("Erreur : RegistrationCog non chargé.", ephemeral=True)
+        # Copie des références seulement : chaque joueur est remplacé (jamais modifié en place) par RegistrationCog
+        entries = list(roster.data.items())
+        max_bytes = int(ctx.guild.filesize_limit * FILE_SIZE_RATIO)
+        filters = ", ".join(f"{name}={value}" for name, value in (('poste', poste), ('jour', jour), ('competition', competition)) if value)
+        start = time.perf_counter()
+
+        with tempfile.TemporaryDirectory(prefix='export-') as directory:
+            rows = roster_rows(entries, position=poste, day=jour, competition=competition)
+            try:
+                parts = await asyncio.to_thread(write_export_parts, rows, format, directory, 'joueurs', max_bytes)
+            except OSError as e:
+                logger.error(f"Export des joueurs impossible: {e}", exc_info=True)
+                return await ctx.send("Erreur lors de la génération de l'export.", ephemeral=True)
+            total = sum(count for _, count in parts)
+            logger.info(f"Export {format} par {ctx.author} ({filters or 'sans filtre'}) : {total} joueurs, "
+                        f"{len(parts)} fichier(s) en {time.perf_counter() - start:.2f}s.")
+            if not parts: return await ctx.send(f"Aucun joueur ne correspond ({filters or 'sans filtre'}).", ephemeral=True)
+            for index, (path, count) in enumerate(parts, start=1):
+                label = f" — partie {index}/{len(parts)}" if len(parts) > 1 else ""
+                try: await ctx.send(f"📄 {count} joueurs{label} ({filters or 'sans filtre'}).", file=discord.File(path), ephemeral=True) # Données personnelles : jamais publiques
+                except discord.HTTPException as e:
+                    logger.error(f"Envoi de l'export (partie {index}) impossible: {e}")
+                    return await ctx.send(f"Erreur lors de l'envoi de la partie {index}.", ephemeral=True)
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(RosterExportCog(bot))
+    logger.info("Cog RosterExport chargé.")
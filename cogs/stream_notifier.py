@@ -3,9 +3,23 @@ import discord
 from discord.ext import commands
 import logging
 import datetime
+from utils.members import get_member_resolver
+from utils.guilds import guild_config
+from utils.events import StreamStarted, get_event_bus
 
 logger = logging.getLogger(__name__)
 
+STREAM_PLATFORMS = ("twitch", "youtube")
+
+
+def find_stream_activity(activities) -> discord.Streaming | None:
+    """Premier stream Twitch/YouTube parmi les activités (platform peut être None parfois)."""
+    for activity in activities:
+        if isinstance(activity, discord.Streaming) and activity.platform and activity.platform.lower() in STREAM_PLATFORMS:
+            return activity
+    return None
+
+
 class StreamNotifierCog(commands.Cog, name="StreamNotifier"):
     """Cog pour annoncer les streams des membres ayant un rôle spécifique."""
 
@@ -13,38 +27,43 @@ class StreamNotifierCog(commands.Cog, name="StreamNotifier"):
         self.bot = bot
         # Utiliser un set pour garder en mémoire les membres qui sont déjà notifiés comme étant en live
         # pour éviter les notifications répétées lors de petites fluctuations de statut.
-        self.currently_live = set()
+        self.currently_live = set() # (guild_id, user_id) : un même membre peut streamer sur plusieurs serveurs suivis
+        # En mode cache léger, seules les présences brutes sont reçues (membres hors cache)
+        self.lean = bool(self.bot.config.get('LEAN_MEMBER_CACHE'))
+
+    async def cog_load(self):
+        # Annonce hors du listener de présence ; file pleine (rafale de lives) : les plus anciennes sont abandonnées
+        self._subscription = get_event_bus(self.bot).subscribe(StreamStarted, self.post_announcement, name='stream_announce')
+
+    async def cog_unload(self):
+        get_event_bus(self.bot).unsubscribe(self._subscription)
 
     @commands.Cog.listener()
     async def on_presence_update(self, before: discord.Member, after: discord.Member):
         """Déclenché quand le statut/activité d'un membre change."""
+        if self.lean: return # Traité par on_raw_presence_update
 
-        # 1. Vérifier si c'est le bon serveur
-        guild_id = self.bot.config.get('GUILD_ID')
-        if not guild_id or after.guild.id != guild_id:
+        # 1. Vérifier que le serveur est servi
+        config = guild_config(self.bot, after.guild)
+        if not config:
             return
 
-        # 2. Récupérer les IDs de config nécessaires
-        streamer_role_id = self.bot.config.get('STREAM_WATCH_ROLE_ID')
-        announce_channel_id = self.bot.config.get('STREAM_ANNOUNCE_CHANNEL_ID')
-        ping_role_id = self.bot.config.get('STREAM_PING_ROLE_ID') # Optionnel
-
-        # Si la config de base manque, on ne peut rien faire
-        if not streamer_role_id or not announce_channel_id:
-            # logger.debug("Config stream manquante (rôle à suivre ou salon annonce)") # Log trop verbeux peut-être
+        # 2. Si la config de base manque (rôle à suivre ou salon annonce), on ne peut rien faire
+        if not config.get('STREAM_WATCH_ROLE_ID') or not config.get('STREAM_ANNOUNCE_CHANNEL_ID'):
             return
 
-        # 3. Récupérer l'objet rôle à suivre
-        streamer_role = after.guild.get_role(streamer_role_id)
+        # 3. Récupérer l'objet rôle à suivre (résolu une fois par serveur)
+        streamer_role = config.role('STREAM_WATCH_ROLE_ID')
         if not streamer_role:
             # logger.warning(f"Rôle à suivre ({streamer_role_id}) introuvable.") # Log une seule fois peut-être dans setup?
             return
 
         # 4. Vérifier si le membre a le rôle requis
+        live_key = (after.guild.id, after.id)
         if streamer_role not in after.roles:
             # Si le membre n'a plus le rôle et était en live, on le retire du suivi
-            if after.id in self.currently_live:
-                self.currently_live.remove(after.id)
+            if live_key in self.currently_live:
+                self.currently_live.remove(live_key)
                 # logger.debug(f"{after.name} n'a plus le rôle streamer, retiré du suivi live.")
             return
 
@@ -53,55 +72,82 @@ class StreamNotifierCog(commands.Cog, name="StreamNotifier"):
         streaming_after = any(isinstance(activity, discord.Streaming) for activity in after.activities)
 
         # Cas 1: Le membre commence à streamer et n'était pas notifié avant
-        if not streaming_before and streaming_after and after.id not in self.currently_live:
-            # Trouver l'activité de streaming
-            stream_activity = None
-            for activity in after.activities:
-                if isinstance(activity, discord.Streaming):
-                    # On vérifie si c'est Twitch ou YouTube (platform peut être None parfois)
-                    if activity.platform and activity.platform.lower() in ["twitch", "youtube"]:
-                         stream_activity = activity
-                         break # On prend le premier stream Twitch/YouTube trouvé
-
+        if not streaming_before and streaming_after and live_key not in self.currently_live:
+            stream_activity = find_stream_activity(after.activities)
             if stream_activity:
-                # Ajouter au suivi pour éviter double notif
-                self.currently_live.add(after.id)
-                logger.info(f"Stream détecté pour {after.name} ({after.id}) sur {stream_activity.platform}: {stream_activity.name} ({stream_activity.url})")
-
-                # Envoyer l'annonce
-                announce_channel = after.guild.get_channel(announce_channel_id)
-                if announce_channel and isinstance(announce_channel, discord.TextChannel):
-                    ping_role = after.guild.get_role(ping_role_id) if ping_role_id else None
-                    ping_mention = ping_role.mention if ping_role else ""
-
-                    embed = discord.Embed(
-                        title=f"🔴 {after.display_name} est en live !",
-                        description=f"**{stream_activity.name}**\n{stream_activity.details if stream_activity.details else 'Regardez maintenant !'}",
-                        url=stream_activity.url,
-                        color=discord.Color.purple() if stream_activity.platform.lower() == "twitch" else discord.Color.red(), # Couleur différente pour Twitch/YT
-                        timestamp=discord.utils.utcnow()
-                    )
-                    embed.set_thumbnail(url=after.display_avatar.url)
-                    # Ajouter le nom du jeu si disponible et différent du titre du stream
-                    if stream_activity.game and stream_activity.game != stream_activity.name:
-                         embed.add_field(name="Jeu", value=stream_activity.game, inline=False)
-
-                    embed.set_footer(text=f"Plateforme: {stream_activity.platform}")
-
-                    try:
-                        await announce_channel.send(content=ping_mention, embed=embed)
-                        logger.info(f"Annonce envoyée pour le live de {after.name}")
-                    except Exception as e:
-                        logger.error(f"Erreur envoi annonce live {after.name}: {e}")
-                else:
-                     logger.error(f"Salon d'annonce stream ({announce_channel_id}) introuvable/invalide.")
+                await self._announce_stream(after, stream_activity)
 
         # Cas 2: Le membre arrête de streamer (ou son activité change) et il était suivi
-        elif streaming_before and not streaming_after and after.id in self.currently_live:
-             self.currently_live.remove(after.id)
-             logger.info(f"Stream terminé (ou plus détecté) pour {after.name} ({after.id}). Retiré du suivi.")
+        elif streaming_before and not streaming_after and live_key in self.currently_live:
+             self.currently_live.remove(live_key)
+             logger.info("Stream terminé (ou plus détecté) pour %s (%s). Retiré du suivi.", after.name, after.id)
              # On pourrait envoyer un message "Live terminé" mais ça peut être spammy
 
+    @commands.Cog.listener()
+    async def on_raw_presence_update(self, payload: discord.RawPresenceUpdateEvent):
+        """Mode cache léger : aucune donnée d'activité n'est gardée, sauf l'ID des membres suivis en live."""
+        if not self.lean: return
+        config = guild_config(self.bot, payload.guild_id)
+        if not config: return
+        live_key = (payload.guild_id, payload.user_id)
+        stream_activity = find_stream_activity(payload.activities)
+        if not stream_activity:
+            if live_key in self.currently_live:
+                self.currently_live.discard(live_key)
+                logger.info("Stream terminé (ou plus détecté) pour %s. Retiré du suivi.", payload.user_id)
+            return
+        if live_key in self.currently_live or not payload.guild: return
+
+        # Début de stream : seul cas où l'on résout le membre (cache, puis REST avec cache TTL)
+        streamer_role_id = config.get('STREAM_WATCH_ROLE_ID')
+        if not streamer_role_id or not config.get('STREAM_ANNOUNCE_CHANNEL_ID'): return
+        # Réservé avant la résolution : une mise à jour suivante ne doit pas annoncer une seconde fois
+        self.currently_live.add(live_key)
+        member = await get_member_resolver(self.bot).get(payload.guild, payload.user_id)
+        if live_key not in self.currently_live: return # Stream terminé pendant la résolution
+        if member and member.get_role(streamer_role_id):
+            await self._announce_stream(member, stream_activity)
+        else: self.currently_live.discard(live_key)
+
+    async def _announce_stream(self, member: discord.Member, stream_activity: discord.Streaming):
+        """Ajoute le membre au suivi live et publie StreamStarted (l'annonce est postée par l'abonné)."""
+        # Ajouter au suivi pour éviter double notif
+        self.currently_live.add((member.guild.id, member.id))
+        logger.info("Stream détecté pour %s (%s) sur %s: %s (%s)", member.name, member.id, stream_activity.platform, stream_activity.name, stream_activity.url)
+        await get_event_bus(self.bot).publish(StreamStarted(member.guild.id, member=member, activity=stream_activity))
+
+    async def post_announcement(self, event: StreamStarted):
+        """Abonné du bus : poste l'annonce du live dans STREAM_ANNOUNCE_CHANNEL_ID."""
+        member, stream_activity = event.member, event.activity
+        config = guild_config(self.bot, event.guild_id)
+        if not config or (event.guild_id, member.id) not in self.currently_live: return # Live terminé entre-temps
+        announce_channel = config.text_channel('STREAM_ANNOUNCE_CHANNEL_ID')
+        if announce_channel:
+            ping_role = config.role('STREAM_PING_ROLE_ID') # Optionnel
+            ping_mention = ping_role.mention if ping_role else ""
+
+            embed = discord.Embed(
+                title=f"🔴 {member.display_name} est en live !",
+                description=f"**{stream_activity.name}**\n{stream_activity.details if stream_activity.details else 'Regardez maintenant !'}",
+                url=stream_activity.url,
+                color=discord.Color.purple() if stream_activity.platform.lower() == "twitch" else discord.Color.red(), # Couleur différente pour Twitch/YT
+                timestamp=discord.utils.utcnow()
+            )
+            embed.set_thumbnail(url=member.display_avatar.url)
+            # Ajouter le nom du jeu si disponible et différent du titre du stream
+            if stream_activity.game and stream_activity.game != stream_activity.name:
+                 embed.add_field(name="Jeu", value=stream_activity.game, inline=False)
+
+            embed.set_footer(text=f"Plateforme: {stream_activity.platform}")
+
+            try:
+                await announce_channel.send(content=ping_mention, embed=embed)
+                logger.info("Annonce envoyée pour le live de %s", member.name)
+            except Exception as e:
+                logger.error(f"Erreur envoi annonce live {member.name}: {e}")
+        else:
+             logger.error(f"Salon d'annonce stream ({config.get('STREAM_ANNOUNCE_CHANNEL_ID')}) introuvable/invalide.")
+
 
 # Fonction setup
 async def setup(bot: commands.Bot):
@@ -113,4 +159,4 @@ async def setup(bot: commands.Bot):
     else: logger.info("Configuration nécessaire pour StreamNotifierCog trouvée.")
 
     await bot.add_cog(StreamNotifierCog(bot))
-    logger.info("Cog StreamNotifier chargé.")
\ No newline at end of file
+    logger.info("Cog StreamNotifier chargé.")
@@ -5,6 +5,12 @@ from discord import ui, utils, app_commands
 import logging
 import asyncio
 import re # Pour nettoyer les noms de salon
+from utils.spaces import PrivateSpaceProvisioner, is_private_space, find_space_marker
+from utils.members import has_any_role
+from utils.guilds import guild_config
+from utils.audit import get_audit_log
+from utils.events import TicketClosed, get_event_bus
+from utils.views import get_view_registry
 
 logger = logging.getLogger(__name__)
 
@@ -16,9 +22,10 @@ def sanitize_channel_name(name):
     return name[:90] # Limite la longueur
 
 # --- Dictionnaire EN MEMOIRE pour suivre les tickets ouverts ---
-# Clé: user_id (int), Valeur: channel_id (int)
+# Clé: (guild_id, user_id), Valeur: channel_id (int) — un ticket ouvert par membre et par serveur
 # Sera perdu au redémarrage ! Pour la persistance, utiliser DB/fichier.
 open_tickets_state = {}
+CLOSE_DELAY = 10 # Secondes entre l'annonce de fermeture et la suppression du ticket
 
 # --- Vue Persistante pour le bouton de création ---
 class TicketCreationView(ui.View):
@@ -46,33 +53,30 @@ class TicketCreationView(ui.View):
              except: pass
              return
 
-        if not guild: return await interaction.response.send_message("Erreur interne (Guilde).", ephemeral=True)
+        config = guild_config(self.bot, guild)
+        if not config: return await interaction.followup.send("Erreur interne (Guilde).", ephemeral=True)
+        ticket_cog = self.bot.get_cog('TicketSystemCog')
+        if not ticket_cog:
+            logger.error("Impossible de récupérer le TicketSystemCog dans la vue.")
+            return await interaction.followup.send("Une erreur interne s'est produite (Cog non trouvé).", ephemeral=True)
 
         # --- Vérification: Ticket déjà ouvert ? ---
-        if user.id in open_tickets_state:
-            existing_channel_id = open_tickets_state[user.id]
-            existing_channel = guild.get_channel(existing_channel_id)
+        ticket_key = (guild.id, user.id)
+        if ticket_key in open_tickets_state:
+            existing_channel_id = open_tickets_state[ticket_key]
+            existing_channel = guild.get_channel_or_thread(existing_channel_id)
             if existing_channel:
                 logger.warning(f"{user} tried to open ticket, already has {existing_channel.mention}")
-                return await interaction.response.send_message(f"Vous avez déjà un ticket ouvert : {existing_channel.mention}", ephemeral=True)
+                return await interaction.followup.send(f"Vous avez déjà un ticket ouvert : {existing_channel.mention}", ephemeral=True)
             else:
                 logger.info(f"Cleaning up non-existent ticket channel {existing_channel_id} for {user}")
-                try: del open_tickets_state[user.id]
+                try: del open_tickets_state[ticket_key]
                 except KeyError: pass
 
         # --- Récupération de la configuration ---
-        category_id = self.bot.config.get('TICKET_CATEGORY_ID')
-        staff_role_ids = self.bot.config.get('TICKET_STAFF_ROLE_IDS', [])
-        log_channel_id = self.bot.config.get('TICKET_LOG_CHANNEL_ID') # Optionnel
-
-        category = guild.get_channel(category_id) if category_id else None
-        if category_id and (not category or not isinstance(category, discord.CategoryChannel)):
-            logger.error(f"Ticket category ID {category_id} invalid.")
-            category = None
-            logger.warning("Création du ticket hors catégorie.")
-
-        staff_roles = [guild.get_role(role_id) for role_id in staff_role_ids]
-        staff_roles = [role for role in staff_roles if role]
+        staff_role_ids = config.get('TICKET_STAFF_ROLE_IDS', [])
+
+        staff_roles = config.roles('TICKET_STAFF_ROLE_IDS')
         if not staff_roles and staff_role_ids:
              logger.error(f"Aucun rôle staff valide trouvé pour IDs: {staff_role_ids}")
 
@@ -87,25 +91,25 @@ class TicketCreationView(ui.View):
             overwrites[role] = discord.PermissionOverwrite(view_channel=True, send_messages=True, attach_files=True, embed_links=True, read_message_history=True, manage_messages=True)
             staff_mentions.append(role.mention)
 
-        # --- Création du salon ---
+        # --- Création du salon (ou thread privé selon TICKET_MODE) ---
         channel_name = f"ticket-{sanitize_channel_name(user.name)}-{str(user.id)[-4:]}"
         new_channel = None
         try:
             reason = f"Ticket créé par {str(user)} ({user.id})"
             # Stocke l'ID créateur dans le topic pour la commande /closeticket
             topic = f"Ticket de {str(user)} (ID: {user.id}). Créé le {utils.utcnow().strftime('%d/%m/%Y %H:%M')} UTC. CréateurID:{user.id}"
-            new_channel = await guild.create_text_channel(
-                name=channel_name, category=category, overwrites=overwrites, topic=topic, reason=reason
+            new_channel = await ticket_cog.spaces.create(
+                guild, name=channel_name, topic=topic, overwrites=overwrites, members=[user], reason=reason
             )
             logger.info(f"Ticket channel created: {new_channel.name} ({new_channel.id}) for {user}")
-            open_tickets_state[user.id] = new_channel.id # Ajouter au suivi global
+            open_tickets_state[ticket_key] = new_channel.id # Ajouter au suivi global
 
         except discord.Forbidden:
             logger.error(f"Permissions manquantes pour créer ticket pour {user.name}.")
-            return await interaction.response.send_message("Permissions manquantes pour créer le salon ticket.", ephemeral=True)
+            return await interaction.followup.send("Permissions manquantes pour créer le salon ticket.", ephemeral=True)
         except Exception as e:
              logger.error(f"Erreur création ticket pour {user.name}: {e}", exc_info=True)
-             return await interaction.response.send_message("Erreur lors de la création du ticket.", ephemeral=True)
+             return await interaction.followup.send("Erreur lors de la création du ticket.", ephemeral=True)
 
         # --- Actions post-création ---
         if new_channel:
@@ -118,29 +122,28 @@ class TicketCreationView(ui.View):
                     description=(f"Bienvenue {user.mention} !\n\n"
                                  f"Décrivez votre problème/question.\n"
                                  f"Staff notifié: {staff_mention_str}\n\n"
-                                 "Utilisez le bouton ci-dessous ou la commande `!closeticket` pour fermer."),
+                                 "Utilisez le bouton ci-dessous ou la commande `/closeticket` pour fermer."),
                     color=discord.Color.blurple()
                 )
-                # Note : Le message d'accueil peut être personnalisé davantage
-                await new_channel.send(embed=welcome_embed, view=close_view)
+                # Les threads n'ont pas de topic : l'ID créateur est aussi dans le footer
+                welcome_embed.set_footer(text=f"CréateurID:{user.id}")
+                # En thread privé, la mention (hors embed) ajoute le staff au thread
+                content = " ".join(staff_mentions) if isinstance(new_channel, discord.Thread) and staff_mentions else None
+                await new_channel.send(content=content, embed=welcome_embed, view=close_view)
             except Exception as e_msg: logger.error(f"Erreur envoi message initial ticket {new_channel.name}: {e_msg}")
 
             try: await interaction.followup.send(f"Votre ticket a été créé : {new_channel.mention}", ephemeral=True)
             except Exception as e_followup: logger.error(f"Erreur followup création ticket: {e_followup}")
 
-            # Log (optionnel)
-            if log_channel_id:
-                log_channel = guild.get_channel(log_channel_id)
-                if log_channel and isinstance(log_channel, discord.TextChannel):
-                    log_embed = discord.Embed(
-                         title="📝 Nouveau Ticket Créé",
-                         color=discord.Color.green(),
-                         timestamp=utils.utcnow()
-                     )
-                    log_embed.add_field(name="Créateur", value=f"{user.mention} ({user.id})", inline=False)
-                    log_embed.add_field(name="Salon Ticket", value=f"{new_channel.mention} ({new_channel.id})", inline=False)
-                    try: await log_channel.send(embed=log_embed)
-                    except Exception as e_log: logger.error(f"Erreur envoi log création ticket: {e_log}")
+            # Log (optionnel) : groupé avec les autres entrées du journal, envoyé hors de l'interaction
+            log_embed = discord.Embed(
+                 title="📝 Nouveau Ticket Créé",
+                 color=discord.Color.green(),
+                 timestamp=utils.utcnow()
+             )
+            log_embed.add_field(name="Créateur", value=f"{user.mention} ({user.id})", inline=False)
+            log_embed.add_field(name="Salon Ticket", value=f"{new_channel.mention} ({new_channel.id})", inline=False)
+            get_audit_log(self.bot).log(guild, log_embed, key='TICKET_LOG_CHANNEL_ID')
 
 
 # --- Vue pour le bouton de fermeture ---
@@ -162,9 +165,10 @@ class TicketCloseView(ui.View):
         self.closing = True
 
         user = interaction.user; channel = interaction.channel; guild = interaction.guild
-        staff_role_ids = self.bot.config.get('TICKET_STAFF_ROLE_IDS', [])
+        config = guild_config(self.bot, guild)
+        staff_role_ids = config.get('TICKET_STAFF_ROLE_IDS', []) if config else []
         # Vérifier si l'utilisateur a un des rôles staff ou est le créateur
-        is_staff = any(role.id in staff_role_ids for role in getattr(user, 'roles', []))
+        is_staff = has_any_role(user, staff_role_ids)
         is_creator = user.id == self.creator_id
 
         if not is_staff and not is_creator:
@@ -181,29 +185,22 @@ class TicketCloseView(ui.View):
         try:
             button.disabled = True # Griser le bouton
             await interaction.response.edit_message(view=self)
-            await interaction.followup.send(f"🔒 Fermeture du ticket par {user.mention} dans 10 secondes...")
+            await interaction.followup.send(f"🔒 Fermeture du ticket par {user.mention} dans {CLOSE_DELAY} secondes...")
             logger.info(f"Fermeture ticket {channel.name} par {user.name} (bouton).")
-            await asyncio.sleep(10)
-            await channel.delete(reason=f"Ticket fermé par {str(user)} (bouton).")
+            await asyncio.sleep(CLOSE_DELAY)
+            ticket_cog = self.bot.get_cog('TicketSystemCog')
+            if ticket_cog: await ticket_cog.spaces.delete(channel, reason=f"Ticket fermé par {str(user)} (bouton).")
+            else: await channel.delete(reason=f"Ticket fermé par {str(user)} (bouton).")
             logger.info(f"Salon ticket {channel.name} ({channel.id}) supprimé.")
 
             # Nettoyer état mémoire global
-            if self.creator_id in open_tickets_state and open_tickets_state[self.creator_id] == channel.id:
-                 del open_tickets_state[self.creator_id]
+            if open_tickets_state.get((guild.id, self.creator_id)) == channel.id:
+                 del open_tickets_state[(guild.id, self.creator_id)]
                  logger.info(f"Ticket {channel.id} retiré état mémoire pour {self.creator_id}.")
 
-            # Log optionnel ...
-            log_channel_id = self.bot.config.get('TICKET_LOG_CHANNEL_ID')
-            if log_channel_id:
-                log_channel = guild.get_channel(log_channel_id)
-                if log_channel and isinstance(log_channel, discord.TextChannel):
-                     log_embed = discord.Embed(
-                         title="🔒 Ticket Fermé (Bouton)",
-                         description=f"Le ticket `{channel.name}` créé par <@{self.creator_id}> a été fermé par {user.mention}.",
-                         color=discord.Color.red(), timestamp=utils.utcnow()
-                     )
-                     try: await log_channel.send(embed=log_embed)
-                     except Exception as e_log: logger.error(f"Erreur log fermeture ticket: {e_log}")
+            # Journal : publié sur le bus, envoyé par l'abonné du Cog
+            await get_event_bus(self.bot).publish(TicketClosed(guild.id, channel_id=channel.id, channel_name=channel.name,
+                                                               creator_id=self.creator_id, closed_by=user, reason=None, via="bouton"))
 
         except discord.NotFound:
              logger.warning(f"Tentative de fermeture d'un ticket déjà supprimé: {channel.name}")
@@ -230,14 +227,18 @@ class TicketSystemCog(commands.Cog, name="TicketSystemCog"):
         self.bot = bot
         # Référence le dictionnaire global pour l'état partagé
         self.open_tickets = open_tickets_state
-        logger.info("TicketSystemCog initialisé.")
+        self.spaces = PrivateSpaceProvisioner(bot, 'TICKET')
+        logger.info(f"TicketSystemCog initialisé (mode: {self.spaces.mode()}).")
     # --- FIN CORRECTION ---
 
-    @commands.command(name="setuptickets", aliases=["setticket"])
+    @commands.hybrid_command(name="setuptickets", aliases=["setticket"])
     @commands.has_permissions(administrator=True)
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.guild_only()
     async def setup_ticket_button(self, ctx: commands.Context):
         """Poste le message initial avec le bouton pour créer des tickets."""
-        target_channel_id = self.bot.config.get('TICKET_CREATION_CHANNEL_ID')
+        config = guild_config(self.bot, ctx.guild)
+        target_channel_id = config.get('TICKET_CREATION_CHANNEL_ID') if config else None
         if not target_channel_id: return await ctx.send("Erreur: `TICKET_CREATION_CHANNEL_ID` non configuré.")
 
         target_channel = ctx.guild.get_channel(target_channel_id)
@@ -264,89 +265,128 @@ class TicketSystemCog(commands.Cog, name="TicketSystemCog"):
              logger.error(f"Erreur setup tickets: {e}", exc_info=True)
 
 
+    # --- Fermeture (commune à !closeticket et /closeticket) ---
+    async def _ticket_creator(self, channel) -> int | None:
+        """ID du créateur : topic ou footer du 1er message (thread), sinon état mémoire."""
+        creator_id = await find_space_marker(channel, 'CréateurID')
+        if not creator_id:
+             for (guild_id, uid), cid in self.open_tickets.items(): # Utilise self.open_tickets (qui est open_tickets_state)
+                 if cid == channel.id: creator_id = uid; break
+        if not creator_id: logger.warning(f"Impossible déterminer créateur ticket {channel.name} pour commande close.")
+        return creator_id
+
+    def _is_ticket(self, channel) -> bool:
+        return is_private_space(channel) and channel.name.startswith("ticket-")
+
+    def _staff_role_ids(self, guild: discord.Guild | None) -> list[int]:
+        config = guild_config(self.bot, guild)
+        return config.get('TICKET_STAFF_ROLE_IDS', []) if config else []
+
+    def _close_refusal(self, user, creator_id: int | None) -> str | None:
+        """Message de refus si l'utilisateur n'est ni le créateur ni du staff (staff seul si créateur inconnu)."""
+        if has_any_role(user, self._staff_role_ids(user.guild)): return None
+        if creator_id and user.id == creator_id: return None
+        if not creator_id: return "Impossible de vérifier le créateur; seul le staff peut fermer ce ticket."
+        return "Seul le créateur original ou un membre du staff peut fermer ce ticket."
+
+    async def _close_ticket(self, channel, user, creator_id: int | None, reason: str, via: str):
+        """Annonce la fermeture dans le ticket, supprime l'espace après 10 s, puis nettoie et journalise."""
+        guild = channel.guild
+        try:
+            # Envoyer confirmation dans le salon avant de supprimer
+            await channel.send(f"🔒 Ticket fermé par {user.mention}. Suppression dans {CLOSE_DELAY} secondes...\nRaison: {reason}")
+            logger.info(f"Fermeture ticket {channel.name} par {user.name} ({via}). Raison: {reason}")
+            await asyncio.sleep(CLOSE_DELAY)
+            await self.spaces.delete(channel, reason=f"Ticket fermé par {str(user)} ({via}). Raison: {reason}")
+            logger.info(f"Salon ticket {channel.name} ({channel.id}) supprimé.")
+
+            # Nettoyer état mémoire
+            if creator_id and self.open_tickets.get((guild.id, creator_id)) == channel.id:
+                 del self.open_tickets[(guild.id, creator_id)] # Utilise self.open_tickets
+                 logger.info(f"Ticket {channel.id} retiré état mémoire pour {creator_id}.")
+
+            # Journal : publié sur le bus, envoyé par l'abonné du Cog
+            await get_event_bus(self.bot).publish(TicketClosed(guild.id, channel_id=channel.id, channel_name=channel.name,
+                                                               creator_id=creator_id, closed_by=user, reason=reason, via=via))
+
+        except discord.Forbidden: await channel.send("Permissions manquantes pour supprimer salon.")
+        except discord.NotFound: logger.warning(f"Tentative de fermeture d'un ticket déjà supprimé ({via}): {channel.name}")
+        except Exception as e: logger.error(f"Erreur fermeture ticket {channel.name} ({via}): {e}", exc_info=True); await channel.send("Erreur interne fermeture.")
+
+    async def cog_load(self):
+        self._log_subscription = get_event_bus(self.bot).subscribe(TicketClosed, self.log_ticket_closed, name='ticket_close_log')
+
+    async def cog_unload(self):
+        get_event_bus(self.bot).unsubscribe(self._log_subscription)
+
+    async def log_ticket_closed(self, event: TicketClosed):
+        """Abonné du bus : journal de fermeture dans TICKET_LOG_CHANNEL_ID (optionnel)."""
+        log_embed = discord.Embed(
+            title="🔒 Ticket Fermé (Bouton)" if event.via == "bouton" else "🔒 Ticket Fermé (Commande)",
+            description=f"Ticket `{event.channel_name}` (créé par <@{event.creator_id or 'Inconnu'}>) fermé par {event.closed_by.mention}.",
+            color=discord.Color.red(), timestamp=utils.utcnow()
+        )
+        if event.reason: log_embed.add_field(name="Raison", value=event.reason, inline=False)
+        get_audit_log(self.bot).log(event.guild_id, log_embed, key='TICKET_LOG_CHANNEL_ID')
+
     # Commande pour fermer un ticket
     @commands.command(name="closeticket", aliases=["fermer"])
     async def close_ticket_command(self, ctx: commands.Context, *, reason: str = "Aucune raison fournie"):
         """Ferme le ticket actuel (utilisable dans un salon ticket)."""
-        channel = ctx.channel; guild = ctx.guild; user = ctx.author
+        channel = ctx.channel; user = ctx.author
 
         # Vérifier si c'est un salon ticket
-        if not channel.name.startswith("ticket-"):
+        if not self._is_ticket(channel):
              try: await ctx.message.delete()
              except: pass
              return await ctx.send("Commande utilisable uniquement dans un salon ticket.", delete_after=15)
 
         # Vérifier permissions (Créateur ou Staff)
-        creator_id = None
-        if channel.topic and "CréateurID:" in channel.topic:
-            match = re.search(r'CréateurID:(\d+)', channel.topic)
-            if match:
-                try: creator_id = int(match.group(1))
-                except ValueError: pass
-
-        # Fallback sur le dictionnaire en mémoire si pas trouvé dans le topic
-        if not creator_id:
-             for uid, cid in self.open_tickets.items(): # Utilise self.open_tickets (qui est open_tickets_state)
-                 if cid == channel.id: creator_id = uid; break
-
-        if not creator_id:
-             logger.warning(f"Impossible déterminer créateur ticket {channel.name} pour commande close.")
-             # Autoriser uniquement le staff si créateur inconnu ?
-             # Pour l'instant, on bloque si on ne peut pas vérifier
-
-        staff_role_ids = self.bot.config.get('TICKET_STAFF_ROLE_IDS', [])
-        is_staff = any(role.id in staff_role_ids for role in user.roles)
-        # Si on n'a pas trouvé le créateur, seul le staff peut fermer
-        is_creator = (user.id == creator_id) if creator_id else False
-
-        if not is_staff and not is_creator:
+        creator_id = await self._ticket_creator(channel)
+        refusal = self._close_refusal(user, creator_id)
+        if refusal:
             try: await ctx.message.delete()
             except: pass
-            # Donner un message plus clair si créateur non trouvé
-            msg = "Seul le créateur original ou un membre du staff peut fermer ce ticket."
-            if not creator_id: msg = "Impossible de vérifier le créateur; seul le staff peut fermer ce ticket."
-            return await ctx.send(msg, delete_after=15)
-
-        # Fermeture
-        try:
-            # Envoyer confirmation dans le salon avant de supprimer
-            await ctx.send(f"🔒 Ticket fermé par {user.mention}. Suppression dans 10 secondes...\nRaison: {reason}")
-            logger.info(f"Fermeture ticket {channel.name} par {user.name} (commande). Raison: {reason}")
-            await asyncio.sleep(10)
-            await channel.delete(reason=f"Ticket fermé par {str(user)} (cmd). Raison: {reason}")
-            logger.info(f"Salon ticket {channel.name} ({channel.id}) supprimé.")
-
-            # Nettoyer état mémoire
-            if creator_id and creator_id in self.open_tickets and self.open_tickets[creator_id] == channel.id:
-                 del self.open_tickets[creator_id] # Utilise self.open_tickets
-                 logger.info(f"Ticket {channel.id} retiré état mémoire pour {creator_id}.")
-
-            # Log optionnel...
-            log_channel_id = self.bot.config.get('TICKET_LOG_CHANNEL_ID')
-            if log_channel_id:
-                log_channel = guild.get_channel(log_channel_id)
-                if log_channel and isinstance(log_channel, discord.TextChannel):
-                     log_embed = discord.Embed(
-                        title="🔒 Ticket Fermé (Commande)",
-                        description=f"Ticket `{channel.name}` (créé par <@{creator_id or 'Inconnu'}>) fermé par {user.mention}.",
-                        color=discord.Color.red(), timestamp=utils.utcnow()
-                     )
-                     log_embed.add_field(name="Raison", value=reason, inline=False)
-                     try: await log_channel.send(embed=log_embed)
-                     except Exception as e_log: logger.error(f"Erreur log fermeture ticket: {e_log}")
-
-        except discord.Forbidden: await ctx.send("Permissions manquantes pour supprimer salon.")
-        except discord.NotFound: logger.warning(f"Tentative de fermeture d'un ticket déjà supprimé (commande): {channel.name}")
-        except Exception as e: logger.error(f"Erreur fermeture ticket {channel.name} (cmd): {e}", exc_info=True); await ctx.send("Erreur interne fermeture.")
+            return await ctx.send(refusal, delete_after=15)
+        await self._close_ticket(channel, user, creator_id, reason, via="cmd")
+
+    @app_commands.command(name="closeticket", description="Ferme un ticket (par défaut, celui où vous êtes).")
+    @app_commands.describe(ticket="Ticket à fermer (staff : n'importe quel ticket ouvert)", raison="Raison de la fermeture")
+    @app_commands.guild_only()
+    async def close_ticket_slash(self, interaction: discord.Interaction, ticket: str | None = None, raison: str = "Aucune raison fournie"):
+        channel = interaction.guild.get_channel_or_thread(int(ticket)) if ticket and ticket.isdigit() else interaction.channel
+        if not channel or not self._is_ticket(channel):
+            return await interaction.response.send_message("Ticket introuvable : utilisez la commande dans un salon ticket ou choisissez-en un.", ephemeral=True)
+        creator_id = await self._ticket_creator(channel)
+        refusal = self._close_refusal(interaction.user, creator_id)
+        if refusal: return await interaction.response.send_message(refusal, ephemeral=True)
+        await interaction.response.send_message(f"Fermeture de {channel.mention} demandée.", ephemeral=True)
+        await self._close_ticket(channel, interaction.user, creator_id, raison, via="slash")
+
+    @close_ticket_slash.autocomplete('ticket')
+    async def open_ticket_autocomplete(self, interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
+        """Tickets ouverts : tous pour le staff, le sien pour les autres."""
+        guild = interaction.guild
+        if not guild: return []
+        if has_any_role(interaction.user, self._staff_role_ids(guild)): channel_ids = [cid for (gid, _), cid in self.open_tickets.items() if gid == guild.id]
+        else: channel_ids = [self.open_tickets[(guild.id, interaction.user.id)]] if (guild.id, interaction.user.id) in self.open_tickets else []
+        current = current.lower(); choices = []
+        for channel_id in channel_ids:
+            channel = guild.get_channel_or_thread(channel_id) if guild else None
+            if channel and current in channel.name:
+                choices.append(app_commands.Choice(name=channel.name, value=str(channel.id)))
+                if len(choices) == 25: break # Maximum Discord
+        return choices
 
 
 # Fonction setup (inchangée)
 async def setup(bot: commands.Bot):
-    required_ids = ['GUILD_ID', 'TICKET_CREATION_CHANNEL_ID', 'TICKET_CATEGORY_ID', 'ADMIN_ROLE_ID']
+    required_ids = ['GUILD_ID', 'TICKET_CREATION_CHANNEL_ID', 'ADMIN_ROLE_ID']
+    required_ids.append('TICKET_THREAD_PARENT_ID' if bot.config.get('TICKET_MODE') == 'thread' else 'TICKET_CATEGORY_ID')
     optional_ids = ['TICKET_LOG_CHANNEL_ID', 'TICKET_STAFF_ROLE_IDS'] # Staff roles peut être vide
     missing = [k for k in required_ids if not bot.config.get(k)]
     if missing: logger.error(f"Config manquante TicketSystemCog: {', '.join(missing)}. Le Cog risque de mal fonctionner.")
     # else: logger.info("Config TicketSystemCog OK.")
     await bot.add_cog(TicketSystemCog(bot))
-    logger.info("Cog TicketSystem chargé.")
-    # L'enregistrement de TicketCreationView se fait via main.py/on_ready
\ No newline at end of file
+    get_view_registry(bot).contribute('TicketCreationView', TicketCreationView)
+    logger.info("Cog TicketSystem chargé.")
\ No newline at end of file
@@ -1,4 +1,6 @@
 # main.py
+import time
+_PROCESS_START = time.perf_counter() # Référence du rapport de démarrage
 import os
 import discord
 from discord.ext import commands
@@ -6,13 +8,25 @@ from dotenv import load_dotenv
 import logging
 import asyncio
 import json     
+load_dotenv() # Avant les imports de utils : LAZY_IMPORTS est lu à l'import (utils/metrics.py)
+from utils.members import MemberResolver, member_cache_flags_from_config
+from utils.guilds import GUILD_CONFIG_FILE, GuildConfigStore
+from utils.bot import PurEsportBot
+from utils.startup import StartupTimer, lazy_imports_enabled, topological_waves
+from utils.logs import parse_sampling, setup_logging
 
-# Configuration du logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s:%(levelname)s:%(name)s: %(message)s')
 logger = logging.getLogger('discord')
 
-# Charger les variables d'environnement
-load_dotenv()
+STARTUP = StartupTimer(_PROCESS_START)
+STARTUP.record("imports (discord.py...)", time.perf_counter() - _PROCESS_START)
+_env_start = time.perf_counter()
+
+# Configuration du logging : file d'attente + thread d'écriture (utils/logs.py), rien n'écrit depuis la boucle.
+# LOG_SAMPLE='cogs.stream_notifier=10' garde 1 message INFO sur 10 de ce logger ; LOG_RATE_PER_MINUTE limite
+# chaque message identique (0 = illimité) ; LOG_JSON_FILE ajoute un fichier JSON tournant.
+_log_rate = (os.getenv('LOG_RATE_PER_MINUTE') or '').strip()
+setup_logging(level=(os.getenv('LOG_LEVEL') or 'INFO').strip().upper(), json_path=os.getenv('LOG_JSON_FILE') or None,
+              sampling=parse_sampling(os.getenv('LOG_SAMPLE')), per_minute=int(_log_rate) if _log_rate.isdigit() else 120)
 
 # --- Récupération des variables d'environnement ---
 TOKEN = os.getenv('DISCORD_TOKEN')
@@ -38,10 +52,22 @@ try:
         'AIDE_CHANNEL_ID',
         'AIDE_ROLE_ID',
         'TICKET_LOG_CHANNEL_ID',
+        'AUDIT_LOG_CHANNEL_ID', # Journal d'audit (évaluations, inscriptions, rôles) ; TICKET_LOG_CHANNEL_ID sinon
         'EVALUATION_CATEGORY_ID',
-        'STREAM_PING_ROLE_ID'
+        'STREAM_PING_ROLE_ID',
+        'TICKET_THREAD_PARENT_ID',
+        'EVALUATION_THREAD_PARENT_ID',
+        'METRICS_PORT' # Endpoint Prometheus local (/metrics), désactivé si absent
         
     ] 
+    # Listes d'IDs séparés par des virgules (rôles staff)
+    OPTIONAL_INT_LIST_KEYS = ['TICKET_STAFF_ROLE_IDS', 'EVALUATION_STAFF_ROLE_IDS']
+    # Modes des espaces privés : 'channel' (salons + catégories de débordement) ou 'thread' (threads privés)
+    OPTIONAL_STR_KEYS = {
+        'TICKET_MODE': 'channel',
+        'EVALUATION_MODE': 'channel',
+        'METRICS_HOST': '127.0.0.1'
+    }
 
     # Charger et convertir les IDs requis
     for key in REQUIRED_INT_IDS:
@@ -58,6 +84,12 @@ try:
         else:
             CONFIG[key] = None # Mettre à None si absent ou invalide
 
+    for key in OPTIONAL_INT_LIST_KEYS:
+        CONFIG[key] = [int(part) for part in (os.getenv(key) or '').split(',') if part.strip().isdigit()]
+
+    for key, default in OPTIONAL_STR_KEYS.items():
+        CONFIG[key] = (os.getenv(key) or default).strip().lower()
+
     # Charger l'ID du message des règles (depuis fichier runtime)
     CONFIG['RULES_MESSAGE_ID'] = None # Initialiser
 
@@ -98,72 +130,67 @@ except Exception as e:
     logger.error(f"Erreur lors du chargement de {RUNTIME_CONFIG_PATH}: {e}")
 
 
+STARTUP.record("lecture .env + config runtime", time.perf_counter() - _env_start)
+
+# Imports différés des modules lourds optionnels (LAZY_IMPORTS=0 pour tout importer au démarrage)
+CONFIG['LAZY_IMPORTS'] = lazy_imports_enabled() # Même lecture que les modules qui l'appliquent à leur import
+
+# Watchdog de la boucle asyncio (utils/watchdog.py) : seuil de blocage journalisé avec la pile, 0 pour désactiver
+_lag_threshold = (os.getenv('LOOP_LAG_THRESHOLD_MS') or '').strip()
+CONFIG['LOOP_LAG_THRESHOLD_MS'] = int(_lag_threshold) if _lag_threshold.isdigit() else 500
+
+# Rafraîchissement en arrière-plan des pseudos/avatars enregistrés (cogs/registration.py) :
+# joueurs revérifiés par seconde, et heures entre deux balayages complets (0 pour désactiver)
+_refresh_rate = (os.getenv('PLAYER_REFRESH_RATE') or '').strip()
+CONFIG['PLAYER_REFRESH_RATE'] = int(_refresh_rate) if _refresh_rate.isdigit() and int(_refresh_rate) > 0 else 20
+_refresh_interval = (os.getenv('PLAYER_REFRESH_INTERVAL_HOURS') or '').strip()
+CONFIG['PLAYER_REFRESH_INTERVAL_HOURS'] = int(_refresh_interval) if _refresh_interval.isdigit() else 12
+
 # --- Configuration des Intents du Bot ---
 intents = discord.Intents.default()
 intents.members = True
-intents.message_content = True
+# MESSAGE_CONTENT_INTENT=0 : les commandes passent par les commandes slash (et les mentions du bot) ;
+# le contenu des messages n'est plus reçu ni analysé pour le préfixe '!'
+CONFIG['MESSAGE_CONTENT_INTENT'] = (os.getenv('MESSAGE_CONTENT_INTENT') or '1').strip().lower() in ('1', 'true', 'yes')
+intents.message_content = CONFIG['MESSAGE_CONTENT_INTENT']
 intents.reactions = True
 intents.guilds = True
 intents.presences = True
 
+# --- Cache des membres ---
+# LEAN_MEMBER_CACHE=1 : pas de chunking au démarrage ni de cache des présences. Les membres sont résolus
+# à la demande (utils/members.py) et seules les présences brutes sont traitées (annonces de streams).
+# MEMBER_CACHE_FLAGS (ex. 'joined' ou 'joined,voice', défaut 'none') choisit ce qui reste en cache.
+CONFIG['LEAN_MEMBER_CACHE'] = (os.getenv('LEAN_MEMBER_CACHE') or '0').strip().lower() in ('1', 'true', 'yes')
+# --- Serveurs servis ---
+# AUTO_REGISTER_GUILDS=1 : tout serveur qui ajoute le bot est servi aussitôt (commandes slash synchronisées).
+# Par défaut, un administrateur du serveur l'ajoute explicitement avec '/serveur definir' (ou !serveur definir).
+CONFIG['AUTO_REGISTER_GUILDS'] = (os.getenv('AUTO_REGISTER_GUILDS') or '0').strip().lower() in ('1', 'true', 'yes')
+
+bot_options = {}
+if CONFIG['LEAN_MEMBER_CACHE']:
+    bot_options = dict(member_cache_flags=member_cache_flags_from_config(os.getenv('MEMBER_CACHE_FLAGS')),
+                       chunk_guilds_at_startup=False, enable_raw_presences=True)
+    logger.info(f"Mode cache membres léger activé (flags: {bot_options['member_cache_flags']}).")
+
 # --- Initialisation du Bot ---
-bot = commands.Bot(command_prefix='!', intents=intents)
+# Les vues persistantes sont enregistrées une seule fois dans PurEsportBot.setup_hook
+command_prefix = '!' if intents.message_content else commands.when_mentioned
+bot = PurEsportBot(command_prefix=command_prefix, intents=intents, startup=STARTUP, **bot_options)
 bot.config = CONFIG # Attachement de la configuration
 bot.runtime_config_path = RUNTIME_CONFIG_PATH
+bot.member_resolver = MemberResolver(bot) # Résolution des membres partagée par les Cogs
+bot.guild_configs = GuildConfigStore(bot, os.path.join(os.path.dirname(RUNTIME_CONFIG_PATH), GUILD_CONFIG_FILE)) # Serveurs servis et leur config
 
-# --- Fonction register_persistent_views (MISE À JOUR) ---
-async def register_persistent_views():
-    """Enregistre TOUTES les vues persistantes nécessaires au démarrage."""
-    logger.info("Enregistrement des vues persistantes...")
-    registered_views = 0
-    # RegistrationView
-    try:
-        from cogs.registration import RegistrationView
-        bot.add_view(RegistrationView(bot=bot))
-        logger.info("-> Vue persistante RegistrationView enregistrée.")
-        registered_views += 1
-    except Exception as e: logger.error(f"Erreur enregistrement RegistrationView: {e}", exc_info=True)
-
-    # TicketCreationView
-    try:
-        from cogs.ticket_system import TicketCreationView
-        bot.add_view(TicketCreationView(bot=bot))
-        logger.info("-> Vue persistante TicketCreationView enregistrée.")
-        registered_views += 1
-    except Exception as e: logger.error(f"Erreur enregistrement TicketCreationView: {e}", exc_info=True)
-
-    # --- AJOUT : EvaluationActionView ---
-    try:
-        from cogs.evaluation import EvaluationActionView # Importer depuis le nouveau fichier
-        # Créer une instance et l'enregistrer
-        bot.add_view(EvaluationActionView(bot=bot))
-        logger.info("-> Vue persistante EvaluationActionView enregistrée.")
-        registered_views += 1
-    except ImportError: logger.error("Impossible d'importer EvaluationActionView depuis cogs.evaluation.")
-    except Exception as e: logger.error(f"Erreur enregistrement EvaluationActionView: {e}", exc_info=True)
-    # --- FIN AJOUT ---
-
-    logger.info(f"Enregistrement des vues persistantes terminé ({registered_views} vues).")
-
-# --- Événements et Commandes de Chargement ---
-@bot.event
-async def on_ready():
-    """Événement déclenché quand le bot est prêt et connecté."""
-    logger.info(f'Connecté en tant que {bot.user.name} ({bot.user.id})')
-    logger.info(f'Configuration chargée : {bot.config}')
-    guild = bot.get_guild(bot.config['GUILD_ID'])
-    if guild:
-        logger.info(f'Opérationnel sur le serveur : {guild.name}')
-        # Enregistrer les vues persistantes ICI après que le bot soit prêt
-        # C'est plus sûr car on est sûr que le cache interne est prêt
-        await register_persistent_views()
-    else:
-        logger.error(f"Le bot n'est pas sur le serveur spécifié avec l'ID {bot.config['GUILD_ID']} !")
-    print("-" * 20)
-    await bot.change_presence(activity=discord.Game(name="Observer les candidatures"))
+# Dépendances entre Cogs : une extension n'est chargée qu'après celles dont elle importe du code
+# (onboarding pointe vers le panneau d'enregistrement de RegistrationCog, roster_export importe staff_only).
+COG_DEPENDENCIES = {
+    'cogs.onboarding': {'cogs.registration'},
+    'cogs.roster_export': {'cogs.evaluation'},
+}
 
 async def load_cogs():
-    """Charge tous les Cogs trouvés dans le dossier ./cogs"""
+    """Charge tous les Cogs trouvés dans le dossier ./cogs, en parallèle quand les dépendances le permettent."""
     logger.info("Chargement des Cogs...")
     loaded_cogs = []
     # Obtenir le chemin absolu du dossier où se trouve main.py
@@ -179,39 +206,20 @@ async def load_cogs():
         return # Arrêter le chargement si le dossier n'existe pas
 
     # Lister les fichiers dans le chemin absolu du dossier cogs
-    for filename in os.listdir(cogs_dir):
-        if filename.endswith('.py') and not filename.startswith('_'):
-            cog_name = f'cogs.{filename[:-3]}'
-            try:
-                await bot.load_extension(cog_name)
-                logger.info(f'Cog chargé avec succès : {cog_name}')
-                loaded_cogs.append(cog_name)
-            except commands.ExtensionError as e:
-                logger.error(f'Erreur lors du chargement du Cog {cog_name}: {e.__class__.__name__} - {e}', exc_info=True)
-            except Exception as e:
-                 logger.error(f'Erreur inattendue lors du chargement du Cog {cog_name}: {e}', exc_info=True)
+    cog_names = [f'cogs.{filename[:-3]}' for filename in sorted(os.listdir(cogs_dir))
+                 if filename.endswith('.py') and not filename.startswith('_')]
+    with STARTUP.phase("chargement des Cogs (total)"):
+        for wave in topological_waves(cog_names, COG_DEPENDENCIES):
+            results = await asyncio.gather(*(bot.load_timed_extension(name) for name in wave))
+            loaded_cogs.extend(name for name, ok in zip(wave, results) if ok)
+            for name, ok in zip(wave, results):
+                if ok: logger.info(f'Cog chargé avec succès : {name}')
     logger.info(f"Chargement des Cogs terminé. Cogs chargés: {', '.join(loaded_cogs) if loaded_cogs else 'Aucun'}")
 
-async def register_persistent_views():
-    """Enregistre les vues persistantes nécessaires au démarrage."""
-    # Importe la vue ici pour éviter les imports circulaires au niveau global
-    try:
-        from cogs.registration import RegistrationView
-        # Si la vue prend des arguments (comme 'bot'), on les passe
-        view_instance = RegistrationView(bot=bot)
-        bot.add_view(view_instance)
-        logger.info(f"Vue persistante {view_instance.__class__.__name__} enregistrée.")
-    except ImportError:
-        logger.error("Impossible d'importer RegistrationView depuis cogs.registration pour l'enregistrement persistant.")
-    except Exception as e:
-        logger.error(f"Erreur lors de l'enregistrement de la vue persistante: {e}", exc_info=True)
-
-
 async def main():
     """Fonction principale pour démarrer le bot."""
     async with bot:
-        await load_cogs()
-        # L'enregistrement des vues se fait dans on_ready maintenant
+        await load_cogs() # Chaque Cog contribue ses vues persistantes au registre
         await bot.start(TOKEN)
 
 if __name__ == "__main__":
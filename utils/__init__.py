@@ -0,0 +1,2 @@
+# utils/__init__.py
+# Modules partagés entre les Cogs (ne sont pas chargés comme extensions).
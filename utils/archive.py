@@ -0,0 +1,105 @@
+# utils/archive.py
+import datetime
+import gzip
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_MAX_BYTES = 256 * 1024 # Taille compressée au-delà de laquelle un nouveau segment est ouvert
+INDEX_FILE = 'index.json'
+
+
+class ColdArchive:
+    """Archive froide de fiches (joueurs partis) : segments JSON Lines compressés, en ajout seulement.
+
+    Chaque archivage ajoute un membre gzip au segment courant ('segment-0001.jsonl.gz', ...).
+    L'index {clé: segment} (index.json) permet de restaurer une fiche en ne lisant qu'un segment.
+    Une fiche restaurée sort de l'index ; un segment sans fiche indexée est supprimé.
+    Bloquant mais court (segments de quelques centaines de Ko) : appelé directement depuis la boucle.
+    """
+
+    def __init__(self, directory: str, segment_max_bytes: int = SEGMENT_MAX_BYTES):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._index: dict[str, str] = self._load_index()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    # --- Index ---
+    def _segments(self) -> list[str]:
+        return sorted(name for name in os.listdir(self.directory) if name.startswith('segment-') and name.endswith('.jsonl.gz'))
+
+    def _load_index(self) -> dict[str, str]:
+        path = os.path.join(self.directory, INDEX_FILE)
+        try:
+            with open(path, 'r', encoding='utf-8') as f: return json.load(f)
+        except FileNotFoundError: pass
+        except (OSError, json.JSONDecodeError) as e: logger.error(f"Index d'archive {path} illisible ({e}) : reconstruction.")
+        index = {} # Reconstruction depuis les segments (la dernière ligne d'une clé l'emporte)
+        for segment in self._segments():
+            for record in self._read(segment):
+                if record['data'] is None: index.pop(record['key'], None) # Fiche restaurée depuis
+                else: index[record['key']] = segment
+        if index: self._save_index(index)
+        return index
+
+    def _save_index(self, index: dict[str, str] | None = None):
+        path = os.path.join(self.directory, INDEX_FILE)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f: json.dump(self._index if index is None else index, f)
+        os.replace(path + '.tmp', path)
+
+    # --- Segments ---
+    def _read(self, segment: str):
+        try:
+            with gzip.open(os.path.join(self.directory, segment), 'rt', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip(): yield json.loads(line)
+        except (OSError, EOFError, json.JSONDecodeError) as e:
+            logger.error(f"Segment d'archive {segment} illisible ou tronqué: {e}")
+
+    def _current_segment(self) -> str:
+        segments = self._segments()
+        if segments and os.path.getsize(os.path.join(self.directory, segments[-1])) < self.segment_max_bytes: return segments[-1]
+        number = int(segments[-1][8:12]) + 1 if segments else 1
+        return f"segment-{number:04d}.jsonl.gz"
+
+    # --- API ---
+    def _append(self, entries: dict[str, dict | None]) -> str:
+        segment = self._current_segment()
+        archived_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        lines = ''.join(json.dumps({'key': key, 'archived_at': archived_at, 'data': data}, ensure_ascii=False) + '\n'
+                        for key, data in entries.items())
+        with open(os.path.join(self.directory, segment), 'ab') as f: f.write(gzip.compress(lines.encode('utf-8')))
+        return segment
+
+    def archive(self, entries: dict[str, dict]):
+        """Ajoute les fiches au segment courant (un seul membre gzip), puis met l'index à jour."""
+        if not entries: return
+        segment = self._append(entries)
+        for key in entries: self._index[key] = segment
+        self._save_index()
+
+    def restore(self, key: str) -> dict | None:
+        """Retire la fiche de l'archive et la retourne (None si absente ou illisible : elle reste alors archivée)."""
+        segment = self._index.get(key)
+        if segment is None: return None
+        data = None
+        for record in self._read(segment):
+            if record['key'] == key: data = record['data'] # Dernière version archivée
+        if data is None: # Segment illisible ou tronqué : la fiche reste indexée (une réparation du fichier la rend)
+            logger.error(f"Fiche {key} introuvable dans le segment {segment} : non restaurée, conservée dans l'archive.")
+            return None
+        del self._index[key]
+        self._append({key: None}) # Marque de restauration : l'index reconstruit ne ressuscite pas la fiche
+        self._save_index()
+        if segment not in self._index.values() and segment != self._current_segment():
+            try: os.remove(os.path.join(self.directory, segment))
+            except OSError as e: logger.warning(f"Segment d'archive vide {segment} non supprimé: {e}")
+        return data
@@ -0,0 +1,128 @@
+# utils/audit.py
+import asyncio
+import contextvars
+import discord
+import logging
+import time
+from collections import Counter, deque
+from utils.guilds import guild_config
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 10         # Embeds par message (limite Discord)
+BATCH_CHARS = 6000      # Caractères cumulés des embeds d'un message (limite Discord)
+FLUSH_INTERVAL = 2.0    # Secondes au plus avant l'envoi d'un lot incomplet
+MAX_PENDING = 500       # Embeds en attente, tous salons confondus (au-delà : perdus et comptés)
+CLOSE_TIMEOUT = 5.0     # Secondes laissées au dernier envoi à l'arrêt
+AUDIT_CHANNEL_KEY = 'AUDIT_LOG_CHANNEL_ID'
+FALLBACK_CHANNEL_KEY = 'TICKET_LOG_CHANNEL_ID' # Salon de journal historique, utilisé si AUDIT_LOG_CHANNEL_ID est absent
+
+
+class AuditLog:
+    """Journal d'audit groupé : les embeds sont mis en file par salon et envoyés par messages de BATCH_SIZE
+    embeds au plus, toutes les FLUSH_INTERVAL secondes ou dès qu'un lot est complet.
+
+    `log()` ne fait aucun appel réseau : utilisable depuis un listener, un callback ou un abonné du bus.
+    """
+
+    def __init__(self, bot, interval: float = FLUSH_INTERVAL, max_pending: int = MAX_PENDING):
+        self.bot = bot
+        self.interval = interval
+        self.max_pending = max_pending
+        self.pending: dict[int, deque[discord.Embed]] = {} # ID du salon -> embeds en attente
+        self.channels: dict[int, discord.abc.Messageable] = {}
+        self.size = 0
+        self.stats = Counter() # queued, sent, messages, overflow, failed
+        self._ready = asyncio.Event() # Au moins un embed en attente
+        self._full = asyncio.Event()  # Un salon a un lot complet
+        self._task: asyncio.Task | None = None
+        self._overflow_warned = 0.0
+        self.closed = False
+
+    def channel_for(self, guild, key: str | None = None) -> discord.TextChannel | None:
+        """Salon de journal du serveur : `key` si fourni, sinon AUDIT_LOG_CHANNEL_ID puis TICKET_LOG_CHANNEL_ID."""
+        config = guild_config(self.bot, guild)
+        if not config: return None
+        if key: return config.text_channel(key)
+        return config.text_channel(AUDIT_CHANNEL_KEY) or config.text_channel(FALLBACK_CHANNEL_KEY)
+
+    def log(self, guild, embed: discord.Embed, *, key: str | None = None) -> bool:
+        """Met l'embed en file pour le salon de journal du serveur. False si aucun salon ou si la file est pleine."""
+        channel = self.channel_for(guild, key)
+        if not channel or self.closed: return False
+        if self.size >= self.max_pending:
+            self.stats['overflow'] += 1
+            if time.monotonic() - self._overflow_warned >= 60:
+                self._overflow_warned = time.monotonic()
+                logger.warning(f"Journal d'audit plein ({self.max_pending} embeds en attente) : embeds perdus.")
+            return False
+        queue = self.pending.get(channel.id)
+        if queue is None: queue = self.pending[channel.id] = deque()
+        self.channels[channel.id] = channel
+        queue.append(embed); self.size += 1; self.stats['queued'] += 1
+        self._ready.set()
+        if len(queue) >= BATCH_SIZE: self._full.set()
+        if self._task is None or self._task.done(): # Contexte vide : l'envoi n'est rattaché à aucun émetteur
+            self._task = asyncio.get_running_loop().create_task(self._run(), name='audit-log', context=contextvars.Context())
+        return True
+
+    def _take_batch(self, queue: deque) -> list[discord.Embed]:
+        batch, chars = [], 0
+        while queue and len(batch) < BATCH_SIZE and (not batch or chars + len(queue[0]) <= BATCH_CHARS):
+            embed = queue.popleft(); batch.append(embed); chars += len(embed)
+        self.size -= len(batch)
+        return batch
+
+    async def flush(self):
+        """Envoie tout ce qui est en attente, salon par salon (ordre d'arrivée conservé)."""
+        for channel_id in list(self.pending):
+            queue = self.pending[channel_id]
+            while queue:
+                batch = self._take_batch(queue)
+                try:
+                    await self.channels[channel_id].send(embeds=batch)
+                    self.stats['sent'] += len(batch); self.stats['messages'] += 1
+                except discord.HTTPException as e:
+                    self.stats['failed'] += len(batch)
+                    logger.error(f"Erreur envoi du journal d'audit ({len(batch)} embeds) dans {channel_id}: {e}")
+            if not queue: del self.pending[channel_id]; self.channels.pop(channel_id, None)
+        if not self.size: self._ready.clear()
+        if not self.closed: self._full.clear()
+
+    async def _run(self):
+        while not self.closed:
+            await self._ready.wait()
+            # Laisse le lot se remplir : envoi à l'échéance, ou tout de suite si un lot est complet (ou à l'arrêt)
+            if not self._full.is_set():
+                try: await asyncio.wait_for(self._full.wait(), self.interval)
+                except asyncio.TimeoutError: pass
+            try: await self.flush()
+            except Exception as e: logger.error(f"Erreur du journal d'audit: {e}", exc_info=True)
+
+    async def close(self, timeout: float = CLOSE_TIMEOUT):
+        """Arrêt : plus de mise en file ; la boucle envoie ce qui reste sans attendre l'échéance (au plus `timeout` s)."""
+        self.closed = True
+        if not self._task or self._task.done(): return
+        self._ready.set(); self._full.set()
+        try: await asyncio.wait_for(asyncio.shield(self._task), timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+            logger.warning(f"Journal d'audit : {self.size} embeds non envoyés à l'arrêt (délai de {timeout}s dépassé).")
+
+    def prometheus(self) -> list[str]:
+        """Collecteur Prometheus (Metrics.collectors) : embeds en attente et compteurs."""
+        lines = ['# TYPE pur_audit_log_pending gauge', f'pur_audit_log_pending {self.size}',
+                 '# TYPE pur_audit_log_embeds_total counter']
+        lines += [f'pur_audit_log_embeds_total{{outcome="{k}"}} {self.stats[k]}' for k in ('queued', 'sent', 'overflow', 'failed')]
+        lines += ['# TYPE pur_audit_log_messages_total counter', f"pur_audit_log_messages_total {self.stats['messages']}"]
+        return lines
+
+
+def get_audit_log(bot) -> AuditLog:
+    """Retourne le journal d'audit attaché au bot (créé au premier appel)."""
+    audit = getattr(bot, 'audit_log', None)
+    if audit is None:
+        audit = bot.audit_log = AuditLog(bot)
+        metrics = getattr(bot, 'metrics', None)
+        if metrics: metrics.collectors.append(audit.prometheus)
+    return audit
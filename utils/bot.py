@@ -0,0 +1,194 @@
+# utils/bot.py
+import discord
+from discord.ext import commands
+from discord import app_commands
+import logging
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+
+from utils.views import get_view_registry
+from utils.guilds import get_guild_configs
+from utils.startup import StartupTimer, current_version
+from utils.metrics import Metrics
+from utils.watchdog import LoopWatchdog
+
+logger = logging.getLogger('discord')
+
+APP_COMMANDS_HASH_KEY = 'app_commands_hash' # Clé de config_runtime.json : empreinte des commandes synchronisées
+
+
+class PurEsportBot(commands.Bot):
+    """Bot Pur Esport : enregistre les vues persistantes une seule fois, avant la connexion,
+    et chronomètre chaque phase du démarrage (voir utils/startup.py)."""
+
+    def __init__(self, *args, startup: StartupTimer | None = None, metrics: Metrics | None = None, **kwargs):
+        self.metrics = metrics or Metrics()
+        kwargs.setdefault('http_trace', self.metrics.trace_config()) # Appels REST par route et statut
+        super().__init__(*args, **kwargs)
+        self.startup = startup or StartupTimer()
+        self._cog_added_at: dict[str, float] = {} # module du Cog -> instant de add_cog
+        self.tree.on_error = self.on_app_command_error
+        self.watchdog: LoopWatchdog | None = None
+
+    # --- Configuration runtime (data/config_runtime.json) ---
+    _runtime_config_lock = threading.Lock() # Lecture-modification-écriture atomique (aussi depuis asyncio.to_thread)
+
+    def read_runtime_config(self) -> dict:
+        try:
+            with open(self.runtime_config_path, 'r', encoding='utf-8') as f: return json.load(f)
+        except (AttributeError, FileNotFoundError, json.JSONDecodeError): return {}
+
+    def update_runtime_config(self, **values):
+        """Met à jour des clés de config_runtime.json sans toucher aux autres."""
+        path = getattr(self, 'runtime_config_path', None)
+        if not path: return
+        with self._runtime_config_lock:
+            data = self.read_runtime_config(); data.update(values)
+            try:
+                with open(path + '.tmp', 'w', encoding='utf-8') as f: json.dump(data, f, indent=4)
+                os.replace(path + '.tmp', path)
+            except OSError as e: logger.error(f"Erreur d'écriture de {path}: {e}")
+
+    # --- Instrumentation (utils/metrics.py) ---
+    def dispatch(self, event_name: str, /, *args, **kwargs):
+        self.metrics.events[event_name] += 1
+        if event_name == 'interaction': self.metrics.interaction_received(args[0].id)
+        super().dispatch(event_name, *args, **kwargs)
+
+    async def _run_event(self, coro, event_name: str, *args, **kwargs):
+        # Chaque listener (Cogs, bot, add_listener) passe ici : durée totale, attentes réseau comprises
+        start = time.perf_counter(); failed = False
+        try:
+            await coro(*args, **kwargs)
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            failed = True
+            try: await self.on_error(event_name, *args, **kwargs)
+            except asyncio.CancelledError: pass
+        finally:
+            self.metrics.observe_listener(event_name, getattr(coro, '__qualname__', repr(coro)), time.perf_counter() - start, failed)
+
+    async def add_cog(self, cog, /, *args, **kwargs):
+        # Sépare le temps d'import de celui du setup() dans le rapport de démarrage
+        self._cog_added_at.setdefault(cog.__module__, time.perf_counter())
+        await super().add_cog(cog, *args, **kwargs)
+
+    async def load_timed_extension(self, name: str) -> bool:
+        """Charge une extension et enregistre ses temps d'import et de setup. Retourne True si succès."""
+        start = time.perf_counter()
+        try:
+            await self.load_extension(name)
+        except commands.ExtensionError as e:
+            logger.error(f'Erreur lors du chargement du Cog {name}: {e.__class__.__name__} - {e}', exc_info=True)
+            return False
+        except Exception as e:
+            logger.error(f'Erreur inattendue lors du chargement du Cog {name}: {e}', exc_info=True)
+            return False
+        end = time.perf_counter()
+        added_at = self._cog_added_at.get(name, end)
+        self.startup.record(f"cog {name} (import)", added_at - start)
+        self.startup.record(f"cog {name} (setup)", end - added_at)
+        return True
+
+    async def login(self, token: str):
+        self.startup.mark('login')
+        await super().login(token) # Appelle setup_hook à la fin
+
+    async def setup_hook(self):
+        # Appelé une seule fois par discord.py, après le login et avant la connexion gateway
+        self.startup.mark('setup_hook')
+        if 'login' in self.startup.marks: self.startup.record("login", self.startup.since('login', 'setup_hook'))
+        registry = get_view_registry(self)
+        logger.info("Enregistrement des vues persistantes...")
+        with self.startup.phase("enregistrement des vues"):
+            added = registry.install(self)
+        logger.info(f"Enregistrement des vues persistantes terminé ({added} vues).")
+        with self.startup.phase("synchronisation des commandes slash"):
+            await self.sync_app_commands()
+        self.start_watchdog()
+        self.startup.mark('connect_start')
+
+    def start_watchdog(self):
+        """Démarre la surveillance du retard de la boucle (LOOP_LAG_THRESHOLD_MS, 0 = désactivé)."""
+        threshold = getattr(self, 'config', {}).get('LOOP_LAG_THRESHOLD_MS', 500)
+        if not threshold or self.watchdog: return
+        self.watchdog = LoopWatchdog(threshold=threshold / 1000)
+        self.metrics.collectors.append(self.watchdog.prometheus)
+        self.watchdog.start()
+
+    async def close(self):
+        if self.watchdog: await self.watchdog.stop()
+        bus = getattr(self, 'event_bus', None)
+        if bus: await bus.close() # Avant la déconnexion : les abonnés envoient encore leurs messages
+        audit = getattr(self, 'audit_log', None)
+        if audit: await audit.close() # Après le bus : ses abonnés alimentent le journal d'audit
+        await super().close()
+
+    async def sync_app_commands(self, force: bool = False) -> bool:
+        """Publie les commandes slash sur chaque serveur servi (instantané, contrairement aux commandes globales).
+        La synchronisation est limitée par Discord : elle n'est faite que si les définitions ou les serveurs ont changé."""
+        guild_ids = get_guild_configs(self).guild_ids()
+        if not guild_ids: return False
+        guilds = [discord.Object(id=guild_id) for guild_id in guild_ids]
+        for guild in guilds: self.tree.copy_global_to(guild=guild)
+        definitions = sorted((c.to_dict(self.tree) for c in self.tree.get_commands(guild=guilds[0])), key=lambda d: d['name'])
+        digest = hashlib.sha1(json.dumps([guild_ids, definitions], sort_keys=True).encode()).hexdigest()
+        if not force and self.read_runtime_config().get(APP_COMMANDS_HASH_KEY) == digest:
+            logger.info(f"Commandes slash inchangées ({len(definitions)}, {len(guilds)} serveur(s)), pas de synchronisation.")
+            return False
+        results = await asyncio.gather(*(self.tree.sync(guild=guild) for guild in guilds), return_exceptions=True)
+        errors = [(guild.id, r) for guild, r in zip(guilds, results) if isinstance(r, Exception)]
+        for guild_id, error in errors: logger.error(f"Erreur synchronisation des commandes slash (serveur {guild_id}): {error}")
+        if errors: return False
+        self.update_runtime_config(**{APP_COMMANDS_HASH_KEY: digest})
+        logger.info(f"{len(definitions)} commandes slash synchronisées sur {len(guilds)} serveur(s).")
+        return True
+
+    async def on_message(self, message: discord.Message):
+        # Sans l'intent message_content, le contenu est vide (sauf mentions du bot et MP) : rien à analyser
+        if not message.content or message.author.bot: return
+        await self.process_commands(message)
+
+    async def on_app_command_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        if isinstance(error, app_commands.CheckFailure): text = "Vous n'avez pas la permission d'utiliser cette commande."
+        else:
+            logger.error(f"Erreur commande slash /{interaction.command.name if interaction.command else '?'}: {error}", exc_info=error)
+            text = "Une erreur interne s'est produite."
+        try:
+            if interaction.response.is_done(): await interaction.followup.send(text, ephemeral=True)
+            else: await interaction.response.send_message(text, ephemeral=True)
+        except discord.HTTPException: pass
+
+    async def on_connect(self):
+        if 'connected' not in self.startup.marks:
+            self.startup.mark('connected')
+            self.startup.record("connexion gateway", self.startup.since('connect_start', 'connected') or 0.0)
+
+    async def on_ready(self):
+        """Événement déclenché quand le bot est prêt et connecté (aussi après chaque reconnexion)."""
+        logger.info(f'Connecté en tant que {self.user.name} ({self.user.id})')
+        logger.info(f'Configuration chargée ({len(self.config)} clés).')
+        logger.debug('Configuration : %s', self.config)
+        for guild_id in get_guild_configs(self).guild_ids():
+            guild = self.get_guild(guild_id)
+            if guild:
+                logger.info(f'Opérationnel sur le serveur : {guild.name}')
+            else:
+                logger.error(f"Le bot n'est pas sur le serveur spécifié avec l'ID {guild_id} !")
+        if self.startup.ready_after is None: await self._report_startup()
+        print("-" * 20)
+        await self.change_presence(activity=discord.Game(name="Observer les candidatures"))
+
+    async def _report_startup(self):
+        self.startup.mark('ready')
+        self.startup.record("READY + chunking des serveurs", self.startup.since('connected', 'ready') or 0.0)
+        self.startup.ready_after = self.startup.marks['ready'] - self.startup.t0
+        previous = await asyncio.to_thread(self.startup.load_previous)
+        logger.info(self.startup.report(previous))
+        version = await asyncio.to_thread(current_version)
+        await asyncio.to_thread(self.startup.save, version)
@@ -0,0 +1,198 @@
+# utils/events.py
+import asyncio
+import contextvars
+import discord
+import logging
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 256 # Événements en attente par abonné
+CLOSE_TIMEOUT = 5.0      # Secondes laissées aux abonnés pour vider leur file à l'arrêt
+
+# Politiques quand la file d'un abonné est pleine
+DROP_OLDEST = 'drop_oldest' # Le plus ancien événement en attente est perdu (annonces : le plus récent compte)
+DROP_NEW = 'drop_new'       # Le nouvel événement est perdu (statistiques, journaux non critiques)
+BLOCK = 'block'             # publish() attend une place : rien n'est perdu, l'émetteur ralentit
+POLICIES = (DROP_OLDEST, DROP_NEW, BLOCK)
+
+
+# --- Événements (immuables ; les objets discord.py sont ceux du cache au moment de l'émission) ---
+@dataclass(frozen=True, slots=True)
+class Event:
+    guild_id: int
+    at: float = field(default_factory=time.time, kw_only=True)
+
+
+@dataclass(frozen=True, slots=True)
+class PlayerRegistered(Event):
+    member: discord.Member
+    entry: dict # Fiche enregistrée (jamais modifiée en place, voir PlayerRoster)
+
+
+@dataclass(frozen=True, slots=True)
+class MemberJoined(Event):
+    member: discord.Member
+
+
+@dataclass(frozen=True, slots=True)
+class TicketClosed(Event):
+    channel_id: int
+    channel_name: str
+    creator_id: int | None
+    closed_by: discord.abc.User
+    reason: str | None
+    via: str # 'bouton', 'commande', 'slash'
+
+
+@dataclass(frozen=True, slots=True)
+class EvaluationDecided(Event):
+    channel_id: int
+    member_id: int
+    approved: bool
+    decided_by: discord.abc.User
+    applied: bool # Rôles modifiés / membre expulsé avec succès
+
+
+@dataclass(frozen=True, slots=True)
+class StreamStarted(Event):
+    member: discord.Member
+    activity: discord.Streaming
+
+
+class Subscription:
+    """Un abonné : file bornée et worker dédié (un abonné lent ne retarde ni l'émetteur ni les autres abonnés)."""
+
+    def __init__(self, bus: 'EventBus', event_type: type[Event], handler, name: str, maxsize: int, policy: str):
+        if policy not in POLICIES: raise ValueError(f"Politique inconnue : {policy} ({', '.join(POLICIES)}).")
+        self.bus = bus
+        self.event_type = event_type
+        self.handler = handler
+        self.name = name
+        self.policy = policy
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.stats = Counter() # queued, handled, failed, dropped
+        self._worker: asyncio.Task | None = None
+
+    def __repr__(self) -> str:
+        return f"<Subscription {self.name} {self.event_type.__name__} {self.policy} {self.queue.qsize()}/{self.queue.maxsize}>"
+
+    def _start(self):
+        if self._worker is None or self._worker.done(): # Contexte vide : le worker survit à l'émetteur qui l'a démarré
+            self._worker = asyncio.get_running_loop().create_task(self._run(), name=f'event-bus:{self.name}', context=contextvars.Context())
+
+    def offer(self, event: Event) -> bool:
+        """Dépôt sans attente. False si la file est pleine et que la politique est BLOCK (à l'appelant d'attendre)."""
+        self._start()
+        if self.queue.full():
+            if self.policy == BLOCK: return False
+            self.stats['dropped'] += 1
+            if self.bus.warn_drop(self): logger.warning(f"File de l'abonné '{self.name}' pleine ({self.queue.maxsize}) : événements perdus ({self.policy}).")
+            if self.policy == DROP_NEW: return True
+            self.queue.get_nowait(); self.queue.task_done()
+        self.queue.put_nowait((event, contextvars.copy_context())); self.stats['queued'] += 1
+        return True
+
+    async def put(self, event: Event):
+        await self.queue.put((event, contextvars.copy_context())); self.stats['queued'] += 1
+
+    async def _run(self):
+        metrics = getattr(self.bus.bot, 'metrics', None)
+        loop = asyncio.get_running_loop()
+        while True:
+            event, context = await self.queue.get()
+            start = time.perf_counter(); failed = False
+            # Traité dans le contexte de l'émetteur (contextvars : traces, attribution des appels REST)
+            try: await loop.create_task(self.handler(event), name=f'event-bus:{self.name}:{type(event).__name__}', context=context)
+            except asyncio.CancelledError: raise
+            except Exception as e:
+                failed = True
+                logger.error(f"Erreur de l'abonné '{self.name}' sur {type(event).__name__}: {e}", exc_info=True)
+            finally:
+                self.queue.task_done()
+                self.stats['failed' if failed else 'handled'] += 1
+                if metrics: metrics.observe_listener(f'bus:{type(event).__name__}', self.name, time.perf_counter() - start, failed)
+
+
+class EventBus:
+    """Bus d'événements interne (pub/sub typé).
+
+    Les listeners gateway et callbacks d'interaction publient un événement et rendent la main ; les effets
+    secondaires lents (journaux, présentations, annonces) sont faits par les abonnés, chacun avec sa file
+    bornée et son worker. Un abonné reçoit les événements de son type et de ses sous-types.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.subscriptions: list[Subscription] = []
+        self._by_type: dict[type, list[Subscription]] = {}
+        self._drop_warned: dict[str, float] = {}
+        self.closed = False
+
+    def subscribe(self, event_type: type[Event], handler, *, name: str | None = None,
+                  maxsize: int = DEFAULT_QUEUE_SIZE, policy: str = DROP_OLDEST) -> Subscription:
+        """Abonne `async def handler(event)` aux événements `event_type` (noms uniques : un abonnement du même nom est remplacé)."""
+        name = name or getattr(handler, '__qualname__', repr(handler))
+        for existing in [s for s in self.subscriptions if s.name == name]: self.unsubscribe(existing)
+        subscription = Subscription(self, event_type, handler, name, maxsize, policy)
+        self.subscriptions.append(subscription); self._by_type.clear()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        if subscription in self.subscriptions: self.subscriptions.remove(subscription); self._by_type.clear()
+        if subscription._worker: subscription._worker.cancel()
+
+    def _subscribers(self, event_type: type) -> list[Subscription]:
+        subscribers = self._by_type.get(event_type)
+        if subscribers is None:
+            subscribers = self._by_type[event_type] = [s for s in self.subscriptions if issubclass(event_type, s.event_type)]
+        return subscribers
+
+    async def publish(self, event: Event) -> int:
+        """Dépose l'événement dans la file de chaque abonné et rend la main sans attendre les traitements.
+        Ne suspend l'appelant que si un abonné BLOCK a sa file pleine. Retourne le nombre d'abonnés servis."""
+        if self.closed: return 0
+        subscribers = self._subscribers(type(event))
+        for subscription in subscribers:
+            if not subscription.offer(event): await subscription.put(event)
+        return len(subscribers)
+
+    def warn_drop(self, subscription: Subscription, interval: float = 60.0) -> bool:
+        """Limite l'avertissement de perte à un par minute et par abonné."""
+        now = time.monotonic()
+        if now - self._drop_warned.get(subscription.name, 0.0) < interval: return False
+        self._drop_warned[subscription.name] = now
+        return True
+
+    async def close(self, timeout: float = CLOSE_TIMEOUT):
+        """Arrêt : plus de publication, les files en cours sont vidées (au plus `timeout` s), puis les workers arrêtés."""
+        self.closed = True
+        pending = [s.queue.join() for s in self.subscriptions if s._worker and not s._worker.done()]
+        if pending:
+            try: await asyncio.wait_for(asyncio.gather(*pending), timeout)
+            except asyncio.TimeoutError:
+                left = sum(s.queue.qsize() for s in self.subscriptions)
+                logger.warning(f"Bus d'événements : {left} événements non traités à l'arrêt (délai de {timeout}s dépassé).")
+        for subscription in self.subscriptions:
+            if subscription._worker: subscription._worker.cancel()
+
+    def prometheus(self) -> list[str]:
+        """Collecteur Prometheus (Metrics.collectors) : profondeur des files et compteurs par abonné."""
+        lines = ['# TYPE pur_event_bus_queue_depth gauge']
+        lines += [f'pur_event_bus_queue_depth{{subscriber="{s.name}"}} {s.queue.qsize()}' for s in self.subscriptions]
+        lines.append('# TYPE pur_event_bus_events_total counter')
+        lines += [f'pur_event_bus_events_total{{subscriber="{s.name}",outcome="{k}"}} {v}'
+                  for s in self.subscriptions for k, v in sorted(s.stats.items())]
+        return lines
+
+
+def get_event_bus(bot) -> EventBus:
+    """Retourne le bus d'événements attaché au bot (créé au premier appel)."""
+    bus = getattr(bot, 'event_bus', None)
+    if bus is None:
+        bus = bot.event_bus = EventBus(bot)
+        metrics = getattr(bot, 'metrics', None)
+        if metrics: metrics.collectors.append(bus.prometheus)
+    return bus
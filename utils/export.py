@@ -0,0 +1,69 @@
+# utils/export.py
+import csv
+import gzip
+import io
+import json
+import os
+
+# Colonnes exportées, dans l'ordre (clés de data/player_data.json)
+EXPORT_FIELDS = ('discord_id', 'discord_name', 'discord_display_name', 'nom_joueur', 'poste_principal', 'poste_secondaire',
+                 'disponibilites', 'competitions_jouees', 'ancien_club', 'experience')
+SIZE_MARGIN = 256 * 1024 # Octets gardés sous la limite : le compresseur garde des données en tampon avant de les écrire
+
+
+def _choices(value) -> list[str]:
+    return [c.strip().lower() for c in str(value or '').split(',')]
+
+
+def roster_rows(entries, position: str | None = None, day: str | None = None, competition: str | None = None):
+    """Générateur des joueurs filtrés ; `entries` : itérable de (id, données). Poste principal ou secondaire."""
+    position, day, competition = (v.strip().lower() if v else None for v in (position, day, competition))
+    for user_id, entry in entries:
+        if position and position not in (str(entry.get('poste_principal', '')).lower(), str(entry.get('poste_secondaire', '')).lower()): continue
+        if day and day not in _choices(entry.get('disponibilites')): continue
+        if competition and competition not in _choices(entry.get('competitions_jouees')): continue
+        yield {field: entry.get(field, user_id if field == 'discord_id' else '') for field in EXPORT_FIELDS}
+
+
+def _csv_lines(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    header = buffer.getvalue()
+    yield header, True
+    for row in rows:
+        buffer.seek(0); buffer.truncate()
+        writer.writerow(row)
+        yield buffer.getvalue(), False
+
+
+def _jsonl_lines(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n', False
+
+
+def write_export_parts(rows, fmt: str, directory: str, basename: str, max_bytes: int) -> list[tuple[str, int]]:
+    """Écrit les lignes en fichiers gzip d'au plus `max_bytes` chacun (l'en-tête CSV est répété dans chaque partie).
+
+    Bloquant : à appeler dans un thread (asyncio.to_thread). Une seule ligne est en mémoire à la fois.
+    Retourne [(chemin, nombre de joueurs)] ; une liste vide si aucun joueur ne correspond.
+    """
+    lines = _csv_lines(rows) if fmt == 'csv' else _jsonl_lines(rows)
+    limit = max(max_bytes - SIZE_MARGIN, 64 * 1024)
+    parts: list[tuple[str, int]] = []
+    header, raw, archive, count = '', None, None, 0
+
+    def close():
+        if archive: archive.close(); raw.close(); parts.append((raw.name, count))
+
+    for line, is_header in lines:
+        if is_header: header = line; continue
+        if archive is None or raw.tell() >= limit:
+            close()
+            raw = open(os.path.join(directory, f"{basename}-{len(parts) + 1}.{fmt}.gz"), 'wb')
+            archive = gzip.GzipFile(filename=f"{basename}.{fmt}", mode='wb', fileobj=raw)
+            count = 0
+            if header: archive.write(header.encode('utf-8'))
+        archive.write(line.encode('utf-8')); count += 1
+    close()
+    return parts
@@ -0,0 +1,278 @@
+# utils/guilds.py
+import discord
+from discord.ext import commands
+import asyncio
+import json
+import logging
+import os
+import threading
+from utils.members import has_any_role
+
+logger = logging.getLogger(__name__)
+
+GUILD_CONFIG_FILE = 'guild_config.json' # Dans le dossier de config_runtime.json (data/)
+
+
+# Clés lues via GuildConfig (les seules modifiables par /serveur definir) ; les autres réglages
+# (cache léger, métriques, journaux, intents, rafraîchissement des joueurs) sont propres au processus
+GUILD_CONFIG_KEYS = frozenset({
+    'ADMIN_ROLE_ID', 'VERIFIED_PLAYER_ROLE_ID', 'NEW_PLAYER_ROLE_ID', 'JOUEUR_TEST_ROLE_ID', 'JOUEUR_CLUB_ROLE_ID',
+    'RULES_CHANNEL_ID', 'RULES_MESSAGE_ID', 'REGISTRATION_CHANNEL_ID', 'PRESENTATION_CHANNEL_ID',
+    'ARRIVALS_CHANNEL_ID', 'DEPARTURES_CHANNEL_ID', 'AIDE_CHANNEL_ID', 'AUDIT_LOG_CHANNEL_ID',
+    'TICKET_CREATION_CHANNEL_ID', 'TICKET_CATEGORY_ID', 'TICKET_THREAD_PARENT_ID', 'TICKET_MODE',
+    'TICKET_STAFF_ROLE_IDS', 'TICKET_LOG_CHANNEL_ID',
+    'EVALUATION_CATEGORY_ID', 'EVALUATION_THREAD_PARENT_ID', 'EVALUATION_MODE', 'EVALUATION_STAFF_ROLE_IDS',
+    'STREAM_ANNOUNCE_CHANNEL_ID', 'STREAM_WATCH_ROLE_ID', 'STREAM_PING_ROLE_ID',
+})
+
+
+def is_guild_scoped(key: str) -> bool:
+    """IDs de salons, rôles, messages : propres à un serveur, jamais hérités du .env par les autres serveurs."""
+    return key.endswith(('_ID', '_IDS'))
+
+
+def parse_config_value(key: str, text: str):
+    """Valeur saisie par un admin -> valeur de config : '<#123>' -> 123, '1, <@&2>' -> [1, 2] (clés *_IDS)."""
+    digits = [''.join(c for c in part if c.isdigit()) for part in str(text).split(',')]
+    if key.endswith('_IDS'): return [int(d) for d in digits if d]
+    if key.endswith('_ID'):
+        if len(digits) != 1 or not digits[0]: raise ValueError(f"{key} attend un ID, une mention de salon ou de rôle.")
+        return int(digits[0])
+    value = str(text).strip()
+    return value.lower() if key.endswith('_MODE') else value
+
+
+class GuildConfig:
+    """Configuration d'un serveur servi par le bot.
+
+    Lecture : valeurs propres au serveur (guild_config.json), puis .env. Le serveur principal (GUILD_ID)
+    hérite de tout le .env ; les autres seulement des réglages généraux (modes, débits...), pas des IDs.
+    Les salons et rôles configurés sont résolus une fois puis gardés jusqu'à une invalidation
+    (création/suppression de salon ou de rôle, reconnexion).
+    """
+
+    def __init__(self, store: 'GuildConfigStore', guild_id: int, primary: bool):
+        self.store = store
+        self.bot = store.bot
+        self.guild_id = guild_id
+        self.primary = primary
+        self._resolved: dict[tuple[str, str], object] = {}
+
+    def __repr__(self) -> str:
+        return f"<GuildConfig guild_id={self.guild_id} primary={self.primary}>"
+
+    @property
+    def overrides(self) -> dict:
+        return self.store._data.get(str(self.guild_id), {}).get('config', {})
+
+    @property
+    def guild(self) -> discord.Guild | None:
+        return self.bot.get_guild(self.guild_id)
+
+    # --- Valeurs ---
+    def get(self, key: str, default=None):
+        if key in self.overrides: return self.overrides[key]
+        if key == 'GUILD_ID': return self.guild_id
+        if self.primary or not is_guild_scoped(key): return self.bot.config.get(key, default)
+        return default
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def set(self, **values):
+        """Enregistre des valeurs propres au serveur (None : retour à la valeur héritée)."""
+        overrides = self.store._entry(self.guild_id).setdefault('config', {})
+        for key, value in values.items():
+            if value is None: overrides.pop(key, None)
+            else: overrides[key] = value
+        self.invalidate()
+        self.store.save()
+
+    # --- Résolution (mémorisée) ---
+    def _resolve(self, kind: str, key: str, lookup):
+        cache_key = (kind, key)
+        if cache_key in self._resolved: return self._resolved[cache_key]
+        guild = self.guild
+        if guild is None: return None # Pas encore disponible : rien en cache
+        object_id = self.get(key)
+        resolved = lookup(guild, object_id) if object_id else None
+        self._resolved[cache_key] = resolved
+        return resolved
+
+    def channel(self, key: str) -> discord.abc.GuildChannel | discord.Thread | None:
+        return self._resolve('channel', key, lambda guild, cid: guild.get_channel_or_thread(cid))
+
+    def text_channel(self, key: str) -> discord.TextChannel | None:
+        channel = self.channel(key)
+        return channel if isinstance(channel, discord.TextChannel) else None
+
+    def role(self, key: str) -> discord.Role | None:
+        return self._resolve('role', key, lambda guild, rid: guild.get_role(rid))
+
+    def roles(self, key: str) -> list[discord.Role]:
+        """Rôles d'une clé *_IDS (IDs introuvables ignorés)."""
+        return self._resolve('roles', key, lambda guild, ids: [r for r in map(guild.get_role, ids) if r]) or []
+
+    def invalidate(self):
+        self._resolved.clear()
+
+    # --- Données et état propres au serveur ---
+    def data_path(self, path: str) -> str:
+        """Fichier de données du serveur : `path` tel quel pour le serveur principal (compatibilité),
+        sinon le même nom sous <dossier>/guilds/<id>/."""
+        if self.primary: return path
+        return os.path.join(os.path.dirname(path), 'guilds', str(self.guild_id), os.path.basename(path))
+
+    def read_state(self, key: str, default=None):
+        """État runtime (ID de panneau, points de reprise...). Serveur principal : config_runtime.json."""
+        if self.primary:
+            read = getattr(self.bot, 'read_runtime_config', None) # Absent hors PurEsportBot (bancs d'essai)
+            return read().get(key, default) if read else default
+        return self.store._data.get(str(self.guild_id), {}).get('state', {}).get(key, default)
+
+    def update_state(self, **values):
+        if self.primary:
+            update = getattr(self.bot, 'update_runtime_config', None)
+            return update(**values) if update else None
+        self.store._entry(self.guild_id).setdefault('state', {}).update(values)
+        self.store.save()
+
+    async def update_state_async(self, **values):
+        """Comme update_state, avec l'écriture du fichier hors de la boucle (asyncio.to_thread)."""
+        if self.primary:
+            update = getattr(self.bot, 'update_runtime_config', None)
+            return await asyncio.to_thread(update, **values) if update else None
+        self.store._entry(self.guild_id).setdefault('state', {}).update(values)
+        await self.store.save_async()
+
+
+class GuildConfigStore:
+    """Serveurs servis par le processus et leur configuration (data/guild_config.json).
+
+    Le serveur principal (GUILD_ID du .env) est toujours servi ; les autres le sont dès qu'ils ont une
+    entrée, ajoutée par la commande /serveur (ou dès l'arrivée du bot si AUTO_REGISTER_GUILDS est activé).
+    """
+
+    def __init__(self, bot, path: str | None):
+        self.bot = bot
+        self.path = path
+        self._data: dict[str, dict] = self._load()
+        self._views: dict[int, GuildConfig] = {}
+        self._save_lock = threading.Lock()
+        self._save_seq = self._saved_seq = 0 # Un instantané plus ancien que le fichier n'est jamais écrit
+        for event in ('on_guild_channel_create', 'on_guild_channel_delete', 'on_guild_role_create', 'on_guild_role_delete'):
+            bot.add_listener(self._on_guild_object_change, event)
+        bot.add_listener(self._on_guild_available, 'on_guild_available')
+        bot.add_listener(self._on_guild_join, 'on_guild_join')
+
+    # --- Persistance ---
+    def _load(self) -> dict:
+        if not self.path: return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f: return json.load(f)
+        except FileNotFoundError: return {}
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Erreur lecture {self.path}: {e}")
+            return {}
+
+    def save(self):
+        if not self.path: return
+        self._save_seq += 1
+        self._write(json.dumps(self._data, indent=4, ensure_ascii=False), self._save_seq)
+
+    async def save_async(self):
+        """Comme save : sérialisé sur la boucle (instantané cohérent), écrit dans un thread."""
+        if not self.path: return
+        self._save_seq += 1
+        await asyncio.to_thread(self._write, json.dumps(self._data, indent=4, ensure_ascii=False), self._save_seq)
+
+    def _write(self, text: str, seq: int):
+        with self._save_lock:
+            if seq < self._saved_seq: return
+            try:
+                with open(self.path + '.tmp', 'w', encoding='utf-8') as f: f.write(text)
+                os.replace(self.path + '.tmp', self.path); self._saved_seq = seq
+            except OSError as e: logger.error(f"Erreur d'écriture de {self.path}: {e}")
+
+    def _entry(self, guild_id: int) -> dict:
+        return self._data.setdefault(str(guild_id), {})
+
+    # --- Serveurs servis ---
+    @property
+    def primary_id(self) -> int | None:
+        return self.bot.config.get('GUILD_ID')
+
+    def guild_ids(self) -> list[int]:
+        ids = [self.primary_id] if self.primary_id else []
+        return ids + [int(gid) for gid in self._data if int(gid) != self.primary_id]
+
+    def serves(self, guild_id: int | None) -> bool:
+        return bool(guild_id) and (guild_id == self.primary_id or str(guild_id) in self._data)
+
+    def get(self, guild_id: int | None) -> GuildConfig | None:
+        """Configuration du serveur, ou None s'il n'est pas servi."""
+        if not self.serves(guild_id): return None
+        view = self._views.get(guild_id)
+        if view is None: view = self._views[guild_id] = GuildConfig(self, guild_id, primary=guild_id == self.primary_id)
+        return view
+
+    def all(self) -> list[GuildConfig]:
+        return [self.get(gid) for gid in self.guild_ids()]
+
+    def register(self, guild_id: int) -> GuildConfig:
+        if not self.serves(guild_id):
+            self._entry(guild_id); self.save()
+            logger.info(f"Serveur {guild_id} ajouté aux serveurs servis ({len(self.guild_ids())} au total).")
+        return self.get(guild_id)
+
+    # --- Invalidation des résolutions ---
+    async def _on_guild_object_change(self, obj):
+        view = self._views.get(obj.guild.id)
+        if view: view.invalidate()
+
+    async def _on_guild_available(self, guild: discord.Guild):
+        view = self._views.get(guild.id) # Reconnexion : nouveaux objets Guild/salons/rôles
+        if view: view.invalidate()
+
+    async def _on_guild_join(self, guild: discord.Guild):
+        if self.serves(guild.id): return
+        if not (getattr(self.bot, 'config', None) or {}).get('AUTO_REGISTER_GUILDS'):
+            logger.info(f"Bot ajouté au serveur {guild.name} ({guild.id}) : non servi tant qu'un administrateur "
+                        f"ne l'enregistre pas (!serveur definir, ou AUTO_REGISTER_GUILDS=1).")
+            return
+        self.register(guild.id)
+        await self.sync_commands()
+
+    async def sync_commands(self):
+        """Publie les commandes slash sur les serveurs servis (après l'ajout d'un serveur)."""
+        sync = getattr(self.bot, 'sync_app_commands', None)
+        if sync: await sync()
+
+
+def get_guild_configs(bot) -> GuildConfigStore:
+    """Retourne le registre des serveurs attaché au bot (créé au premier appel)."""
+    store = getattr(bot, 'guild_configs', None)
+    if store is None:
+        runtime_path = getattr(bot, 'runtime_config_path', None)
+        path = os.path.join(os.path.dirname(runtime_path) or '.', GUILD_CONFIG_FILE) if runtime_path else None
+        store = bot.guild_configs = GuildConfigStore(bot, path)
+    return store
+
+
+def guild_config(bot, guild: discord.abc.Snowflake | int | None) -> GuildConfig | None:
+    """Configuration du serveur (objet Guild ou ID), None si le bot ne le sert pas."""
+    return get_guild_configs(bot).get(guild if isinstance(guild, int) or guild is None else guild.id)
+
+
+def has_config_role(key: str):
+    """Check de commande : l'auteur a le rôle configuré sous `key` pour ce serveur (remplace commands.has_role
+    sur un ID du .env, figé au chargement et valable pour le seul serveur principal)."""
+    def predicate(ctx: commands.Context) -> bool:
+        config = guild_config(ctx.bot, ctx.guild)
+        role_id = config.get(key) if config else None
+        if role_id and has_any_role(ctx.author, [role_id]): return True
+        raise commands.MissingRole(role_id or key)
+    return commands.check(predicate)
+
+
+admin_only = has_config_role('ADMIN_ROLE_ID')
@@ -0,0 +1,35 @@
+# utils/locks.py
+import asyncio
+from contextlib import asynccontextmanager
+
+
+class KeyedLock:
+    """Verrous asyncio indexés par clé (salon, membre...).
+
+    Deux clés différentes ne se bloquent jamais ; le verrou d'une clé est oublié
+    dès que plus personne ne le détient ni ne l'attend.
+    """
+
+    def __init__(self):
+        self._locks: dict = {}
+        self._waiters: dict = {}
+
+    def locked(self, key) -> bool:
+        lock = self._locks.get(key)
+        return bool(lock and lock.locked())
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    @asynccontextmanager
+    async def __call__(self, key):
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+                del self._locks[key]
@@ -0,0 +1,133 @@
+# utils/logs.py
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+
+TEXT_FORMAT = '%(asctime)s:%(levelname)s:%(name)s: %(message)s'
+JSON_MAX_BYTES = 10 * 2**20 # Rotation du fichier JSON
+JSON_BACKUPS = 5
+_STANDARD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler qui ne formate pas dans le thread appelant : message, arguments et traceback
+    sont formatés par le thread du QueueListener, hors de la boucle asyncio."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """Garde 1 enregistrement sur N (INFO et moins) pour les loggers bavards, et leurs enfants.
+    Les avertissements et erreurs passent toujours."""
+
+    def __init__(self, rates: dict[str, int]):
+        super().__init__()
+        self.rates = {name: rate for name, rate in rates.items() if rate > 1}
+        self._seen: dict[str, int] = {}
+
+    def _rate(self, name: str) -> int:
+        while name:
+            if name in self.rates: return self.rates[name]
+            name = name.rpartition('.')[0]
+        return 1
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates: return True
+        rate = self._rate(record.name)
+        if rate == 1: return True
+        seen = self._seen[record.name] = self._seen.get(record.name, 0) + 1
+        return seen % rate == 1
+
+
+class RateLimitFilter(logging.Filter):
+    """Limite chaque message (logger + gabarit non formaté) à `per_minute` occurrences par minute,
+    en dessous de ERROR. Le premier message qui repasse indique combien ont été supprimés."""
+
+    def __init__(self, per_minute: int):
+        super().__init__()
+        self.per_minute = per_minute
+        self._windows: dict[tuple[str, object], list] = {} # clé -> [début de fenêtre, émis, supprimés]
+        self._lock = threading.Lock() # Les threads (to_thread, watchdog) journalisent aussi
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR or self.per_minute <= 0: return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= 60:
+                suppressed = window[2] if window else 0
+                window = self._windows[key] = [now, 0, 0]
+                if suppressed: record.suppressed = suppressed
+            if window[1] >= self.per_minute:
+                window[2] += 1
+                return False
+            window[1] += 1
+            if len(self._windows) > 10000: self._windows.clear() # Gabarits dynamiques (f-strings) : borne la mémoire
+        return True
+
+
+class SuppressedFormatter(logging.Formatter):
+    """Format texte ; ajoute le nombre de messages identiques supprimés par la limitation."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        return f"{text} [{suppressed} messages similaires supprimés]" if suppressed else text
+
+
+class JsonFormatter(logging.Formatter):
+    """Une ligne JSON par enregistrement : horodatage, niveau, logger, message, exception et champs `extra`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {'ts': record.created, 'level': record.levelname, 'logger': record.name, 'message': record.getMessage(),
+                'thread': record.threadName}
+        if record.exc_info: data['exception'] = self.formatException(record.exc_info)
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and not key.startswith('_'):
+                data[key] = value if isinstance(value, (str, int, float, bool, type(None))) else repr(value)
+        return json.dumps(data, ensure_ascii=False)
+
+
+def parse_sampling(value: str | None) -> dict[str, int]:
+    """'cogs.stream_notifier=10,discord.gateway=5' -> {'cogs.stream_notifier': 10, 'discord.gateway': 5}."""
+    rates = {}
+    for part in (value or '').split(','):
+        name, _, rate = part.strip().partition('=')
+        if name and rate.strip().isdigit(): rates[name] = int(rate)
+    return rates
+
+
+def setup_logging(level: str | int = logging.INFO, json_path: str | None = None, sampling: dict[str, int] | None = None,
+                  per_minute: int = 0, stream=None) -> logging.handlers.QueueListener:
+    """Journalisation non bloquante : le logger racine ne fait que filtrer puis mettre en file ;
+    un thread QueueListener formate et écrit (stderr en texte, fichier JSON tournant optionnel).
+    Retourne le listener (arrêté automatiquement à la sortie du processus)."""
+    log_queue = queue.SimpleQueue()
+    handler = DeferredQueueHandler(log_queue)
+    if sampling: handler.addFilter(SamplingFilter(sampling))
+    if per_minute: handler.addFilter(RateLimitFilter(per_minute))
+
+    console = logging.StreamHandler(stream or sys.stderr)
+    console.setFormatter(SuppressedFormatter(TEXT_FORMAT))
+    outputs = [console]
+    if json_path:
+        json_file = logging.handlers.RotatingFileHandler(json_path, maxBytes=JSON_MAX_BYTES, backupCount=JSON_BACKUPS, encoding='utf-8')
+        json_file.setFormatter(JsonFormatter())
+        outputs.append(json_file)
+
+    root = logging.getLogger()
+    for old in list(root.handlers): root.removeHandler(old)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(log_queue, *outputs, respect_handler_level=True)
+    listener.start()
+    atexit.register(lambda: listener._thread and listener.stop()) # Vide la file avant la sortie (si pas déjà arrêté)
+    return listener
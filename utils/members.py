@@ -0,0 +1,218 @@
+# utils/members.py
+import discord
+import logging
+import asyncio
+import time
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+QUERY_CHUNK_SIZE = 100 # Maximum de user_ids par requête gateway (REQUEST_GUILD_MEMBERS)
+MAX_CACHED_MEMBERS = 5000 # Plafond du cache TTL (en mode cache léger, il remplace le cache gateway)
+
+
+def member_cache_flags_from_config(value: str | None) -> discord.MemberCacheFlags:
+    """Construit les MemberCacheFlags depuis une liste 'joined,voice' ('none' ou vide = aucun, 'all' = tous)."""
+    names = {part.strip().lower() for part in (value or '').split(',') if part.strip()}
+    if 'all' in names: return discord.MemberCacheFlags.all()
+    flags = discord.MemberCacheFlags.none()
+    for name in names - {'none'}:
+        if name in discord.MemberCacheFlags.VALID_FLAGS: setattr(flags, name, True)
+        else: logger.warning(f"Flag de cache membres inconnu ignoré: '{name}'")
+    return flags
+
+
+def member_role_ids(user) -> set[int]:
+    """IDs des rôles d'un Member (vide pour un User hors serveur)."""
+    return {role.id for role in getattr(user, 'roles', ())}
+
+
+def has_any_role(user, role_ids) -> bool:
+    """Vrai si l'utilisateur possède au moins un des rôles donnés (IDs None ignorés)."""
+    wanted = {rid for rid in role_ids if rid}
+    return bool(wanted and member_role_ids(user) & wanted)
+
+
+class MemberResolver:
+    """Résolution des membres partagée par tous les Cogs.
+
+    Ordre : cache gateway -> cache TTL des fetch -> cache négatif (membres partis) -> fetch REST.
+    Les résolutions simultanées d'un même ID partagent un seul fetch.
+    """
+
+    def __init__(self, bot, ttl: float = 300.0, negative_ttl: float = 600.0, max_entries: int = MAX_CACHED_MEMBERS):
+        self.bot = bot
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._cache: dict[tuple[int, int], tuple[float, discord.Member]] = {}
+        self._negative: dict[tuple[int, int], float] = {}
+        self._inflight: dict[tuple[int, int], asyncio.Future] = {}
+        self.stats: Counter = Counter()
+        bot.add_listener(self._on_member_join, 'on_member_join')
+        # Version brute : aussi reçue pour les membres absents du cache gateway (mode cache léger)
+        bot.add_listener(self._on_raw_member_remove, 'on_raw_member_remove')
+
+    # --- Invalidation ---
+    async def _on_member_join(self, member: discord.Member):
+        self._negative.pop((member.guild.id, member.id), None)
+
+    async def _on_raw_member_remove(self, payload: discord.RawMemberRemoveEvent):
+        self.forget(payload.guild_id, payload.user.id, departed=True)
+
+    def forget(self, guild_id: int, user_id: int, departed: bool = False):
+        """Oublie un membre ; departed=True l'ajoute au cache négatif."""
+        key = (guild_id, user_id)
+        self._cache.pop(key, None)
+        if departed: self._negative[key] = time.monotonic() + self.negative_ttl
+        else: self._negative.pop(key, None)
+
+    def is_departed(self, guild_id: int, user_id: int) -> bool:
+        """Vrai si le membre est connu comme absent du serveur (cache négatif encore valide)."""
+        return self._negative.get((guild_id, user_id), 0) > time.monotonic()
+
+    def _remember(self, key: tuple[int, int], member: discord.Member | None):
+        if member is None: self._negative[key] = time.monotonic() + self.negative_ttl
+        else:
+            self._cache[key] = (time.monotonic() + self.ttl, member)
+            self._negative.pop(key, None)
+            if len(self._cache) > self.max_entries: self._prune()
+
+    def _prune(self):
+        """Retire les entrées expirées, puis les plus anciennes si le plafond est encore dépassé."""
+        now = time.monotonic()
+        for key in [k for k, (expires, _) in self._cache.items() if expires <= now]: del self._cache[key]
+        for key in list(self._cache)[:max(0, len(self._cache) - self.max_entries)]: del self._cache[key]
+        for key in [k for k, expires in self._negative.items() if expires <= now]: del self._negative[key]
+
+    def _lookup(self, guild: discord.Guild, user_id: int) -> tuple[bool, discord.Member | None]:
+        """Résolution sans réseau. Retourne (trouvé, membre) ; trouvé=True et membre=None = parti."""
+        member = guild.get_member(user_id)
+        if member:
+            self.stats['cache_hits'] += 1
+            return True, member
+        key = (guild.id, user_id); now = time.monotonic()
+        cached = self._cache.get(key)
+        if cached:
+            if cached[0] > now:
+                self.stats['ttl_hits'] += 1
+                return True, cached[1]
+            del self._cache[key]
+        expires = self._negative.get(key)
+        if expires:
+            if expires > now:
+                self.stats['negative_hits'] += 1
+                return True, None
+            del self._negative[key]
+        return False, None
+
+    # --- Résolution ---
+    async def get(self, guild: discord.Guild, user_id: int) -> discord.Member | None:
+        """Retourne le membre, ou None s'il n'est pas (plus) sur le serveur."""
+        found, member = self._lookup(guild, user_id)
+        if found: return member
+
+        key = (guild.id, user_id)
+        future = self._inflight.get(key)
+        if future:
+            self.stats['shared_fetches'] += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            member = await self._fetch(guild, user_id)
+            future.set_result(member)
+            return member
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception() # Marque l'exception comme lue si personne n'attendait
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def _fetch(self, guild: discord.Guild, user_id: int) -> discord.Member | None:
+        self.stats['fetches'] += 1
+        try:
+            member = await guild.fetch_member(user_id)
+        except discord.NotFound:
+            self.stats['not_found'] += 1
+            member = None
+        except discord.HTTPException as e:
+            self.stats['errors'] += 1
+            logger.warning(f"Erreur HTTP fetch membre {user_id}: {e}")
+            return None # Pas de mise en cache négative sur une erreur transitoire
+        self._remember((guild.id, user_id), member)
+        return member
+
+    async def get_many(self, guild: discord.Guild, user_ids) -> dict[int, discord.Member]:
+        """Résout plusieurs membres ; les absents du cache passent par query_members par paquets de 100."""
+        resolved: dict[int, discord.Member] = {}
+        missing: list[int] = []
+        for user_id in dict.fromkeys(user_ids):
+            found, member = self._lookup(guild, user_id)
+            if member: resolved[user_id] = member
+            elif not found: missing.append(user_id)
+        if not missing: return resolved
+
+        if not self.bot.intents.members or self.bot.ws is None:
+            # Pas de gateway (ou intent absent) : fetch individuels, dédupliqués
+            members = await asyncio.gather(*(self.get(guild, uid) for uid in missing))
+            resolved.update({uid: m for uid, m in zip(missing, members) if m})
+            return resolved
+
+        for start in range(0, len(missing), QUERY_CHUNK_SIZE):
+            chunk = missing[start:start + QUERY_CHUNK_SIZE]
+            self.stats['batch_queries'] += 1
+            try:
+                members = await guild.query_members(user_ids=chunk, limit=len(chunk), cache=False)
+            except (asyncio.TimeoutError, discord.ClientException) as e:
+                self.stats['errors'] += 1
+                logger.warning(f"query_members échoué ({len(chunk)} IDs): {e}")
+                continue
+            by_id = {m.id: m for m in members}
+            for user_id in chunk:
+                member = by_id.get(user_id)
+                self._remember((guild.id, user_id), member)
+                if member: resolved[user_id] = member
+                else: self.stats['not_found'] += 1
+        return resolved
+
+    async def search(self, guild: discord.Guild, text: str, role: discord.Role | None = None, limit: int = 25) -> list[discord.Member]:
+        """Recherche par nom pour l'autocomplétion (réponse attendue en moins de 3 s).
+        Serveur chunké : filtre du cache ; sinon requête gateway par préfixe de nom (rien si texte vide)."""
+        text = text.strip().lower()
+        if guild.chunked:
+            pool = role.members if role else guild.members
+        else:
+            if not text or self.bot.ws is None: return []
+            try: pool = await asyncio.wait_for(guild.query_members(query=text, limit=100, cache=False), timeout=2.0)
+            except (asyncio.TimeoutError, discord.ClientException): return []
+            if role: pool = [m for m in pool if m.get_role(role.id)]
+        matches = []
+        for member in pool:
+            if not text or text in member.display_name.lower() or text in member.name.lower():
+                matches.append(member)
+                if len(matches) >= limit: break
+        return matches
+
+    async def role_members(self, guild: discord.Guild, role: discord.Role) -> list[discord.Member]:
+        """Membres ayant un rôle. Sans chunking (mode cache léger), role.members est incomplet :
+        la liste des membres est alors parcourue par l'API (pagination de 1000) sans être mise en cache."""
+        if guild.chunked: return role.members
+        members = []
+        async for member in guild.fetch_members(limit=None):
+            if member.get_role(role.id): members.append(member)
+        self.stats['member_scans'] += 1
+        return members
+
+
+def get_member_resolver(bot) -> MemberResolver:
+    """Retourne le résolveur attaché au bot (créé au premier appel)."""
+    resolver = getattr(bot, 'member_resolver', None)
+    if resolver is None:
+        resolver = bot.member_resolver = MemberResolver(bot)
+    return resolver
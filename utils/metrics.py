@@ -0,0 +1,216 @@
+# utils/metrics.py
+import aiohttp
+import bisect
+import logging
+import re
+import time
+from collections import Counter, OrderedDict, deque
+
+from utils.startup import lazy_import, lazy_imports_enabled
+
+web = lazy_import('aiohttp.web', enabled=lazy_imports_enabled()) # Chargé seulement si l'endpoint /metrics est démarré
+
+logger = logging.getLogger(__name__)
+
+# Bornes (secondes) des histogrammes de latence
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MAX_PENDING_INTERACTIONS = 1000 # Interactions reçues en attente d'accusé de réception
+
+# Normalisation des URLs REST en routes : IDs et jetons remplacés, pour borner le nombre de séries
+_TOKEN_ROUTE = re.compile(r'/(interactions|webhooks)/(\d+)/[^/]+')
+_SNOWFLAKE = re.compile(r'/\d{15,21}(?=/|$)')
+_REACTION = re.compile(r'/reactions/[^/]+')
+
+
+def normalize_route(path: str) -> str:
+    """'/api/v10/channels/123.../messages/456...' -> '/channels/{id}/messages/{id}'."""
+    path = path.split('/api/v', 1)[-1]
+    path = path[path.index('/'):] if '/' in path else path
+    path = _TOKEN_ROUTE.sub(r'/\1/{id}/{token}', path)
+    path = _REACTION.sub('/reactions/{emoji}', path)
+    return _SNOWFLAKE.sub('/{id}', path)
+
+
+class Histogram:
+    """Histogramme cumulatif au sens Prometheus (compteurs par borne supérieure, somme, total)."""
+    __slots__ = ('buckets', 'counts', 'sum', 'count', 'max')
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1) # Dernière case : +Inf
+        self.sum = 0.0; self.count = 0; self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value; self.count += 1
+        if value > self.max: self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Estimation par la borne du bucket (suffisant pour repérer les chemins lents)."""
+        if not self.count: return 0.0
+        rank = q * self.count; seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank: return min(bound, self.max)
+        return self.max
+
+    def prometheus(self, name: str, labels: str = '') -> list[str]:
+        sep = ',' if labels else ''
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels}{sep}le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {self.count}')
+        suffix = f'{{{labels}}}' if labels else ''
+        lines.append(f'{name}_sum{suffix} {self.sum:.6f}')
+        lines.append(f'{name}_count{suffix} {self.count}')
+        return lines
+
+
+class WindowedHistogram:
+    """Histogramme glissant sur les `window` dernières secondes, découpé en `slices` tranches de temps :
+    la tranche la plus ancienne sort de la fenêtre à mesure que le temps avance (vue récente pour !perf ;
+    Prometheus garde l'histogramme cumulatif)."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS, window: float = 300.0, slices: int = 10, clock=time.monotonic):
+        self.buckets = tuple(buckets)
+        self.window = window
+        self.slices = slices
+        self.slice_seconds = window / slices
+        self.clock = clock
+        self._slices: deque[tuple[int, Histogram]] = deque(maxlen=slices) # (numéro de tranche, histogramme)
+
+    def observe(self, value: float):
+        number = int(self.clock() // self.slice_seconds)
+        if not self._slices or self._slices[-1][0] != number: self._slices.append((number, Histogram(self.buckets)))
+        self._slices[-1][1].observe(value)
+
+    def snapshot(self) -> Histogram:
+        """Observations de la fenêtre (à une tranche près), fusionnées en un Histogram."""
+        oldest = int(self.clock() // self.slice_seconds) - self.slices + 1
+        merged = Histogram(self.buckets)
+        for number, histogram in self._slices:
+            if number < oldest: continue
+            merged.counts = [a + b for a, b in zip(merged.counts, histogram.counts)]
+            merged.sum += histogram.sum; merged.count += histogram.count; merged.max = max(merged.max, histogram.max)
+        return merged
+
+
+def _label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+
+
+class Metrics:
+    """Métriques du bot : événements gateway, durée des listeners, appels REST et accusés d'interactions.
+
+    Alimenté par PurEsportBot (dispatch/_run_event) et par un aiohttp.TraceConfig sur la session REST.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.events: Counter = Counter()                     # événement -> nombre reçus
+        self.listeners: dict[tuple[str, str], Histogram] = {} # (événement, listener) -> durées
+        self.listener_errors: Counter = Counter()
+        self.rest_calls: Counter = Counter()                 # (méthode, route, statut) -> nombre
+        self.rest_latency: dict[tuple[str, str], Histogram] = {}
+        self.interaction_ack = Histogram()
+        self._pending_interactions: OrderedDict[int, float] = OrderedDict()
+        self.collectors = [] # Fonctions () -> list[str] ajoutant des lignes Prometheus (résolveur, watchdog...)
+
+    # --- Alimentation ---
+    def observe_listener(self, event: str, listener: str, seconds: float, failed: bool = False):
+        key = (event, listener)
+        histogram = self.listeners.get(key)
+        if histogram is None: histogram = self.listeners[key] = Histogram()
+        histogram.observe(seconds)
+        if failed: self.listener_errors[key] += 1
+
+    def interaction_received(self, interaction_id: int):
+        self._pending_interactions[interaction_id] = time.perf_counter()
+        if len(self._pending_interactions) > MAX_PENDING_INTERACTIONS: self._pending_interactions.popitem(last=False)
+
+    def observe_rest(self, method: str, url_path: str, status: int, seconds: float):
+        route = normalize_route(url_path)
+        self.rest_calls[(method, route, status)] += 1
+        key = (method, route)
+        histogram = self.rest_latency.get(key)
+        if histogram is None: histogram = self.rest_latency[key] = Histogram()
+        histogram.observe(seconds)
+        if route == '/interactions/{id}/{token}/callback':
+            # Accusé de réception : de la réception de l'interaction à la fin du POST callback
+            interaction_id = int(url_path.split('/interactions/', 1)[1].split('/', 1)[0])
+            received = self._pending_interactions.pop(interaction_id, None)
+            if received is not None: self.interaction_ack.observe(time.perf_counter() - received)
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        """TraceConfig à passer à discord.Client(http_trace=...) : une mesure par tentative HTTP (429 compris)."""
+        trace = aiohttp.TraceConfig()
+
+        async def on_request_start(session, context, params):
+            context.start = time.perf_counter()
+
+        async def on_request_end(session, context, params):
+            self.observe_rest(params.method, params.url.path, params.response.status, time.perf_counter() - context.start)
+
+        async def on_request_exception(session, context, params):
+            self.observe_rest(params.method, params.url.path, 0, time.perf_counter() - context.start) # 0 = erreur réseau
+
+        trace.on_request_start.append(on_request_start)
+        trace.on_request_end.append(on_request_end)
+        trace.on_request_exception.append(on_request_exception)
+        return trace
+
+    # --- Exposition ---
+    def prometheus(self) -> str:
+        """Format texte Prometheus (version 0.0.4)."""
+        lines = ['# TYPE pur_uptime_seconds gauge', f'pur_uptime_seconds {time.time() - self.started:.0f}',
+                 '# TYPE pur_gateway_events_total counter']
+        lines += [f'pur_gateway_events_total{{event="{_label(e)}"}} {n}' for e, n in sorted(self.events.items())]
+        lines.append('# TYPE pur_listener_duration_seconds histogram')
+        for (event, listener), histogram in sorted(self.listeners.items()):
+            lines += histogram.prometheus('pur_listener_duration_seconds', f'event="{_label(event)}",listener="{_label(listener)}"')
+        lines.append('# TYPE pur_listener_errors_total counter')
+        lines += [f'pur_listener_errors_total{{event="{_label(e)}",listener="{_label(l)}"}} {n}' for (e, l), n in sorted(self.listener_errors.items())]
+        lines.append('# TYPE pur_rest_requests_total counter')
+        lines += [f'pur_rest_requests_total{{method="{m}",route="{_label(r)}",status="{s}"}} {n}' for (m, r, s), n in sorted(self.rest_calls.items())]
+        lines.append('# TYPE pur_rest_duration_seconds histogram')
+        for (method, route), histogram in sorted(self.rest_latency.items()):
+            lines += histogram.prometheus('pur_rest_duration_seconds', f'method="{method}",route="{_label(route)}"')
+        lines.append('# TYPE pur_interaction_ack_seconds histogram')
+        lines += self.interaction_ack.prometheus('pur_interaction_ack_seconds')
+        for collector in self.collectors:
+            try: lines += collector()
+            except Exception as e: logger.error(f"Erreur collecteur de métriques {collector}: {e}")
+        return "\n".join(lines) + "\n"
+
+
+def resolver_collector(resolver):
+    """Collecteur Prometheus pour les statistiques du MemberResolver."""
+    def collect() -> list[str]:
+        lines = ['# TYPE pur_member_resolver_total counter']
+        lines += [f'pur_member_resolver_total{{outcome="{k}"}} {v}' for k, v in sorted(resolver.stats.items())]
+        return lines
+    return collect
+
+
+class MetricsServer:
+    """Petit serveur HTTP local (aiohttp.web) exposant /metrics."""
+
+    def __init__(self, metrics: Metrics, host: str = '127.0.0.1', port: int = 9108):
+        self.metrics = metrics; self.host = host; self.port = port
+        self._runner = None
+
+    async def start(self):
+        async def handle(request):
+            return web.Response(text=self.metrics.prometheus(), content_type='text/plain', charset='utf-8',
+                                headers={'X-Content-Type-Options': 'nosniff'})
+
+        app = web.Application()
+        app.router.add_get('/metrics', handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"Endpoint métriques : http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._runner: await self._runner.cleanup(); self._runner = None
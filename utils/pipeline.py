@@ -0,0 +1,176 @@
+# utils/pipeline.py
+import asyncio
+import discord
+import logging
+import time
+from utils.events import MemberJoined, get_event_bus
+from utils.guilds import guild_config
+
+logger = logging.getLogger(__name__)
+
+STAGE_TIMEOUT = 3.0 # Au-delà, une étape continue en arrière-plan et les suivantes s'exécutent sans elle
+MAX_EMBEDS = 10 # Par message (limite Discord)
+
+
+class MemberContext:
+    """Contexte partagé par les étapes d'un passage dans le pipeline : membre, serveur, config résolue
+    une seule fois, et actions sortantes (rôles, messages) regroupées puis envoyées par le pipeline."""
+
+    def __init__(self, bot, kind: str, guild: discord.Guild, member: discord.Member | discord.User):
+        self.bot = bot
+        self.kind = kind # 'join' ou 'leave'
+        self.guild = guild
+        self.member = member
+        self.config = guild_config(bot, guild) # Config du serveur (salons et rôles résolus une seule fois)
+        self.data: dict = {} # Valeurs calculées par une étape pour les suivantes
+        self._roles_add: dict[int, discord.Role] = {}
+        self._roles_remove: dict[int, discord.Role] = {}
+        self._reasons: list[str] = []
+        self._messages: list[tuple[discord.abc.Messageable, dict]] = []
+
+    # --- Résolution (mémorisée par GuildConfig) ---
+    def channel(self, key: str) -> discord.TextChannel | None:
+        """Salon texte configuré sous `key` (ex. 'ARRIVALS_CHANNEL_ID'), ou None."""
+        return self.config.text_channel(key)
+
+    def mention(self, key: str, fallback: str) -> str:
+        """Mention du salon configuré, ou `#fallback` en texte s'il est introuvable."""
+        channel = self.channel(key)
+        return channel.mention if channel else f"`#{fallback}`"
+
+    def role(self, key: str) -> discord.Role | None:
+        return self.config.role(key)
+
+    # --- Actions sortantes ---
+    def add_role(self, role: discord.Role, reason: str):
+        self._roles_remove.pop(role.id, None); self._roles_add[role.id] = role
+        if reason not in self._reasons: self._reasons.append(reason)
+
+    def remove_role(self, role: discord.Role, reason: str):
+        self._roles_add.pop(role.id, None); self._roles_remove[role.id] = role
+        if reason not in self._reasons: self._reasons.append(reason)
+
+    def send(self, channel: discord.abc.Messageable, content: str | None = None, embed: discord.Embed | None = None, **kwargs):
+        """Message à envoyer ; ceux d'un même salon sans vue ni autre option sont fusionnés (un seul POST)."""
+        if not kwargs and self._messages:
+            last_channel, last = self._messages[-1]
+            if last_channel is channel and set(last) <= {'content', 'embeds'} and len(last['embeds']) + bool(embed) <= MAX_EMBEDS:
+                if content: last['content'] = f"{last['content']}\n{content}" if last['content'] else content
+                if embed: last['embeds'].append(embed)
+                return
+        self._messages.append((channel, {'content': content, 'embeds': [embed] if embed else [], **kwargs}))
+
+    def _take_actions(self) -> tuple[dict, dict, list, list]:
+        actions = (self._roles_add, self._roles_remove, self._reasons, self._messages)
+        self._roles_add, self._roles_remove, self._reasons, self._messages = {}, {}, [], []
+        return actions
+
+
+class MemberPipeline:
+    """Pipeline d'arrivée ('join') ou de départ ('leave') des membres des serveurs servis.
+
+    Un seul listener gateway ; les Cogs y inscrivent des étapes ordonnées `async def etape(ctx)`
+    qui préparent des actions sur le MemberContext. Les rôles sont dédoublonnés (un appel par rôle
+    réellement modifié), les messages d'un même salon fusionnés, puis tout est envoyé en parallèle.
+    Chaque étape est chronométrée (bot.metrics) ; une étape qui dépasse `stage_timeout` ne retarde
+    pas les autres, et ses actions sont envoyées en arrière-plan quand elle se termine.
+    """
+
+    EVENTS = {'join': 'on_member_join', 'leave': 'on_raw_member_remove'}
+
+    def __init__(self, bot, kind: str, stage_timeout: float = STAGE_TIMEOUT):
+        self.bot = bot
+        self.kind = kind
+        self.stage_timeout = stage_timeout
+        self.stages: list[tuple[int, str, object]] = []
+        self._late_flushes: set[asyncio.Task] = set() # Références fortes (voir run)
+        bot.add_listener(self._on_member_join if kind == 'join' else self._on_raw_member_remove, self.EVENTS[kind])
+
+    def add_stage(self, name: str, callback, order: int = 100):
+        """Inscrit (ou remplace) une étape ; ordre croissant, puis ordre d'inscription."""
+        self.remove_stage(name)
+        self.stages.append((order, name, callback))
+        self.stages.sort(key=lambda stage: stage[0])
+
+    def remove_stage(self, name: str):
+        self.stages = [stage for stage in self.stages if stage[1] != name]
+
+    # --- Entrées gateway ---
+    async def _on_member_join(self, member: discord.Member):
+        if not guild_config(self.bot, member.guild): return
+        await get_event_bus(self.bot).publish(MemberJoined(member.guild.id, member=member)) # Abonnés hors pipeline (sans délai pour lui)
+        await self.run(member.guild, member)
+
+    async def _on_raw_member_remove(self, payload: discord.RawMemberRemoveEvent):
+        # payload.user : Member si le membre était en cache, sinon User (mode cache léger)
+        if not guild_config(self.bot, payload.guild_id): return
+        guild = self.bot.get_guild(payload.guild_id)
+        if guild: await self.run(guild, payload.user)
+
+    # --- Exécution ---
+    async def run(self, guild: discord.Guild, member: discord.Member | discord.User) -> MemberContext:
+        ctx = MemberContext(self.bot, self.kind, guild, member)
+        late = []
+        for _, name, callback in list(self.stages):
+            task = asyncio.ensure_future(self._timed(name, callback, ctx))
+            done, _ = await asyncio.wait({task}, timeout=self.stage_timeout)
+            if not done:
+                logger.warning(f"Étape '{name}' du pipeline {self.kind} lente (> {self.stage_timeout}s) pour {member} : les suivantes continuent sans elle.")
+                late.append(task)
+        await self._timed('flush', self._flush, ctx)
+        if late: # Les actions des étapes lentes partent quand elles se terminent, sans retenir le listener
+            task = asyncio.create_task(self._flush_late(late, ctx), name=f'member-{self.kind}-late-flush')
+            self._late_flushes.add(task); task.add_done_callback(self._late_flushes.discard)
+        return ctx
+
+    async def _flush_late(self, late: list[asyncio.Task], ctx: MemberContext):
+        await asyncio.gather(*late)
+        await self._timed('flush', self._flush, ctx)
+
+    async def _timed(self, name: str, callback, ctx: MemberContext):
+        start = time.perf_counter(); failed = False
+        try: await callback(ctx)
+        except Exception as e:
+            failed = True
+            logger.error(f"Erreur dans l'étape '{name}' du pipeline {self.kind} pour {ctx.member}: {e}", exc_info=True)
+        finally:
+            metrics = getattr(self.bot, 'metrics', None)
+            if metrics: metrics.observe_listener(f'member_{self.kind}_pipeline', name, time.perf_counter() - start, failed)
+
+    async def _flush(self, ctx: MemberContext):
+        roles_add, roles_remove, reasons, messages = ctx._take_actions()
+        jobs = []
+        if (roles_add or roles_remove) and isinstance(ctx.member, discord.Member):
+            jobs.append(self._apply_roles(ctx.member, roles_add, roles_remove, reasons))
+        by_channel: dict[int, list[tuple[discord.abc.Messageable, dict]]] = {}
+        for channel, kwargs in messages: by_channel.setdefault(channel.id, []).append((channel, kwargs))
+        jobs += [self._send_all(batch) for batch in by_channel.values()] # Ordre conservé dans un même salon
+        if jobs: await asyncio.gather(*jobs)
+
+    async def _apply_roles(self, member: discord.Member, roles_add: dict, roles_remove: dict, reasons: list[str]):
+        # Un appel par rôle modifié (PUT/DELETE) : jamais de remplacement de la liste complète depuis le cache,
+        # qui effacerait un rôle ajouté entre-temps par un admin ou un autre bot
+        current = {role.id for role in member.roles}
+        to_add = [role for rid, role in roles_add.items() if rid not in current]
+        to_remove = [role for rid, role in roles_remove.items() if rid in current]
+        if not to_add and not to_remove: return
+        reason = " ; ".join(reasons)
+        try:
+            if to_add: await member.add_roles(*to_add, reason=reason)
+            if to_remove: await member.remove_roles(*to_remove, reason=reason)
+        except discord.Forbidden: logger.error(f"Permissions manquantes pour modifier les rôles de {member.name} (hiérarchie ?).")
+        except discord.HTTPException as e: logger.error(f"Impossible de modifier les rôles de {member.name}: {e}")
+
+    async def _send_all(self, batch: list[tuple[discord.abc.Messageable, dict]]):
+        for channel, kwargs in batch:
+            try: await channel.send(**kwargs)
+            except discord.Forbidden: logger.error(f"Permissions manquantes (Send Messages/Embed Links) dans {getattr(channel, 'name', channel)}")
+            except discord.HTTPException as e: logger.error(f"Erreur d'envoi dans {getattr(channel, 'name', channel)}: {e}")
+
+
+def get_member_pipeline(bot, kind: str) -> MemberPipeline:
+    """Retourne le pipeline 'join' ou 'leave' attaché au bot (créé au premier appel)."""
+    pipelines = getattr(bot, 'member_pipelines', None)
+    if pipelines is None: pipelines = bot.member_pipelines = {}
+    if kind not in pipelines: pipelines[kind] = MemberPipeline(bot, kind)
+    return pipelines[kind]
@@ -0,0 +1,45 @@
+# utils/ratelimit.py
+import asyncio
+import time
+
+
+class RateBudget:
+    """Budget d'appels pour les opérations en masse.
+
+    Au plus `concurrency` opérations simultanées, et au plus `rate` démarrages par seconde
+    (avec une rafale initiale de `burst`). S'utilise avec `async with budget:`.
+    Le limiteur interne de discord.py reste actif : le budget évite surtout de saturer
+    les buckets partagés avec le trafic interactif.
+    """
+
+    def __init__(self, rate: float, burst: int = 1, concurrency: int = 5):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+        self._slots = asyncio.Semaphore(max(1, concurrency))
+
+    async def _take_token(self):
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+            self._tokens = 0.0
+            self._last = time.monotonic()
+
+    async def __aenter__(self):
+        await self._slots.acquire()
+        try: await self._take_token()
+        except BaseException:
+            self._slots.release()
+            raise
+        return self
+
+    async def __aexit__(self, *exc):
+        self._slots.release()
+        return False
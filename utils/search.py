@@ -0,0 +1,111 @@
+# utils/search.py
+import re
+import unicodedata
+from collections import Counter
+
+_NOT_ALNUM = re.compile(r'[^0-9a-z]+')
+CANDIDATE_FACTOR = 2 # Candidats notés par résultat demandé (classés d'abord par trigrammes communs)
+MIN_CANDIDATES = 20
+
+
+def normalize_name(text: str) -> str:
+    """'I Bvrcxla I' -> 'i bvrcxla i' ; 'Pur_LoboW' -> 'pur lobow' (accents, casse et séparateurs ignorés)."""
+    text = unicodedata.normalize('NFKD', str(text or '')).encode('ascii', 'ignore').decode('ascii').casefold()
+    return _NOT_ALNUM.sub(' ', text).strip()
+
+
+def trigrams(text: str) -> set[str]:
+    """Trigrammes d'un texte normalisé, mots bordés d'un espace ('lobo' -> ' lo', 'lob', 'obo', 'bo ')."""
+    grams = set()
+    for word in text.split():
+        padded = f" {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    """Index flou en mémoire : clé -> plusieurs textes (nom de joueur, pseudo Discord...).
+
+    Requête : candidats partageant au moins un trigramme (listes inversées), classés par
+    coefficient de Dice sur les trigrammes, bonus si la requête est un préfixe/sous-chaîne.
+    """
+
+    def __init__(self):
+        self._postings: dict[str, set] = {}
+        self._docs: dict[object, list[tuple[str, frozenset]]] = {} # clé -> [(texte normalisé, trigrammes)]
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, key, *texts: str):
+        """Indexe (ou réindexe) `key` sous les textes donnés."""
+        self.remove(key)
+        docs = []
+        for text in texts:
+            normalized = normalize_name(text)
+            # Variante sans séparateurs : 'PurLoboW' retrouve 'Pur_LoboW'
+            for variant in (normalized, normalized.replace(' ', '')):
+                if not variant or any(variant == d[0] for d in docs): continue
+                grams = frozenset(trigrams(variant))
+                docs.append((variant, grams))
+                for gram in grams: self._postings.setdefault(gram, set()).add(key)
+        if docs: self._docs[key] = docs
+
+    def remove(self, key):
+        for text, grams in self._docs.pop(key, ()):
+            for gram in grams:
+                keys = self._postings.get(gram)
+                if keys is None: continue
+                keys.discard(key)
+                if not keys: del self._postings[gram]
+
+    def search(self, query: str, limit: int = 25, min_score: float = 0.2) -> list[tuple[object, float]]:
+        """[(clé, score)] par score décroissant ; score dans [0, 1] (1 = identique après normalisation)."""
+        normalized = normalize_name(query)
+        if not normalized: return []
+        grams = trigrams(normalized); size = len(grams)
+        shared = Counter()
+        for gram in grams: shared.update(self._postings.get(gram, ()))
+        results = []
+        for key, _ in shared.most_common(max(limit * CANDIDATE_FACTOR, MIN_CANDIDATES)): # Seuls les mieux placés sont notés
+            best = 0.0
+            for text, doc_grams in self._docs[key]:
+                if text == normalized: best = 1.0; break
+                score = 2 * len(grams & doc_grams) / (size + len(doc_grams))
+                if score < 0.9 and normalized in text: score = 0.9 if text.startswith(normalized) else max(score, 0.8)
+                if score > best: best = score
+            if best >= min_score: results.append((key, best))
+        results.sort(key=lambda item: item[1], reverse=True)
+        return results[:limit]
+
+
+def compact_name(text: str) -> str:
+    """Forme comparée pour les doublons : 'Pur_LoboW', 'pur lobow' et 'PurLoboW' -> 'purlobow'."""
+    return normalize_name(text).replace(' ', '')
+
+
+class ExactNameIndex:
+    """Table exacte d'un seul nom par clé (casse, accents et séparateurs ignorés) : contrôle des doublons."""
+
+    def __init__(self):
+        self._keys: dict[str, set] = {} # nom compacté -> clés
+        self._names: dict[object, str] = {}
+
+    def add(self, key, text: str):
+        self.remove(key)
+        name = compact_name(text)
+        if not name: return
+        self._names[key] = name
+        self._keys.setdefault(name, set()).add(key)
+
+    def remove(self, key):
+        name = self._names.pop(key, None)
+        keys = self._keys.get(name)
+        if keys is None: return
+        keys.discard(key)
+        if not keys: del self._keys[name]
+
+    def owners(self, text: str, exclude=None) -> list:
+        """Clés déjà enregistrées sous ce nom (hors `exclude`)."""
+        name = compact_name(text)
+        return [key for key in self._keys.get(name, ()) if key != exclude] if name else []
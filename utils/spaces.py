@@ -0,0 +1,207 @@
+# utils/spaces.py
+import discord
+import logging
+import asyncio
+import re
+import time
+from collections import Counter
+from utils.guilds import guild_config
+from utils.locks import KeyedLock
+
+logger = logging.getLogger(__name__)
+
+# Limites Discord
+CATEGORY_CHANNEL_LIMIT = 50   # Salons max par catégorie
+GUILD_CHANNEL_LIMIT = 500     # Salons max par serveur (catégories comprises)
+MAX_CHANNELS_ERROR_CODE = 30013
+PENDING_TTL = 60.0 # Secondes au-delà desquelles le cache fait foi pour un salon que nous avons créé
+
+SPACE_MODES = ('channel', 'thread')
+THREAD_ARCHIVE_MINUTES = 10080 # 7 jours
+
+
+def is_private_space(channel) -> bool:
+    """Vrai si le salon peut accueillir un ticket/une évaluation (salon texte ou thread)."""
+    return isinstance(channel, (discord.TextChannel, discord.Thread))
+
+
+def read_marker(text: str | None, key: str) -> int | None:
+    """Extrait l'ID stocké sous la forme 'Clé:123' dans un topic ou un footer."""
+    if not text or f"{key}:" not in text: return None
+    match = re.search(rf'{re.escape(key)}:(\d+)', text)
+    return int(match.group(1)) if match else None
+
+
+def read_space_marker(space, key: str, message: discord.Message | None = None) -> int | None:
+    """Cherche le marqueur dans le topic du salon puis dans les footers du message fourni (threads sans topic)."""
+    value = read_marker(getattr(space, 'topic', None), key)
+    if value is None and message is not None:
+        for embed in message.embeds:
+            value = read_marker(embed.footer.text if embed.footer else None, key)
+            if value is not None: break
+    return value
+
+
+async def find_space_marker(space, key: str) -> int | None:
+    """Comme read_space_marker, mais va chercher le premier message du bot si nécessaire (1 appel REST)."""
+    value = read_space_marker(space, key)
+    if value is not None or not isinstance(space, discord.Thread): return value
+    try:
+        async for message in space.history(limit=1, oldest_first=True):
+            return read_space_marker(space, key, message)
+    except discord.HTTPException as e:
+        logger.warning(f"Impossible de lire le premier message de {space.name}: {e}")
+    return None
+
+
+class PrivateSpaceProvisioner:
+    """Crée et supprime les espaces privés d'un sous-système ('TICKET' ou 'EVALUATION').
+
+    Mode 'channel' : salons texte dans <SOUS-SYSTÈME>_CATEGORY_ID, avec catégories de débordement
+    ("<nom> #2", "<nom> #3"...) créées quand la catégorie est pleine et supprimées une fois vides.
+    Mode 'thread' : threads privés sous <SOUS-SYSTÈME>_THREAD_PARENT_ID (hors limite de salons).
+    """
+
+    def __init__(self, bot, subsystem: str):
+        self.bot = bot
+        self.subsystem = subsystem
+        self._locks = KeyedLock() # Par serveur : création et retrait des catégories de débordement uniquement
+        # Salons créés par nous mais peut-être pas encore dans le cache (événement gateway en retard) : ID -> date de création
+        self._pending: dict[int, dict[int, float]] = {}
+        self._reserved = Counter()    # Catégorie -> créations de salon en cours (place réservée avant l'appel REST)
+        self._retiring: set[int] = set() # Catégories de débordement en cours de suppression
+        self._new_categories: dict[int, discord.CategoryChannel] = {} # Débordements créés, pas encore dans le cache
+
+    def _config(self, guild: discord.Guild | None):
+        return guild_config(self.bot, guild) or self.bot.config
+
+    def mode(self, guild: discord.Guild | None = None) -> str:
+        """Mode du serveur ('channel' ou 'thread') ; sans serveur, celui du .env."""
+        mode = str(self._config(guild).get(f'{self.subsystem}_MODE') or 'channel').lower()
+        return mode if mode in SPACE_MODES else 'channel'
+
+    def _base_category(self, guild: discord.Guild) -> discord.CategoryChannel | None:
+        category_id = self._config(guild).get(f'{self.subsystem}_CATEGORY_ID')
+        category = guild.get_channel(category_id) if category_id else None
+        if category_id and not isinstance(category, discord.CategoryChannel):
+            logger.error(f"{self.subsystem}_CATEGORY_ID ({category_id}) invalide.")
+            return None
+        return category
+
+    def _thread_parent(self, guild: discord.Guild) -> discord.TextChannel | None:
+        parent_id = self._config(guild).get(f'{self.subsystem}_THREAD_PARENT_ID')
+        parent = guild.get_channel(parent_id) if parent_id else None
+        return parent if isinstance(parent, discord.TextChannel) else None
+
+    def _overflow_prefix(self, base: discord.CategoryChannel) -> str:
+        return f"{base.name} #"
+
+    def _category_family(self, guild: discord.Guild, base: discord.CategoryChannel) -> list[discord.CategoryChannel]:
+        prefix = self._overflow_prefix(base)
+        cached = {c.id: c for c in guild.categories}
+        for category_id in [cid for cid in self._new_categories if cid in cached]: del self._new_categories[category_id]
+        cached.update({cid: c for cid, c in self._new_categories.items() if c.guild.id == guild.id})
+        family = [c for c in cached.values() if c.id == base.id or c.name.startswith(prefix)]
+        return sorted(family, key=lambda c: (c.id != base.id, c.position))
+
+    def _channel_count(self, category: discord.CategoryChannel, exclude_id: int | None = None) -> int:
+        ids = {c.id for c in category.channels}
+        pending = self._pending.get(category.id)
+        if pending:
+            # Oublie les salons arrivés dans le cache, ou trop anciens pour l'être encore (supprimés à la main entre-temps)
+            now = time.monotonic()
+            for channel_id in [cid for cid, created in pending.items() if cid in ids or now - created > PENDING_TTL]: del pending[channel_id]
+            ids |= pending.keys()
+        ids.discard(exclude_id)
+        return len(ids) + self._reserved[category.id]
+
+    def _free_category(self, guild: discord.Guild, base: discord.CategoryChannel) -> discord.CategoryChannel | None:
+        for category in self._category_family(guild, base):
+            if category.id not in self._retiring and self._channel_count(category) < CATEGORY_CHANNEL_LIMIT: return category
+        return None
+
+    async def _reserve_category(self, guild: discord.Guild, reason: str) -> discord.CategoryChannel | None:
+        """Catégorie du prochain salon, place réservée (`_reserved`) avant de rendre la main.
+
+        Choix et réservation se font sans `await` entre les deux : les créations concurrentes ne se
+        sérialisent pas ; seul l'ajout d'une catégorie de débordement passe par le verrou du serveur.
+        """
+        base = self._base_category(guild)
+        if not base: return None
+        category = self._free_category(guild, base)
+        if not category:
+            async with self._locks(guild.id):
+                # Une création concurrente a pu ajouter la catégorie de débordement pendant l'attente du verrou
+                category = self._free_category(guild, base) or await self._create_overflow(guild, base, reason)
+        self._reserved[category.id] += 1
+        return category
+
+    async def _create_overflow(self, guild: discord.Guild, base: discord.CategoryChannel, reason: str) -> discord.CategoryChannel:
+        family = self._category_family(guild, base)
+        used = {c.name[len(self._overflow_prefix(base)):] for c in family}
+        index = 2
+        while str(index) in used: index += 1
+        overflow = await guild.create_category(
+            name=f"{self._overflow_prefix(base)}{index}", overwrites=base.overwrites,
+            position=family[-1].position + 1, reason=f"Débordement {self.subsystem}: {reason}"
+        )
+        self._new_categories[overflow.id] = overflow
+        logger.info(f"Catégorie de débordement créée: {overflow.name} ({overflow.id})")
+        return overflow
+
+    async def create(self, guild: discord.Guild, *, name: str, topic: str, overwrites: dict,
+                     members: list, reason: str) -> discord.TextChannel | discord.Thread:
+        """Crée l'espace privé selon le mode configuré. `members` sont ajoutés au thread en mode 'thread'."""
+        if self.mode(guild) == 'thread':
+            return await self._create_thread(guild, name=name, members=members, reason=reason)
+        try:
+            return await self._create_channel(guild, name=name, topic=topic, overwrites=overwrites, reason=reason)
+        except discord.HTTPException as e:
+            # Limite de 500 salons atteinte : repli sur un thread si un parent est configuré
+            if e.code == MAX_CHANNELS_ERROR_CODE and self._thread_parent(guild):
+                logger.warning(f"Limite de salons atteinte, repli en thread privé pour {name}.")
+                return await self._create_thread(guild, name=name, members=members, reason=reason)
+            raise
+
+    async def _create_channel(self, guild: discord.Guild, *, name: str, topic: str, overwrites: dict, reason: str) -> discord.TextChannel:
+        category = await self._reserve_category(guild, reason)
+        try:
+            channel = await guild.create_text_channel(name=name, category=category, overwrites=overwrites, topic=topic, reason=reason)
+            if category: self._pending.setdefault(category.id, {})[channel.id] = time.monotonic()
+            return channel
+        finally:
+            if category:
+                self._reserved[category.id] -= 1
+                if self._reserved[category.id] <= 0: del self._reserved[category.id]
+
+    async def _create_thread(self, guild: discord.Guild, *, name: str, members: list, reason: str) -> discord.Thread:
+        parent = self._thread_parent(guild)
+        if not parent:
+            raise RuntimeError(f"{self.subsystem}_THREAD_PARENT_ID non configuré ou invalide.")
+        thread = await parent.create_thread(
+            name=name[:100], type=discord.ChannelType.private_thread, invitable=False,
+            auto_archive_duration=THREAD_ARCHIVE_MINUTES, reason=reason
+        )
+        results = await asyncio.gather(*(thread.add_user(m) for m in members if m), return_exceptions=True)
+        for error in (r for r in results if isinstance(r, Exception)):
+            logger.warning(f"Ajout d'un membre au thread {thread.name} échoué: {error}")
+        return thread
+
+    async def delete(self, space: discord.TextChannel | discord.Thread, *, reason: str):
+        """Supprime l'espace et retire sa catégorie de débordement si elle est devenue vide."""
+        category = space.category if isinstance(space, discord.TextChannel) else None
+        await space.delete(reason=reason)
+        if not category: return
+        self._pending.get(category.id, {}).pop(space.id, None)
+        base = self._base_category(space.guild)
+        if not base or category.id == base.id: return
+        async with self._locks(space.guild.id):
+            if self._channel_count(category, exclude_id=space.id) > 0: return
+            self._retiring.add(category.id) # Plus de réservation dans cette catégorie pendant sa suppression
+            try:
+                await category.delete(reason=f"Catégorie de débordement {self.subsystem} vide")
+                self._pending.pop(category.id, None); self._new_categories.pop(category.id, None)
+                logger.info(f"Catégorie de débordement retirée: {category.name} ({category.id})")
+            except discord.NotFound: pass
+            except discord.HTTPException as e: logger.warning(f"Impossible de retirer la catégorie {category.name}: {e}")
+            finally: self._retiring.discard(category.id)
@@ -0,0 +1,122 @@
+# utils/startup.py
+import importlib
+import importlib.util
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+STARTUP_HISTORY_FILE = 'data/startup_timings.jsonl'
+
+
+def lazy_imports_enabled() -> bool:
+    """LAZY_IMPORTS (1 par défaut) : imports différés des modules lourds optionnels ; 0 pour tout importer au démarrage."""
+    return (os.getenv('LAZY_IMPORTS') or '1').strip().lower() not in ('0', 'false', 'no')
+
+
+def lazy_import(name: str, enabled: bool = True):
+    """Importe un module lourd à la première utilisation d'un de ses attributs (importlib.util.LazyLoader).
+
+    Avec enabled=False (ou si le module est déjà chargé), import classique.
+    """
+    if not enabled or name in sys.modules: return importlib.import_module(name)
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None: return importlib.import_module(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def topological_waves(names, dependencies: dict) -> list[list[str]]:
+    """Regroupe les extensions en vagues : chaque vague ne dépend que des précédentes."""
+    remaining = {n: {d for d in dependencies.get(n, ()) if d in names} for n in names}
+    waves = []
+    while remaining:
+        ready = sorted(n for n, deps in remaining.items() if not deps)
+        if not ready: # Cycle : on charge le reste séquentiellement
+            logger.warning(f"Dépendances cycliques entre Cogs: {', '.join(sorted(remaining))}")
+            waves.extend([n] for n in sorted(remaining))
+            break
+        waves.append(ready)
+        for n in ready: del remaining[n]
+        for deps in remaining.values(): deps.difference_update(ready)
+    return waves
+
+
+def current_version() -> str:
+    """Version du bot : BOT_VERSION, sinon le commit git courant."""
+    version = os.getenv('BOT_VERSION')
+    if version: return version
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=2,
+                              cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip() or 'inconnue'
+    except Exception:
+        return 'inconnue'
+
+
+class StartupTimer:
+    """Chronométrage du démarrage par phase, depuis le lancement du processus."""
+
+    def __init__(self, t0: float | None = None):
+        self.t0 = t0 if t0 is not None else time.perf_counter()
+        self.phases: list[tuple[str, float]] = []
+        self.marks: dict[str, float] = {}
+        self.ready_after: float | None = None
+
+    def record(self, name: str, seconds: float):
+        self.phases.append((name, seconds))
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try: yield
+        finally: self.record(name, time.perf_counter() - start)
+
+    def mark(self, name: str) -> float:
+        """Horodate un jalon (secondes depuis t0). Le premier horodatage d'un nom est conservé."""
+        return self.marks.setdefault(name, time.perf_counter())
+
+    def since(self, start_mark: str, end_mark: str) -> float | None:
+        if start_mark in self.marks and end_mark in self.marks:
+            return self.marks[end_mark] - self.marks[start_mark]
+        return None
+
+    def report(self, previous: dict | None = None) -> str:
+        lines = ["Temps de démarrage :"]
+        for name, seconds in self.phases:
+            lines.append(f"  {name:<38} {seconds * 1000:9.1f} ms")
+        if self.ready_after is not None:
+            line = f"  {'=> prêt pour les interactions':<38} {self.ready_after * 1000:9.1f} ms"
+            if previous and previous.get('ready_after'):
+                line += f" (précédent {previous['ready_after'] * 1000:.1f} ms, version {previous.get('version')})"
+            lines.append(line)
+        return "\n".join(lines)
+
+    def load_previous(self, path: str = STARTUP_HISTORY_FILE) -> dict | None:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                last = None
+                for line in f:
+                    if line.strip(): last = line
+            return json.loads(last) if last else None
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def save(self, version: str, path: str = STARTUP_HISTORY_FILE):
+        """Ajoute ce démarrage à l'historique JSON Lines (une ligne par démarrage)."""
+        entry = {'version': version, 'at': time.time(), 'ready_after': self.ready_after,
+                 'phases': {name: round(seconds, 6) for name, seconds in self.phases}}
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.error(f"Impossible d'écrire l'historique de démarrage {path}: {e}")
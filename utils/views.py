@@ -0,0 +1,46 @@
+# utils/views.py
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PersistentViewRegistry:
+    """Registre des vues persistantes auquel chaque Cog contribue dans son setup().
+
+    install() est idempotent : chaque vue n'est ajoutée au bot qu'une seule fois,
+    quel que soit le nombre d'appels (reconnexions gateway, rechargement de Cog...).
+    """
+
+    def __init__(self):
+        self._factories: dict = {}
+        self._installed: set[str] = set()
+
+    def contribute(self, name: str, factory):
+        """Déclare une vue persistante. `factory(bot)` doit retourner une instance de la vue."""
+        self._factories.setdefault(name, factory)
+
+    def install(self, bot) -> int:
+        """Ajoute au bot les vues pas encore enregistrées. Retourne le nombre de vues ajoutées."""
+        added = 0
+        for name, factory in self._factories.items():
+            if name in self._installed: continue
+            try:
+                bot.add_view(factory(bot))
+                self._installed.add(name)
+                added += 1
+                logger.info(f"-> Vue persistante {name} enregistrée.")
+            except Exception as e:
+                logger.error(f"Erreur enregistrement {name}: {e}", exc_info=True)
+        return added
+
+    @property
+    def installed(self) -> set[str]:
+        return set(self._installed)
+
+
+def get_view_registry(bot) -> PersistentViewRegistry:
+    """Retourne le registre attaché au bot (créé au premier appel)."""
+    registry = getattr(bot, 'view_registry', None)
+    if registry is None:
+        registry = bot.view_registry = PersistentViewRegistry()
+    return registry
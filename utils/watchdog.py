@@ -0,0 +1,126 @@
+# utils/watchdog.py
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+
+from utils.metrics import Histogram, WindowedHistogram
+
+logger = logging.getLogger(__name__)
+
+# Bornes (secondes) de l'histogramme de retard de la boucle
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LAG_WINDOW = 300.0 # Secondes couvertes par la vue glissante (!perf)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_SKIPPED_FILES = {os.path.abspath(__file__), os.path.join(PROJECT_ROOT, 'main.py')}
+
+
+def project_frames(stack: traceback.StackSummary) -> list[traceback.FrameSummary]:
+    """Frames du code du bot (cogs/, utils/...), hors bibliothèques, du plus externe au plus interne."""
+    frames = []
+    for frame in stack:
+        path = os.path.abspath(frame.filename)
+        if path.startswith(PROJECT_ROOT + os.sep) and 'site-packages' not in path and path not in _SKIPPED_FILES:
+            frames.append(frame)
+    return frames
+
+
+def _where(frame: traceback.FrameSummary) -> str:
+    return f"{os.path.relpath(frame.filename, PROJECT_ROOT)}:{frame.lineno} {frame.name}"
+
+
+class LoopWatchdog:
+    """Surveille le retard de la boucle asyncio.
+
+    Une tâche mesure en continu le retard de réveil (histogramme). Un thread annexe détecte un blocage
+    pendant qu'il a lieu (heartbeat non rafraîchi depuis `threshold` s) et journalise la pile du thread
+    de la boucle : tâche en cours et frames du bot responsables. Journalisation limitée à une pile par
+    `log_interval` secondes.
+    """
+
+    def __init__(self, interval: float = 0.1, threshold: float = 0.5, log_interval: float = 60.0):
+        self.interval = interval
+        self.threshold = threshold
+        self.log_interval = log_interval
+        self.lag = Histogram(LAG_BUCKETS) # Depuis le démarrage (Prometheus)
+        self.recent_lag = WindowedHistogram(LAG_BUCKETS, window=LAG_WINDOW) # Dernières minutes (!perf)
+        self.stalls = 0           # Blocages détectés par le thread annexe
+        self.suppressed = 0       # Piles non journalisées (limitation)
+        self.last_culprit: str | None = None
+        self._beat = time.monotonic()
+        self._loop = None
+        self._loop_thread_id = None
+        self._task = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._last_log = 0.0
+
+    # --- Cycle de vie ---
+    def start(self):
+        """À appeler depuis la boucle surveillée."""
+        if self._task: return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = self._loop.create_task(self._monitor(), name="watchdog: retard de boucle")
+        self._thread = threading.Thread(target=self._sidecar, name="watchdog-boucle", daemon=True)
+        self._thread.start()
+        logger.info(f"Watchdog de boucle démarré (seuil {self.threshold * 1000:.0f} ms).")
+
+    async def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            try: await self._task
+            except asyncio.CancelledError: pass
+            self._task = None
+        if self._thread: await asyncio.to_thread(self._thread.join, 1.0); self._thread = None
+
+    # --- Mesure dans la boucle ---
+    async def _monitor(self):
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - start - self.interval)
+            self.lag.observe(lag); self.recent_lag.observe(lag)
+            self._beat = now
+
+    # --- Thread annexe ---
+    def _sidecar(self):
+        stalled_since = None # Heartbeat du blocage déjà capturé
+        while not self._stop.wait(self.interval / 2):
+            beat = self._beat
+            blocked = time.monotonic() - beat
+            if blocked < self.threshold or beat == stalled_since: continue
+            stalled_since = beat; self.stalls += 1
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None: continue
+            self._report(traceback.extract_stack(frame), blocked)
+
+    def _report(self, stack: traceback.StackSummary, blocked: float):
+        frames = project_frames(stack)
+        task = asyncio.current_task(self._loop) if self._loop else None # Lecture seule, depuis le thread annexe
+        self.last_culprit = _where(frames[-1]) if frames else _where(stack[-1])
+        now = time.monotonic()
+        if now - self._last_log < self.log_interval:
+            self.suppressed += 1
+            return
+        self._last_log = now
+        chain = " > ".join(f"{os.path.relpath(f.filename, PROJECT_ROOT)}:{f.name}" for f in frames) or "aucune frame du bot"
+        suppressed = f" ({self.suppressed} autres blocages non détaillés)" if self.suppressed else ""
+        self.suppressed = 0
+        logger.warning(f"Boucle asyncio bloquée depuis {blocked * 1000:.0f} ms{suppressed}. "
+                       f"Tâche: {task.get_name() if task else 'inconnue'} ; responsable: {self.last_culprit} ; chaîne: {chain}\n"
+                       + "".join(traceback.format_list(stack[-12:])))
+
+    # --- Métriques ---
+    def prometheus(self) -> list[str]:
+        lines = ['# TYPE pur_event_loop_lag_seconds histogram']
+        lines += self.lag.prometheus('pur_event_loop_lag_seconds')
+        lines += ['# TYPE pur_event_loop_stalls_total counter', f'pur_event_loop_stalls_total {self.stalls}']
+        return lines